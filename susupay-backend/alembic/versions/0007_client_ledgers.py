@@ -0,0 +1,103 @@
+"""Add client_ledgers table and rebase client_balances view on it
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Persisted per-client totals — maintained on confirm / payout completion
+    op.create_table(
+        "client_ledgers",
+        sa.Column("client_id", UUID(as_uuid=True), sa.ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("collector_id", UUID(as_uuid=True), sa.ForeignKey("collectors.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("total_deposits", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("total_payouts", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("balance", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_client_ledgers_collector", "client_ledgers", ["collector_id"])
+
+    # Backfill from the ledger tables
+    op.execute("""
+        INSERT INTO client_ledgers (client_id, collector_id, total_deposits, total_payouts, balance)
+        SELECT
+            c.id,
+            c.collector_id,
+            COALESCE(t.total_confirmed, 0),
+            COALESCE(p.total_completed, 0),
+            COALESCE(t.total_confirmed, 0) - COALESCE(p.total_completed, 0)
+        FROM clients c
+        LEFT JOIN (
+            SELECT client_id, SUM(amount) AS total_confirmed
+            FROM transactions
+            WHERE status = 'CONFIRMED'
+            GROUP BY client_id
+        ) t ON t.client_id = c.id
+        LEFT JOIN (
+            SELECT client_id, SUM(amount) AS total_completed
+            FROM payouts
+            WHERE status = 'COMPLETED'
+            GROUP BY client_id
+        ) p ON p.client_id = c.id
+    """)
+
+    # Keep the view for ad-hoc readers, but serve it from the ledger
+    op.execute("DROP VIEW IF EXISTS client_balances;")
+    op.execute("""
+        CREATE VIEW client_balances AS
+        SELECT
+            c.id AS client_id,
+            c.collector_id,
+            c.full_name,
+            c.phone,
+            COALESCE(l.total_deposits, 0) AS total_deposits,
+            COALESCE(l.total_payouts, 0) AS total_payouts,
+            COALESCE(l.balance, 0) AS balance
+        FROM clients c
+        LEFT JOIN client_ledgers l ON l.client_id = c.id
+        WHERE c.is_active = true;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW IF EXISTS client_balances;")
+    op.execute("""
+        CREATE VIEW client_balances AS
+        SELECT
+            c.id AS client_id,
+            c.collector_id,
+            c.full_name,
+            c.phone,
+            COALESCE(t.total_confirmed, 0) AS total_deposits,
+            COALESCE(p.total_completed, 0) AS total_payouts,
+            COALESCE(t.total_confirmed, 0) - COALESCE(p.total_completed, 0) AS balance
+        FROM clients c
+        LEFT JOIN (
+            SELECT client_id, SUM(amount) AS total_confirmed
+            FROM transactions
+            WHERE status = 'CONFIRMED'
+            GROUP BY client_id
+        ) t ON t.client_id = c.id
+        LEFT JOIN (
+            SELECT client_id, SUM(amount) AS total_completed
+            FROM payouts
+            WHERE status = 'COMPLETED'
+            GROUP BY client_id
+        ) p ON p.client_id = c.id
+        WHERE c.is_active = true;
+    """)
+    op.drop_index("ix_client_ledgers_collector", table_name="client_ledgers")
+    op.drop_table("client_ledgers")
@@ -0,0 +1,34 @@
+"""Add client_streaks table
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows are computed lazily on first read, then maintained on confirm
+    op.create_table(
+        "client_streaks",
+        sa.Column("client_id", UUID(as_uuid=True), sa.ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("frequency", sa.String(10), nullable=False),
+        sa.Column("expected_amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("streak_count", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("last_full_period", sa.Date, nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("client_streaks")
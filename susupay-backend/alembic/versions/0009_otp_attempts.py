@@ -0,0 +1,27 @@
+"""Add attempts counter to otp_codes
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "otp_codes",
+        sa.Column("attempts", sa.Integer, server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("otp_codes", "attempts")
@@ -0,0 +1,41 @@
+"""Add (submitted_at, id) indexes for keyset pagination
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_transactions_client_submitted", table_name="transactions")
+    op.create_index(
+        "ix_transactions_client_submitted", "transactions", ["client_id", "submitted_at", "id"]
+    )
+    op.create_index(
+        "ix_transactions_collector_submitted",
+        "transactions",
+        ["collector_id", "submitted_at", "id"],
+    )
+    op.create_index(
+        "ix_transactions_collector_status_submitted",
+        "transactions",
+        ["collector_id", "status", "submitted_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_collector_status_submitted", table_name="transactions")
+    op.drop_index("ix_transactions_collector_submitted", table_name="transactions")
+    op.drop_index("ix_transactions_client_submitted", table_name="transactions")
+    op.create_index(
+        "ix_transactions_client_submitted", "transactions", ["client_id", "submitted_at"]
+    )
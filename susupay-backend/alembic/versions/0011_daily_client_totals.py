@@ -0,0 +1,50 @@
+"""Add daily_client_totals rollup
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Confirmed deposits per (client, UTC day) — maintained on confirm
+    op.create_table(
+        "daily_client_totals",
+        sa.Column("client_id", UUID(as_uuid=True), sa.ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Date, primary_key=True),
+        sa.Column("collector_id", UUID(as_uuid=True), sa.ForeignKey("collectors.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("amount", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("txn_count", sa.Integer, nullable=False, server_default="0"),
+    )
+    op.create_index(
+        "ix_daily_client_totals_collector_day", "daily_client_totals", ["collector_id", "day"]
+    )
+
+    # Backfill from confirmed transactions
+    op.execute("""
+        INSERT INTO daily_client_totals (client_id, day, collector_id, amount, txn_count)
+        SELECT client_id,
+               CAST(confirmed_at AT TIME ZONE 'UTC' AS date),
+               collector_id,
+               SUM(amount),
+               COUNT(*)
+        FROM transactions
+        WHERE status = 'CONFIRMED' AND confirmed_at IS NOT NULL
+        GROUP BY client_id, CAST(confirmed_at AT TIME ZONE 'UTC' AS date), collector_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_client_totals_collector_day", table_name="daily_client_totals")
+    op.drop_table("daily_client_totals")
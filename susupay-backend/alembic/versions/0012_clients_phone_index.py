@@ -0,0 +1,25 @@
+"""Index clients.phone for USSD lookup
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # USSD identifies clients by phone alone; the (collector_id, phone)
+    # unique index cannot serve a lookup without collector_id
+    op.create_index("ix_clients_phone", "clients", ["phone"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_clients_phone", table_name="clients")
@@ -0,0 +1,29 @@
+"""Add payouts.idempotency_key
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("payouts", sa.Column("idempotency_key", sa.String(64), nullable=True))
+    # NULL keys never conflict, so requests without a key are unaffected
+    op.create_unique_constraint(
+        "uq_payouts_client_idempotency_key", "payouts", ["client_id", "idempotency_key"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_payouts_client_idempotency_key", "payouts", type_="unique")
+    op.drop_column("payouts", "idempotency_key")
@@ -0,0 +1,41 @@
+"""
+Process-wide pooled Redis client.
+
+One client (and its connection pool) is kept per event loop: the API has a
+single loop, Celery workers have one per process, and tests get a fresh one
+per test loop without leaking connections across loops.
+"""
+
+import asyncio
+
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+_client: aioredis.Redis | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_redis() -> aioredis.Redis:
+    """Return the shared client for the running loop. Call from async code."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = aioredis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            health_check_interval=30,
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_redis() -> None:
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
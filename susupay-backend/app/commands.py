@@ -0,0 +1,72 @@
+"""
+Maintenance commands for derived tables.
+
+Usage:
+    python -m app.commands ledger rebuild [--collector UUID]
+    python -m app.commands ledger verify [--collector UUID]
+    python -m app.commands rollup rebuild [--collector UUID]
+"""
+
+import argparse
+import asyncio
+import sys
+import uuid
+
+from app.database import async_session, engine
+
+
+async def _ledger(action: str, collector_id: uuid.UUID | None) -> int:
+    from app.services.balance_service import rebuild_client_ledgers, verify_client_ledgers
+
+    async with async_session() as session:
+        if action == "rebuild":
+            count = await rebuild_client_ledgers(session, collector_id)
+            print(f"Rebuilt {count} ledger rows")
+            return 0
+
+        mismatches = await verify_client_ledgers(session, collector_id)
+        for m in mismatches:
+            print(
+                f"{m['client_id']}: ledger {m['ledger_balance']} "
+                f"!= expected {m['expected_balance']}"
+            )
+        print(f"{len(mismatches)} mismatched ledger rows")
+        return 1 if mismatches else 0
+
+
+async def _rollup(action: str, collector_id: uuid.UUID | None) -> int:
+    from app.services.rollup_service import rebuild_daily_totals
+
+    async with async_session() as session:
+        count = await rebuild_daily_totals(session, collector_id)
+        print(f"Rebuilt {count} daily rollup rows")
+        return 0
+
+
+async def _main(args: argparse.Namespace) -> int:
+    try:
+        return await args.handler(args.action, args.collector)
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ledger = sub.add_parser("ledger", help="Client balance ledger")
+    ledger.add_argument("action", choices=["rebuild", "verify"])
+    ledger.add_argument("--collector", type=uuid.UUID, default=None)
+    ledger.set_defaults(handler=_ledger)
+
+    rollup = sub.add_parser("rollup", help="Daily confirmed-deposit rollup")
+    rollup.add_argument("action", choices=["rebuild"])
+    rollup.add_argument("--collector", type=uuid.UUID, default=None)
+    rollup.set_defaults(handler=_rollup)
+
+    args = parser.parse_args(argv)
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
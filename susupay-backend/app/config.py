@@ -7,8 +7,22 @@ class Settings(BaseSettings):
     DATABASE_URL: str = ""
     DATABASE_URL_SYNC: str = ""
 
+    # Connection pool — "queue" keeps warm connections, "null" opens one per checkout
+    DB_POOL_MODE: str = "queue"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False
+    # asyncpg prepared-statement cache. Keep 0 behind pgbouncer in transaction
+    # mode; set e.g. 500 when connecting directly or via a session pooler.
+    DB_STATEMENT_CACHE_SIZE: int = 0
+
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 2.0
 
     # JWT
     JWT_SECRET_KEY: str = "change-me-in-production"
@@ -16,6 +30,37 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_HOURS: int = 8
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
 
+    # OTP (HMAC key defaults to JWT_SECRET_KEY when empty)
+    OTP_SECRET_KEY: str = ""
+    OTP_MAX_ATTEMPTS: int = 5
+
+    # Principal cache (seconds): Redis entry TTL, in-process LRU TTL and size
+    PRINCIPAL_CACHE_TTL: int = 60
+    PRINCIPAL_CACHE_LOCAL_TTL: int = 5
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+
+    # Collector dashboard cache (seconds)
+    DASHBOARD_CACHE_TTL: int = 5
+
+    # PDF reports: render worker processes, cached PDF TTL (seconds)
+    PDF_RENDER_WORKERS: int = 2
+    REPORT_PDF_CACHE_TTL: int = 7 * 24 * 3600
+
+    # Client statements: cached opening balance TTL (seconds)
+    STATEMENT_OPENING_CACHE_TTL: int = 30 * 24 * 3600
+
+    # USSD: hops slower than this are logged (gateway deadlines are a few seconds)
+    USSD_SLOW_HOP_MS: int = 1500
+    # Bearer token for internal metrics endpoints; empty disables them
+    METRICS_TOKEN: str = ""
+    # USSD pre-rendered screens (seconds); invalidated explicitly on changes
+    USSD_SNAPSHOT_TTL: int = 6 * 3600
+
+    # Batch statement jobs: status and output retention (seconds), and the
+    # output directory — must be shared by the API and the worker
+    REPORT_BATCH_TTL: int = 24 * 3600
+    REPORT_BATCH_DIR: str = "var/report-batches"
+
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: str = ""
     CLOUDINARY_API_KEY: str = ""
@@ -1,7 +1,8 @@
 import ssl as ssl_module
 from collections.abc import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import settings
@@ -10,11 +11,37 @@ ssl_ctx = ssl_module.create_default_context()
 ssl_ctx.check_hostname = False
 ssl_ctx.verify_mode = ssl_module.CERT_NONE
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.APP_DEBUG,
-    connect_args={"ssl": ssl_ctx, "statement_cache_size": 0, "prepared_statement_cache_size": 0},
-)
+
+def engine_options() -> dict:
+    """create_async_engine kwargs derived from the DB_* settings."""
+    cache_size = max(settings.DB_STATEMENT_CACHE_SIZE, 0)
+    options: dict = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": {
+            "ssl": ssl_ctx,
+            "statement_cache_size": cache_size,
+            "prepared_statement_cache_size": cache_size,
+        },
+    }
+    if settings.DB_POOL_MODE == "null":
+        options["poolclass"] = pool.NullPool
+    else:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def make_engine(**overrides) -> AsyncEngine:
+    """Build an engine from settings; overrides win over the defaults."""
+    return create_async_engine(settings.DATABASE_URL, **{**engine_options(), **overrides})
+
+
+engine = make_engine()
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -25,3 +52,8 @@ class Base(DeclarativeBase):
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """For work that outlives the request, e.g. a streamed response body."""
+    return async_session
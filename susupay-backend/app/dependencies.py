@@ -1,33 +1,62 @@
+import secrets
 import uuid
+from dataclasses import dataclass
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
 from app.models.client import Client
 from app.models.collector import Collector
+from app.services import principal_cache
 from app.services.auth_service import decode_token
 
 security = HTTPBearer()
 
 
-async def get_current_collector(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db),
-) -> Collector:
+@dataclass(frozen=True)
+class Principal:
+    """Identity from the access token, for routes that need no ORM row."""
+
+    id: uuid.UUID
+    role: str
+
+
+def _subject_id(credentials: HTTPAuthorizationCredentials, role: str) -> uuid.UUID:
     payload = decode_token(credentials.credentials)
-    if payload is None or payload.get("type") != "access" or payload.get("role") != "COLLECTOR":
+    if payload is None or payload.get("type") != "access" or payload.get("role") != role:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
-    collector_id = uuid.UUID(payload["sub"])
+    return uuid.UUID(payload["sub"])
+
+
+async def _load_principal(db: AsyncSession, model, role: str, subject_id: uuid.UUID):
+    cached = await principal_cache.get_cached(role, subject_id)
+    if cached is not None:
+        if principal_cache.is_inactive(cached):
+            return None
+        return await principal_cache.attach(db, model, cached)
+
     result = await db.execute(
-        select(Collector).where(Collector.id == collector_id, Collector.is_active == True)  # noqa: E712
+        select(model).where(model.id == subject_id, model.is_active == True)  # noqa: E712
     )
-    collector = result.scalar_one_or_none()
+    obj = result.scalar_one_or_none()
+    if obj is not None:
+        await principal_cache.put(role, obj)
+    return obj
+
+
+async def get_current_collector(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> Collector:
+    collector_id = _subject_id(credentials, "COLLECTOR")
+    collector = await _load_principal(db, Collector, "COLLECTOR", collector_id)
     if collector is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -40,20 +69,69 @@ async def get_current_client(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db),
 ) -> Client:
-    payload = decode_token(credentials.credentials)
-    if payload is None or payload.get("type") != "access" or payload.get("role") != "CLIENT":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-        )
-    client_id = uuid.UUID(payload["sub"])
-    result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.is_active == True)  # noqa: E712
-    )
-    client = result.scalar_one_or_none()
+    client_id = _subject_id(credentials, "CLIENT")
+    client = await _load_principal(db, Client, "CLIENT", client_id)
     if client is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Client not found or inactive",
         )
     return client
+
+
+def _principal_dependency(role: str):
+    async def dependency(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+    ) -> Principal:
+        subject_id = _subject_id(credentials, role)
+        cached = await principal_cache.get_cached(role, subject_id)
+        if cached is not None and principal_cache.is_inactive(cached):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Account not found or inactive",
+            )
+        return Principal(id=subject_id, role=role)
+
+    return dependency
+
+
+def _active_principal_dependency(role: str, model):
+    async def dependency(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: AsyncSession = Depends(get_db),
+    ) -> Principal:
+        subject_id = _subject_id(credentials, role)
+        result = await db.execute(
+            select(model.id).where(model.id == subject_id, model.is_active == True)  # noqa: E712
+        )
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Account not found or inactive",
+            )
+        return Principal(id=subject_id, role=role)
+
+    return dependency
+
+
+# Token-only identity: no DB query. Deactivated subjects are rejected via the
+# principal cache tombstone, which is best-effort (local only if Redis is down).
+get_current_collector_principal = _principal_dependency("COLLECTOR")
+get_current_client_principal = _principal_dependency("CLIENT")
+
+# Money-moving collector routes: still no ORM row, but is_active is read from
+# the database on every request rather than trusted to the cache.
+get_active_collector_principal = _active_principal_dependency("COLLECTOR", Collector)
+
+
+async def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> None:
+    """Internal endpoints: only callers holding settings.METRICS_TOKEN."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not secrets.compare_digest(credentials.credentials, settings.METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+        )
@@ -1,10 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.cache import close_redis
 from app.config import settings
 from app.routers import announcements, auth, clients, collectors, payouts, reports, transactions, ussd, viral
+from app.services.push_service import close_push_client
+from app.services.report_service import shutdown_pdf_pool
+from app.services.sms_service import close_sms_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_push_client()
+    await close_sms_client()
+    await close_redis()
+    shutdown_pdf_pool()
+
 
-app = FastAPI(title="SusuPay API", version="0.1.0")
+app = FastAPI(title="SusuPay API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,7 +1,10 @@
 from app.models.achievement import Achievement
 from app.models.announcement import Announcement
 from app.models.client import Client
+from app.models.client_ledger import ClientLedger
+from app.models.client_streak import ClientStreak
 from app.models.collector import Collector
+from app.models.daily_client_total import DailyClientTotal
 from app.models.otp_code import OTPCode
 from app.models.payout import Payout
 from app.models.rating import Rating
@@ -13,7 +16,10 @@ __all__ = [
     "Achievement",
     "Announcement",
     "Client",
+    "ClientLedger",
+    "ClientStreak",
     "Collector",
+    "DailyClientTotal",
     "OTPCode",
     "Payout",
     "Rating",
@@ -0,0 +1,26 @@
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, Numeric, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ClientStreak(Base):
+    """Persisted payment streak: streak_count consecutive fully-paid periods
+    ending at last_full_period, under the given frequency/expected amount."""
+
+    __tablename__ = "client_streaks"
+
+    client_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True
+    )
+    frequency: Mapped[str] = mapped_column(String(10), nullable=False)
+    expected_amount: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    streak_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_full_period: Mapped[date | None] = mapped_column(Date, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
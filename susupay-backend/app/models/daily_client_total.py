@@ -0,0 +1,30 @@
+import uuid
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Index, Integer, Numeric
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class DailyClientTotal(Base):
+    """Confirmed deposits per client per UTC day (by confirmed_at), updated in
+    the same transaction as each confirmation."""
+
+    __tablename__ = "daily_client_totals"
+    __table_args__ = (
+        Index("ix_daily_client_totals_collector_day", "collector_id", "day"),
+    )
+
+    client_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    collector_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("collectors.id", ondelete="CASCADE"), nullable=False
+    )
+    amount: Mapped[float] = mapped_column(
+        Numeric(12, 2), nullable=False, default=0, server_default="0"
+    )
+    txn_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
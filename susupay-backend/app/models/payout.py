@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Numeric, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Numeric, String, Text, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -10,6 +10,11 @@ from app.database import Base
 
 class Payout(Base):
     __tablename__ = "payouts"
+    __table_args__ = (
+        UniqueConstraint(
+            "client_id", "idempotency_key", name="uq_payouts_client_idempotency_key"
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid()
@@ -34,6 +39,8 @@ class Payout(Base):
     )
     approved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # Client-supplied key so a retried request does not create a second payout
+    idempotency_key: Mapped[str | None] = mapped_column(String(64))
 
     collector: Mapped["Collector"] = relationship(back_populates="payouts")  # noqa: F821
     client: Mapped["Client"] = relationship(back_populates="payouts")  # noqa: F821
@@ -12,7 +12,13 @@ class Transaction(Base):
     __tablename__ = "transactions"
     __table_args__ = (
         Index("ix_transactions_collector_status", "collector_id", "status"),
-        Index("ix_transactions_client_submitted", "client_id", "submitted_at"),
+        Index("ix_transactions_client_submitted", "client_id", "submitted_at", "id"),
+        # Keyset pagination for collector feeds: (submitted_at, id) within scope
+        Index("ix_transactions_collector_submitted", "collector_id", "submitted_at", "id"),
+        Index(
+            "ix_transactions_collector_status_submitted",
+            "collector_id", "status", "submitted_at", "id",
+        ),
         Index(
             "ix_transactions_mtn_txn_id",
             "mtn_txn_id",
@@ -8,9 +8,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_client, get_current_collector
+from app.dependencies import (
+    Principal,
+    get_current_client,
+    get_current_collector_principal,
+)
 from app.models.client import Client
-from app.models.collector import Collector
 from app.schemas.announcement import (
     AnnouncementCreate,
     AnnouncementResponse,
@@ -37,7 +40,7 @@ router = APIRouter(prefix="/api/v1/announcements", tags=["announcements"])
 @router.post("", response_model=AnnouncementResponse, status_code=status.HTTP_201_CREATED)
 async def post_announcement(
     body: AnnouncementCreate,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     return await create_announcement(
@@ -47,7 +50,7 @@ async def post_announcement(
 
 @router.get("", response_model=list[AnnouncementResponse])
 async def get_announcements_collector(
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     return await list_announcements(db, collector.id)
@@ -57,7 +60,7 @@ async def get_announcements_collector(
 async def patch_announcement(
     announcement_id: uuid.UUID,
     body: AnnouncementUpdate,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     updated = await update_announcement(
@@ -72,7 +75,7 @@ async def patch_announcement(
 @router.delete("/{announcement_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_announcement(
     announcement_id: uuid.UUID,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     deleted = await delete_announcement(db, collector.id, announcement_id)
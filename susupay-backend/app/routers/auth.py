@@ -29,8 +29,10 @@ from app.schemas.auth import (
     TokenRefreshRequest,
     TokenResponse,
 )
+from app.services import principal_cache
 from app.services.auth_service import (
     check_otp_rate_limit,
+    consume_otp,
     create_access_token,
     create_refresh_token,
     create_verification_token,
@@ -40,9 +42,8 @@ from app.services.auth_service import (
     get_collector_by_invite_code,
     get_collector_by_phone,
     hash_otp,
-    hash_pin,
-    verify_otp,
-    verify_pin,
+    hash_pin_async,
+    verify_pin_async,
 )
 from app.services.sms_service import send_sms
 
@@ -81,27 +82,11 @@ async def send_otp(body: OTPSendRequest, db: AsyncSession = Depends(get_db)):
 
 @router.post("/otp/verify", response_model=OTPVerifyResponse)
 async def verify_otp_endpoint(body: OTPVerifyRequest, db: AsyncSession = Depends(get_db)):
-    now = datetime.now(timezone.utc)
-    result = await db.execute(
-        select(OTPCode)
-        .where(
-            OTPCode.phone == body.phone,
-            OTPCode.purpose == body.purpose,
-            OTPCode.used == False,  # noqa: E712
-            OTPCode.expires_at > now,
-        )
-        .order_by(OTPCode.created_at.desc())
-        .limit(1)
-    )
-    otp = result.scalar_one_or_none()
-
-    if otp is None or not verify_otp(body.code, otp.code_hash):
+    if not await consume_otp(db, body.phone, body.purpose, body.code):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired OTP",
         )
-
-    otp.used = True
     await db.commit()
 
     token = create_verification_token(body.phone, body.purpose)
@@ -151,8 +136,9 @@ async def collector_set_pin(body: CollectorSetPinRequest, db: AsyncSession = Dep
     if collector is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collector not found")
 
-    collector.pin_hash = hash_pin(body.pin)
+    collector.pin_hash = await hash_pin_async(body.pin)
     await db.commit()
+    await principal_cache.invalidate("COLLECTOR", collector.id)
 
     return CollectorSetPinResponse()
 
@@ -172,6 +158,7 @@ async def collector_set_momo(body: CollectorSetMomoRequest, db: AsyncSession = D
     collector.contribution_amount = body.contribution_amount
     collector.contribution_frequency = body.contribution_frequency
     await db.commit()
+    await principal_cache.invalidate("COLLECTOR", collector.id)
 
     return CollectorSetMomoResponse(
         collector_id=collector.id,
@@ -188,7 +175,7 @@ async def collector_login(body: CollectorLoginRequest, db: AsyncSession = Depend
     if collector is None or collector.pin_hash is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    if not verify_pin(body.pin, collector.pin_hash):
+    if not await verify_pin_async(body.pin, collector.pin_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     if not collector.is_active:
@@ -217,8 +204,9 @@ async def collector_reset_pin(body: CollectorResetPinRequest, db: AsyncSession =
     if collector is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collector not found")
 
-    collector.pin_hash = hash_pin(body.new_pin)
+    collector.pin_hash = await hash_pin_async(body.new_pin)
     await db.commit()
+    await principal_cache.invalidate("COLLECTOR", collector.id)
 
     return TokenResponse(
         access_token=create_access_token(collector.id, "COLLECTOR"),
@@ -324,25 +312,9 @@ async def client_join(body: ClientJoinRequest, db: AsyncSession = Depends(get_db
 @router.post("/client/login")
 async def client_login(body: ClientLoginRequest, db: AsyncSession = Depends(get_db)):
     # Verify OTP inline (client login is phone + OTP in one step)
-    now = datetime.now(timezone.utc)
-    result = await db.execute(
-        select(OTPCode)
-        .where(
-            OTPCode.phone == body.phone,
-            OTPCode.purpose == "LOGIN",
-            OTPCode.used == False,  # noqa: E712
-            OTPCode.expires_at > now,
-        )
-        .order_by(OTPCode.created_at.desc())
-        .limit(1)
-    )
-    otp = result.scalar_one_or_none()
-
-    if otp is None or not verify_otp(body.code, otp.code_hash):
+    if not await consume_otp(db, body.phone, "LOGIN", body.code):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired OTP")
 
-    otp.used = True
-
     # Find all active clients for this phone
     result = await db.execute(
         select(Client).where(Client.phone == body.phone, Client.is_active == True)  # noqa: E712
@@ -2,7 +2,7 @@ import uuid
 from decimal import Decimal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select, text
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
@@ -21,14 +21,16 @@ from app.schemas.client import (
 from app.schemas.collector import RotationScheduleResponse
 from app.schemas.pagination import PaginatedResponse
 from app.schemas.transaction import ClientTransactionItem
+from app.services import principal_cache
 from app.services.analytics_service import (
     classify_payment,
     get_current_period,
     get_period_payments,
 )
-from app.services.balance_service import get_client_balance
+from app.services.balance_service import get_all_client_balances, get_client_balance
 from app.services.schedule_service import get_client_schedule_summary, get_rotation_schedule
 from app.services.transaction_service import get_client_history
+from app.services.ussd_snapshot import invalidate_ussd_snapshot
 
 router = APIRouter(prefix="/api/v1/clients", tags=["clients"])
 
@@ -68,6 +70,8 @@ async def update_profile(
     if body.push_token is not None:
         client.push_token = body.push_token
     await db.commit()
+    await principal_cache.invalidate("CLIENT", client.id)
+    await invalidate_ussd_snapshot(client.id)
     await db.refresh(client)
 
     # Enrich with collector's contribution settings
@@ -115,7 +119,10 @@ async def get_client_analytics_endpoint(
 ):
     from app.services.analytics_service import get_client_analytics
 
-    return await get_client_analytics(db, client)
+    analytics = await get_client_analytics(db, client)
+    # Persists a streak state rebuilt while computing the analytics
+    await db.commit()
+    return analytics
 
 
 @router.get("/me/group", response_model=list[GroupMemberItem])
@@ -149,17 +156,10 @@ async def get_group_members(
         for row in clients_result.all()
     }
 
-    # Get balances from the view
-    balances_result = await db.execute(
-        text(
-            "SELECT client_id, total_deposits, balance "
-            "FROM client_balances WHERE collector_id = :collector_id"
-        ),
-        {"collector_id": client.collector_id},
-    )
+    # Get balances from the ledger
     balances_map = {
-        row.client_id: {"total_deposits": row.total_deposits, "balance": row.balance}
-        for row in balances_result.all()
+        b["client_id"]: {"total_deposits": b["total_deposits"], "balance": b["balance"]}
+        for b in await get_all_client_balances(db, client.collector_id)
     }
 
     # Get confirmed transaction counts per client
@@ -226,6 +226,8 @@ async def get_member_history(
     status_filter: str | None = Query(None, alias="status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(True),
     client: Client = Depends(get_current_client),
     db: AsyncSession = Depends(get_db),
 ):
@@ -241,6 +243,10 @@ async def get_member_history(
     if not member:
         raise HTTPException(status_code=404, detail="Member not found in your group")
 
-    return await get_client_history(
-        db, member_id, status_filter=status_filter, skip=skip, limit=limit
-    )
+    try:
+        return await get_client_history(
+            db, member_id, status_filter=status_filter, skip=skip, limit=limit,
+            cursor=cursor, include_total=include_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -1,16 +1,15 @@
-from datetime import date, datetime, timezone
 from decimal import Decimal
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_collector
+from app.dependencies import Principal, get_current_collector, get_current_collector_principal
 from app.models.client import Client
 from app.models.collector import Collector
-from app.models.transaction import Transaction
-from app.schemas.analytics import ActivityHeatmap, CollectorAnalytics
+from app.schemas.analytics import ActivityHeatmap, CollectorAnalytics, CompactActivityHeatmap
 from app.schemas.client import ClientListItem
 from app.schemas.collector import (
     CollectorDashboard,
@@ -19,13 +18,16 @@ from app.schemas.collector import (
     RotationOrderRequest,
     RotationScheduleResponse,
 )
+from app.services import principal_cache
 from app.services.analytics_service import (
     classify_payment,
     get_current_period,
     get_period_payments,
 )
 from app.services.balance_service import get_all_client_balances, get_client_balance
+from app.services.dashboard_service import get_collector_dashboard, invalidate_dashboard
 from app.services.schedule_service import get_rotation_schedule, set_rotation_order
+from app.services.ussd_snapshot import invalidate_ussd_collector, invalidate_ussd_snapshot
 
 router = APIRouter(prefix="/api/v1/collectors", tags=["collectors"])
 
@@ -56,6 +58,9 @@ async def update_profile(
     if body.contribution_frequency is not None:
         collector.contribution_frequency = body.contribution_frequency
     await db.commit()
+    await principal_cache.invalidate("COLLECTOR", collector.id)
+    await invalidate_dashboard(collector.id)
+    await invalidate_ussd_collector(collector.id)
     await db.refresh(collector)
     return collector
 
@@ -65,106 +70,7 @@ async def get_dashboard(
     collector: Collector = Depends(get_current_collector),
     db: AsyncSession = Depends(get_db),
 ):
-    # Total and active client counts
-    total_q = await db.execute(
-        select(func.count()).select_from(Client).where(Client.collector_id == collector.id)
-    )
-    active_q = await db.execute(
-        select(func.count())
-        .select_from(Client)
-        .where(Client.collector_id == collector.id, Client.is_active == True)  # noqa: E712
-    )
-
-    # Pending transactions
-    pending_q = await db.execute(
-        select(func.count())
-        .select_from(Transaction)
-        .where(Transaction.collector_id == collector.id, Transaction.status == "PENDING")
-    )
-
-    # Today's confirmed total
-    today_start = datetime.combine(date.today(), datetime.min.time()).replace(tzinfo=timezone.utc)
-    confirmed_q = await db.execute(
-        select(func.coalesce(func.sum(Transaction.amount), 0))
-        .where(
-            Transaction.collector_id == collector.id,
-            Transaction.status == "CONFIRMED",
-            Transaction.confirmed_at >= today_start,
-        )
-    )
-
-    # Next payout info from schedule
-    next_payout_client = None
-    next_payout_date = None
-    schedule = await get_rotation_schedule(db, collector.id)
-    if schedule:
-        today = date.today()
-        current = next((e for e in schedule["entries"] if e["is_current"]), None)
-        if current:
-            next_payout_client = current["full_name"]
-            next_payout_date = current["payout_date"]
-        else:
-            upcoming = next((e for e in schedule["entries"] if e["payout_date"] >= today), None)
-            if upcoming:
-                next_payout_client = upcoming["full_name"]
-                next_payout_date = upcoming["payout_date"]
-
-    # Period progress
-    expected = Decimal(str(collector.contribution_amount))
-    frequency = collector.contribution_frequency
-    start, end, period_label = get_current_period(frequency)
-
-    active_count = active_q.scalar_one()
-    # Get active client IDs for period classification
-    active_result = await db.execute(
-        select(Client.id).where(
-            Client.collector_id == collector.id,
-            Client.is_active == True,  # noqa: E712
-        )
-    )
-    active_ids = {row[0] for row in active_result.all()}
-
-    payments = await get_period_payments(db, collector.id, start, end)
-
-    paid_count = 0
-    partial_count = 0
-    unpaid_count = 0
-    amount_collected = Decimal("0.00")
-
-    for cid in active_ids:
-        paid = payments.get(cid, Decimal("0.00"))
-        amount_collected += paid
-        s = classify_payment(paid, expected)
-        if s in ("PAID", "OVERPAID"):
-            paid_count += 1
-        elif s == "PARTIAL":
-            partial_count += 1
-        else:
-            unpaid_count += 1
-
-    amount_expected = expected * len(active_ids)
-    collection_rate = (
-        float(amount_collected / amount_expected * 100) if amount_expected > 0 else 0.0
-    )
-
-    return CollectorDashboard(
-        collector_id=collector.id,
-        total_clients=total_q.scalar_one(),
-        active_clients=active_count,
-        pending_transactions=pending_q.scalar_one(),
-        total_confirmed_today=float(confirmed_q.scalar_one()),
-        next_payout_client=next_payout_client,
-        next_payout_date=next_payout_date,
-        contribution_amount=expected,
-        contribution_frequency=frequency,
-        period_label=period_label,
-        paid_count=paid_count,
-        partial_count=partial_count,
-        unpaid_count=unpaid_count,
-        amount_collected=amount_collected,
-        amount_expected=amount_expected,
-        collection_rate=round(collection_rate, 1),
-    )
+    return CollectorDashboard(**await get_collector_dashboard(db, collector))
 
 
 @router.get("/me/clients", response_model=list[ClientListItem])
@@ -216,19 +122,23 @@ async def get_analytics(
     return await get_collector_analytics(db, collector)
 
 
-@router.get("/me/analytics/heatmap", response_model=ActivityHeatmap)
+@router.get(
+    "/me/analytics/heatmap", response_model=ActivityHeatmap | CompactActivityHeatmap
+)
 async def get_activity_heatmap(
-    collector: Collector = Depends(get_current_collector),
+    days: int = Query(30, ge=1, le=365),
+    format: Literal["verbose", "compact"] = Query("verbose"),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     from app.services.analytics_service import get_activity_heatmap as _heatmap
 
-    return await _heatmap(db, collector.id)
+    return await _heatmap(db, collector.id, days=days, compact=format == "compact")
 
 
 @router.get("/me/schedule", response_model=RotationScheduleResponse)
 async def get_schedule(
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     schedule = await get_rotation_schedule(db, collector.id)
@@ -243,7 +153,7 @@ async def get_schedule(
 @router.put("/me/schedule")
 async def update_schedule(
     body: RotationOrderRequest,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     try:
@@ -252,6 +162,8 @@ async def update_schedule(
         )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # The dashboard's next payout comes from the rotation order
+    await invalidate_dashboard(collector.id)
     return {"detail": "Rotation order updated"}
 
 
@@ -295,7 +207,7 @@ async def get_client(
 async def update_client(
     client_id: str,
     body: CollectorUpdateRequest,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     result = await db.execute(
@@ -308,6 +220,8 @@ async def update_client(
     if body.full_name is not None:
         client.full_name = body.full_name
     await db.commit()
+    await principal_cache.invalidate("CLIENT", client.id)
+    await invalidate_ussd_snapshot(client.id)
     await db.refresh(client)
 
     return ClientListItem(
@@ -322,7 +236,7 @@ async def update_client(
 @router.delete("/me/clients/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deactivate_client(
     client_id: str,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     result = await db.execute(
@@ -334,3 +248,6 @@ async def deactivate_client(
 
     client.is_active = False
     await db.commit()
+    await principal_cache.mark_inactive("CLIENT", client.id)
+    await invalidate_dashboard(collector.id)
+    await invalidate_ussd_snapshot(client.id)
@@ -1,10 +1,16 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_client, get_current_collector
+from app.dependencies import (
+    Principal,
+    get_active_collector_principal,
+    get_current_client,
+    get_current_client_principal,
+    get_current_collector,
+)
 from app.models.client import Client
 from app.models.collector import Collector
 from app.schemas.pagination import PaginatedResponse
@@ -41,17 +47,21 @@ async def request_payout_endpoint(
     body: PayoutRequest,
     client: Client = Depends(get_current_client),
     db: AsyncSession = Depends(get_db),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=64),
 ):
-    """Client requests a payout (balance validated)."""
+    """
+    Client requests a payout (balance validated). Retrying with the same
+    Idempotency-Key header returns the original payout.
+    """
     try:
-        payout = await request_payout(
-            db, client, body.amount, body.payout_type, body.reason
+        payout, created = await request_payout(
+            db, client, body.amount, body.payout_type, body.reason, idempotency_key
         )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    # Notify collector about payout request
-    collector = await db.get(Collector, client.collector_id)
+    # Notify collector about payout request (once, not on retries)
+    collector = await db.get(Collector, client.collector_id) if created else None
     if collector:
         safe_delay(notify_payout_requested_task,
             collector.push_token,
@@ -67,7 +77,7 @@ async def request_payout_endpoint(
 async def my_payouts(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    client: Client = Depends(get_current_client),
+    client: Principal = Depends(get_current_client_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """Client views their own payout history."""
@@ -94,7 +104,7 @@ async def list_payouts(
 @router.post("/{payout_id}/approve", response_model=PayoutResponse)
 async def approve_payout_endpoint(
     payout_id: uuid.UUID,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_active_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """Collector approves a REQUESTED payout."""
@@ -119,7 +129,7 @@ async def approve_payout_endpoint(
 async def decline_payout_endpoint(
     payout_id: uuid.UUID,
     body: PayoutDeclineRequest,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_active_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """Collector declines a REQUESTED payout with a reason."""
@@ -143,7 +153,7 @@ async def decline_payout_endpoint(
 @router.post("/{payout_id}/complete", response_model=PayoutResponse)
 async def complete_payout_endpoint(
     payout_id: uuid.UUID,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_active_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """Collector marks an APPROVED payout as COMPLETED."""
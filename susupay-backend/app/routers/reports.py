@@ -1,18 +1,29 @@
 import uuid
+from datetime import date
+from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import Response
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.database import get_db
-from app.dependencies import get_current_collector
+from app.database import get_db, get_session_factory
+from app.dependencies import Principal, get_current_collector, get_current_collector_principal
 from app.models.collector import Collector
-from app.schemas.report import ClientStatement, MonthlySummary
+from app.schemas.report import ClientStatement, MonthlySummary, StatementBatchJob
+from app.services.export_service import stream_ledger_csv, stream_ledger_xlsx
 from app.services.report_service import (
     generate_pdf_report,
     get_client_statement,
     get_monthly_summary,
 )
+from app.services.statement_batch_service import (
+    BATCH_FORMATS,
+    create_job,
+    fail_job,
+    get_job,
+    get_job_path,
+)
+from app.workers.tasks import safe_delay, statement_batch_task
 
 router = APIRouter(prefix="/api/v1/reports", tags=["reports"])
 
@@ -33,7 +44,7 @@ async def monthly_summary(
 async def monthly_summary_pdf(
     year: int = Query(..., ge=2020, le=2100),
     month: int = Query(..., ge=1, le=12),
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """Download monthly summary as PDF."""
@@ -52,14 +63,123 @@ async def client_statement(
     client_id: uuid.UUID,
     year: int = Query(..., ge=2020, le=2100),
     month: int = Query(..., ge=1, le=12),
-    collector: Collector = Depends(get_current_collector),
+    months: int = Query(1, ge=1, le=24),
+    collector: Principal = Depends(get_current_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get per-client statement for a specific month."""
+    """Get per-client statement for a month, or `months` months starting there."""
     try:
         statement = await get_client_statement(
-            db, client_id, collector.id, year, month
+            db, client_id, collector.id, year, month, months
         )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return statement
+
+
+@router.get("/client-statement/{client_id}/yearly", response_model=ClientStatement)
+async def client_statement_yearly(
+    client_id: uuid.UUID,
+    year: int = Query(..., ge=2020, le=2100),
+    collector: Principal = Depends(get_current_collector_principal),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get per-client statement for a calendar year."""
+    try:
+        statement = await get_client_statement(
+            db, client_id, collector.id, year, 1, months=12
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return statement
+
+
+@router.post(
+    "/client-statements/batch",
+    response_model=StatementBatchJob,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def start_statement_batch(
+    year: int = Query(..., ge=2020, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    months: int = Query(1, ge=1, le=24),
+    format: Literal["pdf", "zip"] = Query("pdf"),
+    collector: Principal = Depends(get_current_collector_principal),
+):
+    """Queue statements for every client: one combined PDF or a ZIP of PDFs."""
+    job_id = await create_job(collector.id, format)
+    queued = safe_delay(
+        statement_batch_task, job_id, str(collector.id), year, month, months, format
+    )
+    if queued is None:
+        await fail_job(collector.id, job_id, "Could not queue job")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Statement batch queue unavailable, try again later",
+        )
+    return await get_job(collector.id, job_id)
+
+
+@router.get("/client-statements/batch/{job_id}", response_model=StatementBatchJob)
+async def statement_batch_status(
+    job_id: str,
+    collector: Principal = Depends(get_current_collector_principal),
+):
+    """Progress of a batch statement job."""
+    job = await get_job(collector.id, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/client-statements/batch/{job_id}/download")
+async def statement_batch_download(
+    job_id: str,
+    collector: Principal = Depends(get_current_collector_principal),
+):
+    """Download the output of a finished batch statement job."""
+    job = await get_job(collector.id, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job["state"] != "SUCCESS":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job['state']}",
+        )
+    path = await get_job_path(collector.id, job_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job output expired")
+    return FileResponse(
+        path,
+        media_type=BATCH_FORMATS[job["format"]],
+        headers={"Content-Disposition": f"attachment; filename={job['filename']}"},
+    )
+
+
+@router.get("/ledger-export")
+async def ledger_export(
+    format: Literal["csv", "xlsx"] = Query("csv"),
+    start: date | None = Query(None),
+    end: date | None = Query(None),
+    client_id: uuid.UUID | None = Query(None),
+    collector: Principal = Depends(get_current_collector_principal),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+):
+    """Stream the full deposit/payout ledger, optionally filtered by client and date range."""
+    if start and end and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be on or before end",
+        )
+
+    if format == "xlsx":
+        body = stream_ledger_xlsx(session_factory, collector.id, client_id, start, end)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        body = stream_ledger_csv(session_factory, collector.id, client_id, start, end)
+        media_type = "text/csv"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=susupay-ledger.{format}"},
+    )
@@ -1,14 +1,24 @@
 import uuid
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_client, get_current_collector
+from app.dependencies import (
+    Principal,
+    get_active_collector_principal,
+    get_current_client,
+    get_current_client_principal,
+    get_current_collector,
+)
 from app.models.client import Client
+from app.models.client_ledger import ClientLedger
 from app.models.collector import Collector
 from app.schemas.pagination import PaginatedResponse
 from app.schemas.transaction import (
+    BulkActionRequest,
+    BulkActionResponse,
     ClientSMSSubmitRequest,
     ClientTransactionItem,
     ConfirmRequest,
@@ -21,8 +31,13 @@ from app.schemas.transaction import (
     TransactionFeedItem,
 )
 from app.services.image_service import ImageValidationError, upload_screenshot
-from app.services.rate_limiter import check_submission_rate_limit, increment_submission_count
+from app.services.notification_service import (
+    payment_confirmed_message,
+    payment_queried_message,
+)
+from app.services.rate_limiter import take_submission_slot
 from app.services.transaction_service import (
+    bulk_transition_transactions,
     confirm_transaction,
     get_client_history,
     get_collector_transactions,
@@ -40,6 +55,7 @@ from app.workers.tasks import (
     notify_payment_queried_task,
     notify_payment_submitted_task,
     safe_delay,
+    send_notifications_task,
 )
 
 router = APIRouter(prefix="/api/v1/transactions", tags=["transactions"])
@@ -56,7 +72,7 @@ async def submit_sms_endpoint(
 ):
     """Client submits payment proof by pasting MTN MoMo SMS text."""
     # Rate limit
-    if not await check_submission_rate_limit(body.client_id):
+    if not await take_submission_slot(body.client_id):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Submission rate limit exceeded. Maximum 5 per hour.",
@@ -67,8 +83,6 @@ async def submit_sms_endpoint(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    await increment_submission_count(body.client_id)
-
     # Dispatch async notifications
     if txn.status == "AUTO_REJECTED":
         # Notify client about duplicate
@@ -109,7 +123,7 @@ async def submit_screenshot_endpoint(
     db: AsyncSession = Depends(get_db),
 ):
     """Client submits payment proof by uploading a screenshot (LOW trust)."""
-    if not await check_submission_rate_limit(client_id):
+    if not await take_submission_slot(client_id):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Submission rate limit exceeded. Maximum 5 per hour.",
@@ -130,8 +144,6 @@ async def submit_screenshot_endpoint(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    await increment_submission_count(client_id)
-
     # Notify collector about new submission
     client_obj = await db.get(Client, client_id)
     if client_obj:
@@ -156,11 +168,18 @@ async def submit_screenshot_endpoint(
 async def get_feed(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(True),
     collector: Collector = Depends(get_current_collector),
     db: AsyncSession = Depends(get_db),
 ):
     """Get pending transactions for the collector to review."""
-    return await get_pending_feed(db, collector.id, skip=skip, limit=limit)
+    try:
+        return await get_pending_feed(
+            db, collector.id, skip=skip, limit=limit, cursor=cursor, include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.get("", response_model=PaginatedResponse[TransactionFeedItem])
@@ -168,20 +187,26 @@ async def list_transactions(
     status_filter: str | None = Query(None, alias="status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(True),
     collector: Collector = Depends(get_current_collector),
     db: AsyncSession = Depends(get_db),
 ):
     """List all transactions for collector, optionally filtered by status."""
-    return await get_collector_transactions(
-        db, collector.id, status_filter, skip=skip, limit=limit
-    )
+    try:
+        return await get_collector_transactions(
+            db, collector.id, status_filter, skip=skip, limit=limit,
+            cursor=cursor, include_total=include_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.post("/{txn_id}/confirm", response_model=TransactionActionResponse)
 async def confirm(
     txn_id: str,
     body: ConfirmRequest,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_active_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """Collector confirms a pending or queried transaction."""
@@ -214,7 +239,7 @@ async def confirm(
 async def query(
     txn_id: str,
     body: QueryRequest,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_active_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """Collector queries a pending transaction with a note."""
@@ -240,7 +265,7 @@ async def query(
 async def reject(
     txn_id: str,
     body: RejectRequest,
-    collector: Collector = Depends(get_current_collector),
+    collector: Principal = Depends(get_active_collector_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """Collector rejects a queried transaction."""
@@ -254,6 +279,58 @@ async def reject(
     )
 
 
+@router.post("/bulk", response_model=BulkActionResponse)
+async def bulk_action(
+    body: BulkActionRequest,
+    collector: Principal = Depends(get_active_collector_principal),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Confirm, query or reject a list of transactions in one request. Each id
+    gets its own outcome; ids that cannot be moved do not fail the others.
+    Clients are notified through one grouped task (as with the single
+    endpoints, rejections are not notified).
+    """
+    try:
+        outcomes = await bulk_transition_transactions(
+            db, collector.id, body.transaction_ids, body.action, body.note
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    done = [o for o in outcomes if o["ok"]]
+    if done and body.action in ("confirm", "query"):
+        result = await db.execute(
+            select(
+                Client.id,
+                Client.push_token,
+                Client.phone,
+                func.coalesce(ClientLedger.balance, 0).label("balance"),
+            )
+            .outerjoin(ClientLedger, ClientLedger.client_id == Client.id)
+            .where(Client.id.in_({o["client_id"] for o in done}))
+        )
+        recipients = {row.id: row for row in result.all()}
+        messages = []
+        for o in done:
+            row = recipients.get(o["client_id"])
+            if row is None:
+                continue
+            if body.action == "confirm":
+                title, text = payment_confirmed_message(float(o["amount"]), float(row.balance))
+            else:
+                title, text = payment_queried_message(body.note)
+            messages.append([row.push_token, row.phone, title, text])
+        if messages:
+            safe_delay(send_notifications_task, messages)
+
+    return BulkActionResponse(
+        succeeded=len(done),
+        failed=len(outcomes) - len(done),
+        results=outcomes,
+    )
+
+
 # --- Client Self-Submission Endpoints ---
 
 
@@ -264,7 +341,7 @@ async def client_submit_sms_endpoint(
     db: AsyncSession = Depends(get_db),
 ):
     """Client submits their own payment proof by pasting MTN MoMo SMS text."""
-    if not await check_submission_rate_limit(client.id):
+    if not await take_submission_slot(client.id):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Submission rate limit exceeded. Maximum 5 per hour.",
@@ -275,8 +352,6 @@ async def client_submit_sms_endpoint(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    await increment_submission_count(client.id)
-
     # Dispatch async notifications
     if txn.status == "AUTO_REJECTED":
         notify_duplicate_task.delay(client.push_token, client.phone)
@@ -315,7 +390,7 @@ async def client_submit_screenshot_endpoint(
     db: AsyncSession = Depends(get_db),
 ):
     """Client submits their own payment proof by uploading a screenshot (LOW trust)."""
-    if not await check_submission_rate_limit(client.id):
+    if not await take_submission_slot(client.id):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Submission rate limit exceeded. Maximum 5 per hour.",
@@ -336,8 +411,6 @@ async def client_submit_screenshot_endpoint(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    await increment_submission_count(client.id)
-
     # Notify collector about new submission
     collector_obj = await db.get(Collector, client.collector_id)
     if collector_obj:
@@ -363,10 +436,16 @@ async def my_history(
     status_filter: str | None = Query(None, alias="status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    client: Client = Depends(get_current_client),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(True),
+    client: Principal = Depends(get_current_client_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """Client views their own transaction history (excludes AUTO_REJECTED)."""
-    return await get_client_history(
-        db, client.id, status_filter=status_filter, skip=skip, limit=limit
-    )
+    try:
+        return await get_client_history(
+            db, client.id, status_filter=status_filter, skip=skip, limit=limit,
+            cursor=cursor, include_total=include_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
+from app.dependencies import require_metrics_token
 from app.schemas.ussd import USSDRequest, USSDResponse
-from app.services.ussd_service import handle_ussd
+from app.services.ussd_service import get_latency_histograms, handle_ussd
 
 router = APIRouter(prefix="/api/v1/ussd", tags=["ussd"])
 
@@ -14,3 +15,9 @@ async def ussd_callback(
     db: AsyncSession = Depends(get_db),
 ):
     return await handle_ussd(db, request)
+
+
+@router.get("/metrics", dependencies=[Depends(require_metrics_token)])
+async def ussd_metrics():
+    """Per-stage USSD hop latency histograms for this process."""
+    return get_latency_histograms()
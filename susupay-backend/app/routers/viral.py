@@ -8,7 +8,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_client, get_current_collector
+from app.dependencies import (
+    Principal,
+    get_current_client,
+    get_current_client_principal,
+    get_current_collector,
+)
 from app.models.client import Client
 from app.models.collector import Collector
 from app.schemas.viral import (
@@ -64,11 +69,12 @@ async def get_share_link(
 
 @router.get("/achievements", response_model=AchievementListResponse)
 async def get_achievements(
-    client: Client = Depends(get_current_client),
+    client: Principal = Depends(get_current_client_principal),
     db: AsyncSession = Depends(get_db),
 ):
     # Check for any new achievements first
     await check_and_award_achievements(db, client.id)
+    await db.commit()
     return await get_client_achievements(db, client.id)
 
 
@@ -77,7 +83,7 @@ async def get_achievements(
 
 @router.get("/goals", response_model=list[SavingsGoalResponse])
 async def list_goals(
-    client: Client = Depends(get_current_client),
+    client: Principal = Depends(get_current_client_principal),
     db: AsyncSession = Depends(get_db),
 ):
     return await get_savings_goals(db, client.id)
@@ -86,7 +92,7 @@ async def list_goals(
 @router.post("/goals", response_model=SavingsGoalResponse, status_code=status.HTTP_201_CREATED)
 async def create_goal(
     body: SavingsGoalCreate,
-    client: Client = Depends(get_current_client),
+    client: Principal = Depends(get_current_client_principal),
     db: AsyncSession = Depends(get_db),
 ):
     goal = await create_savings_goal(
@@ -100,7 +106,7 @@ async def create_goal(
 @router.delete("/goals/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_goal(
     goal_id: uuid.UUID,
-    client: Client = Depends(get_current_client),
+    client: Principal = Depends(get_current_client_principal),
     db: AsyncSession = Depends(get_db),
 ):
     deleted = await delete_savings_goal(db, client.id, goal_id)
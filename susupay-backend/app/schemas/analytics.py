@@ -106,3 +106,17 @@ class ClientActivityRow(BaseModel):
 class ActivityHeatmap(BaseModel):
     dates: list[date]
     clients: list[ClientActivityRow]
+
+
+class CompactActivityRow(BaseModel):
+    client_id: uuid.UUID
+    full_name: str
+    bitmap: str  # base64, bit i (byte i // 8, bit i % 8) = start_date + i days
+    paid_count: int
+    total_days: int
+
+
+class CompactActivityHeatmap(BaseModel):
+    start_date: date
+    total_days: int
+    clients: list[CompactActivityRow]
@@ -9,6 +9,9 @@ T = TypeVar("T")
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: list[T]
-    total: int
-    skip: int
+    # None when the caller opted out of counting (include_total=false)
+    total: int | None = None
+    skip: int = 0
     limit: int
+    # Opaque keyset cursor for the next page; None on the last page
+    next_cursor: str | None = None
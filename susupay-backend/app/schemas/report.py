@@ -36,6 +36,17 @@ class ClientStatement(BaseModel):
     client_name: str
     year: int
     month: int
+    months: int = 1
     opening_balance: Decimal
     closing_balance: Decimal
     items: list[ClientStatementItem]
+
+
+class StatementBatchJob(BaseModel):
+    job_id: str
+    state: str  # PENDING | PROGRESS | SUCCESS | FAILURE
+    format: str  # pdf | zip
+    done: int
+    total: int
+    filename: str | None = None
+    error: str | None = None
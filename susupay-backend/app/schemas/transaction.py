@@ -81,6 +81,26 @@ class TransactionActionResponse(BaseModel):
     confirmed_at: datetime | None = None
 
 
+class BulkActionRequest(BaseModel):
+    action: str = Field(..., pattern="^(confirm|query|reject)$")
+    transaction_ids: list[uuid.UUID] = Field(..., min_length=1, max_length=500)
+    note: str | None = Field(None, min_length=1, max_length=500)  # required for query/reject
+
+
+class BulkActionResult(BaseModel):
+    transaction_id: uuid.UUID
+    ok: bool
+    status: str | None = None
+    confirmed_at: datetime | None = None
+    error: str | None = None
+
+
+class BulkActionResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[BulkActionResult]
+
+
 # --- Client history ---
 
 
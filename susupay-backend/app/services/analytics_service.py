@@ -2,16 +2,24 @@
 Analytics service — period tracking, collection rates, defaulters, trends, health score.
 """
 
+import base64
 import uuid
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 
-from sqlalchemy import func, select, text
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.client import Client
 from app.models.collector import Collector
+from app.models.daily_client_total import DailyClientTotal
 from app.models.transaction import Transaction
+from app.services.rollup_service import (
+    get_client_bucket_totals,
+    get_client_totals,
+    get_collector_daily_totals,
+)
+from app.services.streak_service import get_payment_streak
 
 
 def get_current_period(
@@ -56,19 +64,10 @@ async def get_period_payments(
 ) -> dict[uuid.UUID, Decimal]:
     """
     Sum of CONFIRMED transaction amounts per client within the period.
-    Uses confirmed_at for timing.
+    Uses confirmed_at for timing (via the daily rollup; periods are whole UTC days).
     """
-    result = await db.execute(
-        select(Transaction.client_id, func.sum(Transaction.amount))
-        .where(
-            Transaction.collector_id == collector_id,
-            Transaction.status == "CONFIRMED",
-            Transaction.confirmed_at >= start,
-            Transaction.confirmed_at < end,
-        )
-        .group_by(Transaction.client_id)
-    )
-    return {row[0]: Decimal(str(row[1])) for row in result.all()}
+    totals = await get_client_totals(db, collector_id, start, end)
+    return {cid: amount for cid, (amount, _) in totals.items()}
 
 
 def classify_payment(paid: Decimal, expected: Decimal) -> str:
@@ -148,22 +147,12 @@ async def get_collector_analytics(db: AsyncSession, collector: Collector) -> dic
     )
 
     # Daily trend (last 30 days)
-    thirty_days_ago = datetime.combine(
-        date.today() - timedelta(days=29), datetime.min.time()
-    ).replace(tzinfo=timezone.utc)
-    trend_result = await db.execute(
-        text("""
-            SELECT DATE(confirmed_at AT TIME ZONE 'UTC') AS d, SUM(amount) AS total
-            FROM transactions
-            WHERE collector_id = :cid AND status = 'CONFIRMED'
-              AND confirmed_at >= :start
-            GROUP BY d ORDER BY d
-        """),
-        {"cid": collector.id, "start": thirty_days_ago},
-    )
+    today = date.today()
     daily_trend = [
-        {"date": row.d, "amount": Decimal(str(row.total))}
-        for row in trend_result.all()
+        {"date": d, "amount": amount}
+        for d, amount in await get_collector_daily_totals(
+            db, collector.id, today - timedelta(days=29), today + timedelta(days=1)
+        )
     ]
 
     # Trust distribution (month-to-date)
@@ -184,29 +173,17 @@ async def get_collector_analytics(db: AsyncSession, collector: Collector) -> dic
         trust_dist[row[0].lower()] = row[1]
 
     # Top 5 contributors (month-to-date, by confirmed deposits)
-    top_result = await db.execute(
-        select(
-            Transaction.client_id,
-            func.sum(Transaction.amount).label("total"),
-            func.count().label("cnt"),
-        )
-        .where(
-            Transaction.collector_id == collector.id,
-            Transaction.status == "CONFIRMED",
-            Transaction.confirmed_at >= month_start,
-        )
-        .group_by(Transaction.client_id)
-        .order_by(func.sum(Transaction.amount).desc())
-        .limit(5)
+    month_totals = await get_client_totals(
+        db, collector.id, month_start, today + timedelta(days=1)
     )
+    top = sorted(month_totals.items(), key=lambda item: item[1][0], reverse=True)[:5]
     top_contributors = []
-    for row in top_result.all():
-        name = client_map.get(row.client_id, "Unknown")
+    for cid, (total, count) in top:
         top_contributors.append({
-            "client_id": row.client_id,
-            "full_name": name,
-            "total_deposits": Decimal(str(row.total)),
-            "transaction_count": row.cnt,
+            "client_id": cid,
+            "full_name": client_map.get(cid, "Unknown"),
+            "total_deposits": total,
+            "transaction_count": count,
         })
 
     # Group health score: 50% collection rate + 30% non-defaulter rate + 20% streak
@@ -248,58 +225,77 @@ async def get_collector_analytics(db: AsyncSession, collector: Collector) -> dic
     }
 
 
+HEATMAP_MAX_DAYS = 365
+
+
+def encode_bitmap(mask: int, days: int) -> str:
+    """Base64 of a day bitmap: bit i (byte i // 8, bit i % 8) is day start + i."""
+    return base64.b64encode(mask.to_bytes((days + 7) // 8, "little")).decode()
+
+
+def decode_bitmap(encoded: str) -> int:
+    return int.from_bytes(base64.b64decode(encoded), "little")
+
+
 async def get_activity_heatmap(
-    db: AsyncSession, collector_id: uuid.UUID, days: int = 30
+    db: AsyncSession, collector_id: uuid.UUID, days: int = 30, compact: bool = False
 ) -> dict:
-    """Return a per-client daily activity grid for the last N days."""
+    """
+    Per-client daily activity for the last N days (at most HEATMAP_MAX_DAYS).
+
+    Each active client's paid days come back from one grouped query as day
+    offsets and are folded into an int bitmap. The compact format returns
+    that bitmap base64-encoded (see encode_bitmap); the verbose format
+    expands it into one {date, paid} entry per day.
+    """
+    days = max(1, min(days, HEATMAP_MAX_DAYS))
     today = date.today()
     start_date = today - timedelta(days=days - 1)
-    start_dt = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=timezone.utc)
 
-    # Active clients
+    # Active clients with the offsets of their paid days (one rollup row per paid day)
+    offsets = func.array_agg(DailyClientTotal.day - start_date).filter(
+        DailyClientTotal.day.isnot(None)
+    )
     result = await db.execute(
-        select(Client.id, Client.full_name).where(
+        select(Client.id, Client.full_name, offsets)
+        .outerjoin(
+            DailyClientTotal,
+            (DailyClientTotal.client_id == Client.id)
+            & (DailyClientTotal.day >= start_date)
+            & (DailyClientTotal.day <= today)
+            & (DailyClientTotal.txn_count > 0),
+        )
+        .where(
             Client.collector_id == collector_id,
             Client.is_active == True,  # noqa: E712
-        ).order_by(Client.full_name)
-    )
-    clients = result.all()
-
-    # Confirmed transactions per client per day
-    txn_result = await db.execute(
-        text("""
-            SELECT client_id, DATE(confirmed_at AT TIME ZONE 'UTC') AS d
-            FROM transactions
-            WHERE collector_id = :cid AND status = 'CONFIRMED'
-              AND confirmed_at >= :start
-            GROUP BY client_id, d
-        """),
-        {"cid": collector_id, "start": start_dt},
+        )
+        .group_by(Client.id, Client.full_name)
+        .order_by(Client.full_name)
     )
-    # Build set of (client_id, date) pairs
-    paid_set: set[tuple] = set()
-    for row in txn_result.all():
-        paid_set.add((row.client_id, row.d))
 
     date_list = [start_date + timedelta(days=i) for i in range(days)]
 
     client_rows = []
-    for c in clients:
-        days_data = []
-        paid_count = 0
-        for d in date_list:
-            paid = (c.id, d) in paid_set
-            if paid:
-                paid_count += 1
-            days_data.append({"date": d, "paid": paid})
-        client_rows.append({
-            "client_id": c.id,
-            "full_name": c.full_name,
-            "days": days_data,
-            "paid_count": paid_count,
+    for client_id, full_name, paid_offsets in result.all():
+        mask = 0
+        for offset in paid_offsets or ():
+            mask |= 1 << offset
+        row = {
+            "client_id": client_id,
+            "full_name": full_name,
+            "paid_count": mask.bit_count(),
             "total_days": days,
-        })
+        }
+        if compact:
+            row["bitmap"] = encode_bitmap(mask, days)
+        else:
+            row["days"] = [
+                {"date": d, "paid": bool(mask >> i & 1)} for i, d in enumerate(date_list)
+            ]
+        client_rows.append(row)
 
+    if compact:
+        return {"start_date": start_date, "total_days": days, "clients": client_rows}
     return {
         "dates": date_list,
         "clients": client_rows,
@@ -338,15 +334,10 @@ async def get_client_analytics(db: AsyncSession, client: Client) -> dict:
     start, end, label = get_current_period(frequency)
 
     # Period payment for this client
-    pay_result = await db.execute(
-        select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-            Transaction.client_id == client.id,
-            Transaction.status == "CONFIRMED",
-            Transaction.confirmed_at >= start,
-            Transaction.confirmed_at < end,
-        )
+    period_totals = await get_client_bucket_totals(
+        db, client.id, frequency, start.date(), end.date()
     )
-    paid = Decimal(str(pay_result.scalar_one()))
+    paid = sum(period_totals.values(), Decimal("0.00"))
     remaining = max(Decimal("0.00"), expected - paid)
     status = classify_payment(paid, expected)
 
@@ -359,34 +350,7 @@ async def get_client_analytics(db: AsyncSession, client: Client) -> dict:
     }
 
     # Payment streak — consecutive full-payment periods walking backward
-    streak = 0
-    check_date = date.today()
-    for _ in range(90):
-        # Step back one period
-        if frequency == "WEEKLY":
-            check_date = check_date - timedelta(days=7)
-        elif frequency == "MONTHLY":
-            if check_date.month == 1:
-                check_date = check_date.replace(year=check_date.year - 1, month=12, day=1)
-            else:
-                check_date = check_date.replace(month=check_date.month - 1, day=1)
-        else:
-            check_date = check_date - timedelta(days=1)
-
-        p_start, p_end, _ = get_current_period(frequency, check_date)
-        p_result = await db.execute(
-            select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-                Transaction.client_id == client.id,
-                Transaction.status == "CONFIRMED",
-                Transaction.confirmed_at >= p_start,
-                Transaction.confirmed_at < p_end,
-            )
-        )
-        p_paid = Decimal(str(p_result.scalar_one()))
-        if expected > 0 and p_paid >= expected:
-            streak += 1
-        else:
-            break
+    streak = await get_payment_streak(db, client.id, frequency, expected)
 
     # Monthly summary
     month_start = datetime.combine(
@@ -399,15 +363,10 @@ async def get_client_analytics(db: AsyncSession, client: Client) -> dict:
     month_end = datetime.combine(next_month, datetime.min.time()).replace(tzinfo=timezone.utc)
     days_in_month = (next_month - date.today().replace(day=1)).days
 
-    monthly_result = await db.execute(
-        select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-            Transaction.client_id == client.id,
-            Transaction.status == "CONFIRMED",
-            Transaction.confirmed_at >= month_start,
-            Transaction.confirmed_at < month_end,
-        )
+    monthly_totals = await get_client_bucket_totals(
+        db, client.id, "MONTHLY", month_start.date(), month_end.date()
     )
-    monthly_deposits = Decimal(str(monthly_result.scalar_one()))
+    monthly_deposits = sum(monthly_totals.values(), Decimal("0.00"))
 
     if frequency == "DAILY":
         monthly_expected = expected * days_in_month
@@ -1,10 +1,13 @@
+import asyncio
+import hashlib
+import hmac
 import secrets
 import uuid
 from datetime import datetime, timedelta, timezone
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
@@ -14,6 +17,9 @@ from app.models.otp_code import OTPCode
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+OTP_HASH_PREFIX = "hmac-sha256$"
+
+
 def hash_pin(pin: str) -> str:
     return pwd_context.hash(pin)
 
@@ -22,11 +28,32 @@ def verify_pin(plain_pin: str, hashed_pin: str) -> bool:
     return pwd_context.verify(plain_pin, hashed_pin)
 
 
+async def hash_pin_async(pin: str) -> str:
+    """bcrypt in a worker thread so it doesn't block the event loop."""
+    return await asyncio.to_thread(hash_pin, pin)
+
+
+async def verify_pin_async(plain_pin: str, hashed_pin: str) -> bool:
+    return await asyncio.to_thread(verify_pin, plain_pin, hashed_pin)
+
+
+def _otp_digest(code: str) -> str:
+    key = (settings.OTP_SECRET_KEY or settings.JWT_SECRET_KEY).encode()
+    return hmac.new(key, code.encode(), hashlib.sha256).hexdigest()
+
+
 def hash_otp(code: str) -> str:
-    return pwd_context.hash(code)
+    # OTPs are short-lived and attempt-limited, so a keyed hash is enough;
+    # bcrypt's cost only added latency to every send and verify.
+    return OTP_HASH_PREFIX + _otp_digest(code)
 
 
 def verify_otp(plain_code: str, hashed_code: str) -> bool:
+    if hashed_code.startswith(OTP_HASH_PREFIX):
+        return hmac.compare_digest(
+            hashed_code[len(OTP_HASH_PREFIX):], _otp_digest(plain_code)
+        )
+    # Codes issued before the switch were bcrypt-hashed
     return pwd_context.verify(plain_code, hashed_code)
 
 
@@ -85,6 +112,48 @@ def decode_token(token: str) -> dict | None:
         return None
 
 
+async def consume_otp(db: AsyncSession, phone: str, purpose: str, code: str) -> bool:
+    """
+    Check code against the latest live OTP for phone/purpose.
+
+    An attempt is reserved (and committed) with one conditional UPDATE before
+    the code is checked, so concurrent guesses cannot exceed
+    OTP_MAX_ATTEMPTS. On success the OTP is marked used with a guarded
+    UPDATE (caller commits); only one concurrent request can win it.
+    """
+    now = datetime.now(timezone.utc)
+    live = (
+        OTPCode.used == False,  # noqa: E712
+        OTPCode.expires_at > now,
+        OTPCode.attempts < settings.OTP_MAX_ATTEMPTS,
+    )
+    latest_id = (
+        select(OTPCode.id)
+        .where(OTPCode.phone == phone, OTPCode.purpose == purpose, *live)
+        .order_by(OTPCode.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(OTPCode)
+        .where(OTPCode.id == latest_id, *live)
+        .values(attempts=OTPCode.attempts + 1)
+        .returning(OTPCode.id, OTPCode.code_hash)
+    )
+    reserved = result.first()
+    await db.commit()
+    if reserved is None or not verify_otp(code, reserved.code_hash):
+        return False
+
+    result = await db.execute(
+        update(OTPCode)
+        .where(OTPCode.id == reserved.id, OTPCode.used == False)  # noqa: E712
+        .values(used=True)
+        .returning(OTPCode.id)
+    )
+    return result.first() is not None
+
+
 async def check_otp_rate_limit(db: AsyncSession, phone: str) -> bool:
     """Returns True if under rate limit (3 OTPs per 10 minutes)."""
     ten_min_ago = datetime.now(timezone.utc) - timedelta(minutes=10)
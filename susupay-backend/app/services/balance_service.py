@@ -1,19 +1,49 @@
+"""
+Client balances, served from the persisted client_ledgers table.
+
+Ledger rows are updated in the same transaction as the status change that
+moves money (confirmed deposit, completed payout), so reads are a single
+primary-key lookup regardless of how many transactions a client has.
+"""
+
 import uuid
 from decimal import Decimal
 
-from sqlalchemy import select, text
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.client import Client
+from app.models.client_ledger import ClientLedger
 
-async def get_client_balance(db: AsyncSession, client_id: uuid.UUID) -> dict:
-    """Fetch balance from the client_balances view."""
-    result = await db.execute(
-        text(
-            "SELECT client_id, full_name, total_deposits, total_payouts, balance "
-            "FROM client_balances WHERE client_id = :client_id"
-        ),
-        {"client_id": client_id},
+
+def _balance_query():
+    return (
+        select(
+            Client.id.label("client_id"),
+            Client.full_name,
+            func.coalesce(ClientLedger.total_deposits, 0).label("total_deposits"),
+            func.coalesce(ClientLedger.total_payouts, 0).label("total_payouts"),
+            func.coalesce(ClientLedger.balance, 0).label("balance"),
+        )
+        .outerjoin(ClientLedger, ClientLedger.client_id == Client.id)
+        .where(Client.is_active == True)  # noqa: E712
     )
+
+
+def _row_to_dict(row) -> dict:
+    return {
+        "client_id": row.client_id,
+        "full_name": row.full_name,
+        "total_deposits": Decimal(str(row.total_deposits)),
+        "total_payouts": Decimal(str(row.total_payouts)),
+        "balance": Decimal(str(row.balance)),
+    }
+
+
+async def get_client_balance(db: AsyncSession, client_id: uuid.UUID) -> dict:
+    """Fetch balance from the client's ledger row."""
+    result = await db.execute(_balance_query().where(Client.id == client_id))
     row = result.first()
     if row is None:
         return {
@@ -23,33 +53,158 @@ async def get_client_balance(db: AsyncSession, client_id: uuid.UUID) -> dict:
             "total_payouts": Decimal("0.00"),
             "balance": Decimal("0.00"),
         }
-    return {
-        "client_id": row.client_id,
-        "full_name": row.full_name,
-        "total_deposits": row.total_deposits,
-        "total_payouts": row.total_payouts,
-        "balance": row.balance,
-    }
+    return _row_to_dict(row)
 
 
 async def get_all_client_balances(
     db: AsyncSession, collector_id: uuid.UUID
 ) -> list[dict]:
     """Fetch all client balances for a collector."""
+    result = await db.execute(_balance_query().where(Client.collector_id == collector_id))
+    return [_row_to_dict(row) for row in result.all()]
+
+
+async def apply_deposit(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    collector_id: uuid.UUID,
+    amount: Decimal,
+) -> None:
+    """Credit a confirmed deposit to the client's ledger. Caller commits."""
+    await _apply(db, client_id, collector_id, deposits=Decimal(str(amount)))
+
+
+async def apply_payout(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    collector_id: uuid.UUID,
+    amount: Decimal,
+) -> None:
+    """Debit a completed payout from the client's ledger. Caller commits."""
+    await _apply(db, client_id, collector_id, payouts=Decimal(str(amount)))
+
+
+async def apply_deposits(
+    db: AsyncSession,
+    collector_id: uuid.UUID,
+    amounts: dict[uuid.UUID, Decimal],
+) -> None:
+    """Credit confirmed deposits (total per client) to several ledgers at once. Caller commits."""
+    if not amounts:
+        return
+    await _upsert(db, [
+        {
+            "client_id": client_id,
+            "collector_id": collector_id,
+            "total_deposits": Decimal(str(amount)),
+            "total_payouts": Decimal("0.00"),
+            "balance": Decimal(str(amount)),
+        }
+        for client_id, amount in sorted(amounts.items())
+    ])
+
+
+async def _apply(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    collector_id: uuid.UUID,
+    deposits: Decimal = Decimal("0.00"),
+    payouts: Decimal = Decimal("0.00"),
+) -> None:
+    await _upsert(db, [{
+        "client_id": client_id,
+        "collector_id": collector_id,
+        "total_deposits": deposits,
+        "total_payouts": payouts,
+        "balance": deposits - payouts,
+    }])
+
+
+async def _upsert(db: AsyncSession, rows: list[dict]) -> None:
+    # Single upsert — the row lock taken by ON CONFLICT serialises concurrent writers.
+    # Rows must be one per client_id; callers pass them in client_id order so
+    # concurrent multi-row upserts lock in the same order.
+    stmt = insert(ClientLedger).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ClientLedger.client_id],
+        set_={
+            "total_deposits": ClientLedger.total_deposits + stmt.excluded.total_deposits,
+            "total_payouts": ClientLedger.total_payouts + stmt.excluded.total_payouts,
+            "balance": ClientLedger.balance + stmt.excluded.balance,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+# Recomputes totals from the source tables; shared by rebuild and verify.
+_RECOMPUTE_SQL = """
+    SELECT
+        c.id AS client_id,
+        c.collector_id,
+        COALESCE(t.total_confirmed, 0) AS total_deposits,
+        COALESCE(p.total_completed, 0) AS total_payouts,
+        COALESCE(t.total_confirmed, 0) - COALESCE(p.total_completed, 0) AS balance
+    FROM clients c
+    LEFT JOIN (
+        SELECT client_id, SUM(amount) AS total_confirmed
+        FROM transactions
+        WHERE status = 'CONFIRMED'
+        GROUP BY client_id
+    ) t ON t.client_id = c.id
+    LEFT JOIN (
+        SELECT client_id, SUM(amount) AS total_completed
+        FROM payouts
+        WHERE status = 'COMPLETED'
+        GROUP BY client_id
+    ) p ON p.client_id = c.id
+    WHERE (CAST(:collector_id AS uuid) IS NULL OR c.collector_id = :collector_id)
+"""
+
+
+async def rebuild_client_ledgers(
+    db: AsyncSession, collector_id: uuid.UUID | None = None
+) -> int:
+    """Recompute ledger rows from transactions/payouts. Returns rows written."""
+    result = await db.execute(
+        text(
+            "INSERT INTO client_ledgers "
+            "(client_id, collector_id, total_deposits, total_payouts, balance) "
+            f"SELECT * FROM ({_RECOMPUTE_SQL}) src "
+            "ON CONFLICT (client_id) DO UPDATE SET "
+            "total_deposits = EXCLUDED.total_deposits, "
+            "total_payouts = EXCLUDED.total_payouts, "
+            "balance = EXCLUDED.balance, "
+            "updated_at = now()"
+        ),
+        {"collector_id": collector_id},
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def verify_client_ledgers(
+    db: AsyncSession, collector_id: uuid.UUID | None = None
+) -> list[dict]:
+    """Compare ledger rows with recomputed totals. Returns the mismatches."""
     result = await db.execute(
         text(
-            "SELECT client_id, full_name, total_deposits, total_payouts, balance "
-            "FROM client_balances WHERE collector_id = :collector_id"
+            "SELECT src.client_id, "
+            "src.balance AS expected_balance, "
+            "COALESCE(l.balance, 0) AS ledger_balance "
+            f"FROM ({_RECOMPUTE_SQL}) src "
+            "LEFT JOIN client_ledgers l ON l.client_id = src.client_id "
+            "WHERE src.total_deposits <> COALESCE(l.total_deposits, 0) "
+            "OR src.total_payouts <> COALESCE(l.total_payouts, 0) "
+            "OR src.balance <> COALESCE(l.balance, 0)"
         ),
         {"collector_id": collector_id},
     )
     return [
         {
             "client_id": row.client_id,
-            "full_name": row.full_name,
-            "total_deposits": row.total_deposits,
-            "total_payouts": row.total_payouts,
-            "balance": row.balance,
+            "expected_balance": Decimal(str(row.expected_balance)),
+            "ledger_balance": Decimal(str(row.ledger_balance)),
         }
         for row in result.all()
     ]
@@ -0,0 +1,163 @@
+"""
+Collector dashboard aggregate.
+
+Client counts, pending count, today's confirmed total, the next payout and
+current-period progress come from one CTE query; confirmed amounts are read
+from the daily rollup (daily_client_totals), not from transactions. The result is cached in
+Redis per collector for a few seconds, since the dashboard is the most
+polled collector screen; status changes invalidate it explicitly.
+"""
+
+import json
+import logging
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import get_redis
+from app.config import settings
+from app.models.collector import Collector
+from app.services.analytics_service import get_current_period
+from app.services.schedule_service import SCHEDULED_PAYOUTS_SQL
+
+logger = logging.getLogger(__name__)
+
+_DASHBOARD_SQL = f"""
+    WITH client_counts AS (
+        SELECT COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE is_active) AS active
+        FROM clients
+        WHERE collector_id = :cid
+    ),
+    pending AS (
+        SELECT COUNT(*) AS n
+        FROM transactions
+        WHERE collector_id = :cid AND status = 'PENDING'
+    ),
+    confirmed_today AS (
+        SELECT COALESCE(SUM(amount), 0) AS total
+        FROM daily_client_totals
+        WHERE collector_id = :cid AND day = CAST(:today AS date)
+    ),
+    period_paid AS (
+        SELECT c.id, COALESCE(SUM(d.amount), 0) AS paid
+        FROM clients c
+        LEFT JOIN daily_client_totals d
+            ON d.client_id = c.id
+           AND d.collector_id = :cid
+           AND d.day >= CAST(:period_start AS date)
+           AND d.day < CAST(:period_end AS date)
+        WHERE c.collector_id = :cid AND c.is_active = true
+        GROUP BY c.id
+    ),
+    period_stats AS (
+        SELECT COALESCE(SUM(paid), 0) AS collected,
+               COUNT(*) FILTER (WHERE paid > 0 AND paid >= :expected) AS paid_count,
+               COUNT(*) FILTER (WHERE paid > 0 AND paid < :expected) AS partial_count,
+               COUNT(*) FILTER (WHERE paid <= 0) AS unpaid_count
+        FROM period_paid
+    ),
+    next_payout AS (
+        -- Current recipient if any (their window includes today), else the
+        -- first upcoming one
+        SELECT full_name, payout_date
+        FROM ({SCHEDULED_PAYOUTS_SQL}) AS scheduled
+        WHERE collector_id = :cid
+          AND payout_date + payout_interval_days > CAST(:today AS date)
+        ORDER BY payout_date
+        LIMIT 1
+    )
+    SELECT cc.total AS total_clients,
+           cc.active AS active_clients,
+           p.n AS pending_transactions,
+           ct.total AS confirmed_today,
+           ps.collected, ps.paid_count, ps.partial_count, ps.unpaid_count,
+           np.full_name AS next_payout_client,
+           np.payout_date AS next_payout_date
+    FROM client_counts cc
+    CROSS JOIN pending p
+    CROSS JOIN confirmed_today ct
+    CROSS JOIN period_stats ps
+    LEFT JOIN next_payout np ON true
+"""
+
+
+def _cache_key(collector_id: uuid.UUID) -> str:
+    return f"dashboard:{collector_id}"
+
+
+async def _compute_dashboard(db: AsyncSession, collector: Collector) -> dict:
+    expected = Decimal(str(collector.contribution_amount))
+    frequency = collector.contribution_frequency
+    start, end, period_label = get_current_period(frequency)
+    today = date.today()
+
+    result = await db.execute(
+        text(_DASHBOARD_SQL),
+        {
+            "cid": collector.id,
+            "today": today,
+            "period_start": start.date(),
+            "period_end": end.date(),
+            "expected": expected,
+        },
+    )
+    row = result.one()
+
+    amount_collected = Decimal(str(row.collected))
+    amount_expected = expected * row.active_clients
+    collection_rate = (
+        float(amount_collected / amount_expected * 100) if amount_expected > 0 else 0.0
+    )
+    return {
+        "collector_id": collector.id,
+        "total_clients": row.total_clients,
+        "active_clients": row.active_clients,
+        "pending_transactions": row.pending_transactions,
+        "total_confirmed_today": float(row.confirmed_today),
+        "next_payout_client": row.next_payout_client,
+        "next_payout_date": row.next_payout_date,
+        "contribution_amount": expected,
+        "contribution_frequency": frequency,
+        "period_label": period_label,
+        "paid_count": row.paid_count,
+        "partial_count": row.partial_count,
+        "unpaid_count": row.unpaid_count,
+        "amount_collected": amount_collected,
+        "amount_expected": amount_expected,
+        "collection_rate": round(collection_rate, 1),
+    }
+
+
+async def get_collector_dashboard(db: AsyncSession, collector: Collector) -> dict:
+    """
+    Dashboard values for the collector. Served from a short-lived cache when
+    possible; values read from the cache are JSON-encoded (strings for
+    decimals, dates and ids) and left to the response schema to parse.
+    """
+    key = _cache_key(collector.id)
+    try:
+        cached = await get_redis().get(key)
+        if cached:
+            return json.loads(cached)
+    except Exception:
+        logger.warning("Redis unavailable — dashboard computed without cache")
+
+    dashboard = await _compute_dashboard(db, collector)
+    try:
+        await get_redis().set(
+            key, json.dumps(dashboard, default=str), ex=settings.DASHBOARD_CACHE_TTL
+        )
+    except Exception:
+        pass
+    return dashboard
+
+
+async def invalidate_dashboard(collector_id: uuid.UUID) -> None:
+    try:
+        await get_redis().delete(_cache_key(collector_id))
+    except Exception:
+        logger.warning("Redis unavailable — dashboard cache not invalidated")
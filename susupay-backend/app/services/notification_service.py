@@ -12,13 +12,18 @@ Notification types:
 - daily_reminder: unpaid clients reminded at 8 AM
 """
 
+import asyncio
 import json
 import logging
 
-from pywebpush import WebPushException, webpush
+from sqlalchemy import update
 
 from app.config import settings
-from app.services.sms_service import send_sms
+from app.models.client import Client
+from app.models.collector import Collector
+from app.services import principal_cache
+from app.services.push_service import PushSubscriptionGone, send_web_push
+from app.services.sms_service import send_bulk_sms, send_sms
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +36,8 @@ async def send_push_notification(
 ) -> bool:
     """
     Send a Web Push notification via VAPID.
-    Returns True if successful, False otherwise.
+    Returns True if successful, False otherwise. A subscription the push
+    service reports gone is cleared so later notifications go straight to SMS.
     """
     if not push_token:
         return False
@@ -43,18 +49,46 @@ async def send_push_notification(
     try:
         subscription_info = json.loads(push_token)
         payload = json.dumps({"title": title, "body": body, "data": data or {}})
-        webpush(
-            subscription_info=subscription_info,
-            data=payload,
-            vapid_private_key=settings.VAPID_PRIVATE_KEY,
-            vapid_claims={"sub": f"mailto:{settings.VAPID_CLAIMS_EMAIL}"},
-        )
+        await send_web_push(subscription_info, payload)
         return True
-    except (WebPushException, Exception) as e:
+    except PushSubscriptionGone:
+        logger.info("Web Push subscription gone — clearing it")
+        await forget_push_subscription(push_token)
+        return False
+    except Exception as e:
         logger.warning("Web Push failed: %s", e)
         return False
 
 
+async def forget_push_subscription(push_token: str) -> None:
+    """Clear a dead push subscription from every client and collector holding it."""
+    # Notifications are only sent from Celery workers
+    from app.workers.runtime import get_session_factory
+
+    try:
+        async with get_session_factory()() as db:
+            clients = await db.execute(
+                update(Client)
+                .where(Client.push_token == push_token)
+                .values(push_token=None)
+                .returning(Client.id)
+            )
+            client_ids = list(clients.scalars().all())
+            collectors = await db.execute(
+                update(Collector)
+                .where(Collector.push_token == push_token)
+                .values(push_token=None)
+                .returning(Collector.id)
+            )
+            collector_ids = list(collectors.scalars().all())
+            await db.commit()
+    except Exception:
+        logger.warning("Could not clear dead push subscription", exc_info=True)
+        return
+    await principal_cache.invalidate("CLIENT", *client_ids)
+    await principal_cache.invalidate("COLLECTOR", *collector_ids)
+
+
 async def notify(
     push_token: str | None,
     phone: str,
@@ -81,6 +115,41 @@ async def notify(
     return "none"
 
 
+async def notify_many(
+    messages: list[tuple[str | None, str, str, str]],
+    concurrency: int = 50,
+) -> list[str]:
+    """
+    Bulk variant of notify for (push_token, phone, title, body) tuples.
+    Pushes run concurrently (at most `concurrency` in flight); everything that
+    could not be pushed falls back to one grouped SMS send, so recipients
+    sharing a body (e.g. a collector's daily reminder) go out as a batch.
+    Returns the channel per message, in input order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def push(push_token: str | None, title: str, body: str) -> bool:
+        if not push_token:
+            return False
+        async with semaphore:
+            return await send_push_notification(push_token, title, body)
+
+    pushed = await asyncio.gather(
+        *(push(token, title, body) for token, _, title, body in messages)
+    )
+    channels = ["push" if ok else "none" for ok in pushed]
+
+    fallback = [i for i, ok in enumerate(pushed) if not ok]
+    if fallback:
+        sent = await send_bulk_sms(
+            [(messages[i][1], f"{messages[i][2]}: {messages[i][3]}") for i in fallback]
+        )
+        for i, ok in zip(fallback, sent):
+            if ok:
+                channels[i] = "sms"
+    return channels
+
+
 # --- Convenience functions for specific notification types ---
 
 
@@ -98,18 +167,25 @@ async def notify_payment_submitted(
     )
 
 
+def payment_confirmed_message(amount: float, balance: float) -> tuple[str, str]:
+    return (
+        "Payment Confirmed",
+        f"Your GHS {amount:.2f} payment confirmed. Balance: GHS {balance:.2f}",
+    )
+
+
 async def notify_payment_confirmed(
     client_push_token: str | None,
     client_phone: str,
     amount: float,
     balance: float,
 ) -> str:
-    return await notify(
-        client_push_token,
-        client_phone,
-        "Payment Confirmed",
-        f"Your GHS {amount:.2f} payment confirmed. Balance: GHS {balance:.2f}",
-    )
+    title, body = payment_confirmed_message(amount, balance)
+    return await notify(client_push_token, client_phone, title, body)
+
+
+def payment_queried_message(note: str) -> tuple[str, str]:
+    return "Submission Queried", f"Submission queried: '{note}'"
 
 
 async def notify_payment_queried(
@@ -117,12 +193,8 @@ async def notify_payment_queried(
     client_phone: str,
     note: str,
 ) -> str:
-    return await notify(
-        client_push_token,
-        client_phone,
-        "Submission Queried",
-        f"Submission queried: '{note}'",
-    )
+    title, body = payment_queried_message(note)
+    return await notify(client_push_token, client_phone, title, body)
 
 
 async def notify_payment_rejected(
@@ -224,15 +296,18 @@ async def notify_streak(
     )
 
 
+def daily_reminder_message(collector_name: str, contribution_amount: float) -> tuple[str, str]:
+    return (
+        "Daily Reminder",
+        f"Remember to send GHS {contribution_amount:.2f} to {collector_name} today",
+    )
+
+
 async def notify_daily_reminder(
     client_push_token: str | None,
     client_phone: str,
     collector_name: str,
     contribution_amount: float,
 ) -> str:
-    return await notify(
-        client_push_token,
-        client_phone,
-        "Daily Reminder",
-        f"Remember to send GHS {contribution_amount:.2f} to {collector_name} today",
-    )
+    title, body = daily_reminder_message(collector_name, contribution_amount)
+    return await notify(client_push_token, client_phone, title, body)
@@ -0,0 +1,60 @@
+"""
+Keyset (cursor) pagination over (submitted_at, id).
+
+A cursor encodes the sort key of the last row on a page; the next page
+starts strictly after it, so every page is an index range scan no matter
+how deep it is, unlike OFFSET which reads and discards the skipped rows.
+"""
+
+import base64
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Select, tuple_
+
+
+def encode_cursor(submitted_at: datetime, row_id: uuid.UUID) -> str:
+    raw = f"{submitted_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(ts), uuid.UUID(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def apply_keyset(
+    query: Select,
+    ts_column,
+    id_column,
+    cursor: str | None,
+    skip: int,
+    limit: int,
+    descending: bool = True,
+) -> Select:
+    """Order by (ts, id) and page either after the cursor or by offset.
+    Fetches limit + 1 rows so the caller can tell whether a next page exists."""
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        key = tuple_(ts_column, id_column)
+        query = query.where(key < (ts, row_id) if descending else key > (ts, row_id))
+    elif skip:
+        query = query.offset(skip)
+    if descending:
+        query = query.order_by(ts_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(ts_column.asc(), id_column.asc())
+    return query.limit(limit + 1)
+
+
+def page_cursor(rows: list, limit: int, key) -> tuple[list, str | None]:
+    """Trim the extra row fetched by apply_keyset and build the next cursor.
+    key(row) returns the row's (submitted_at, id)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
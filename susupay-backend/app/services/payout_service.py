@@ -3,18 +3,103 @@ Payout business logic.
 
 Handles payout requests, approval, decline, and completion.
 All queries scoped by collector_id for multi-tenant isolation.
+
+Each transition is one conditional statement: the payout row only moves if
+it is still in the expected status, and the balance guard is evaluated
+against the client's ledger row locked FOR UPDATE in the same statement, so
+concurrent requests, approvals and completions for a client serialise on
+that row and cannot overdraw it. Completion debits the ledger in the same
+statement. When nothing is updated, the reason (missing payout, wrong
+status, insufficient balance) is looked up only then, for the error message.
+
+Payout requests may carry a client-chosen idempotency key; a retry with the
+same key returns the payout created by the first attempt.
 """
 
 import uuid
-from datetime import datetime, timezone
 from decimal import Decimal
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.client import Client
 from app.models.payout import Payout
 from app.services.balance_service import get_client_balance
+from app.services.ussd_snapshot import invalidate_ussd_snapshot
+
+# Client's ledger row, locked; no row means a zero balance
+_LOCKED_LEDGER_CTE = """
+    ledger AS (
+        SELECT client_id, balance
+        FROM client_ledgers
+        WHERE client_id = {client_id}
+        FOR UPDATE
+    )
+"""
+
+_PAYOUT_CLIENT = """(
+            SELECT client_id FROM payouts
+            WHERE id = CAST(:payout_id AS uuid) AND collector_id = CAST(:collector_id AS uuid)
+        )"""
+
+_REQUEST_SQL = f"""
+    WITH {_LOCKED_LEDGER_CTE.format(client_id="CAST(:client_id AS uuid)")}
+    INSERT INTO payouts
+        (collector_id, client_id, amount, payout_type, status, reason, idempotency_key)
+    SELECT CAST(:collector_id AS uuid), l.client_id, CAST(:amount AS numeric), :payout_type,
+           'REQUESTED', :reason, :idempotency_key
+    FROM ledger l
+    WHERE l.balance >= CAST(:amount AS numeric)
+    ON CONFLICT (client_id, idempotency_key) DO NOTHING
+    RETURNING payouts.*
+"""
+
+_APPROVE_SQL = f"""
+    WITH {_LOCKED_LEDGER_CTE.format(client_id=_PAYOUT_CLIENT)}
+    UPDATE payouts p
+    SET status = 'APPROVED', approved_at = now()
+    FROM ledger l
+    WHERE p.id = CAST(:payout_id AS uuid)
+      AND p.collector_id = CAST(:collector_id AS uuid)
+      AND p.status = 'REQUESTED'
+      AND p.client_id = l.client_id
+      AND l.balance >= p.amount
+    RETURNING p.*
+"""
+
+_COMPLETE_SQL = f"""
+    WITH {_LOCKED_LEDGER_CTE.format(client_id=_PAYOUT_CLIENT)},
+    completed AS (
+        UPDATE payouts p
+        SET status = 'COMPLETED', completed_at = now()
+        FROM ledger l
+        WHERE p.id = CAST(:payout_id AS uuid)
+          AND p.collector_id = CAST(:collector_id AS uuid)
+          AND p.status = 'APPROVED'
+          AND p.client_id = l.client_id
+          AND l.balance >= p.amount
+        RETURNING p.*
+    ),
+    debit AS (
+        UPDATE client_ledgers cl
+        SET total_payouts = cl.total_payouts + c.amount,
+            balance = cl.balance - c.amount,
+            updated_at = now()
+        FROM completed c
+        WHERE cl.client_id = c.client_id
+    )
+    SELECT * FROM completed
+"""
+
+
+async def _execute_returning(db: AsyncSession, sql: str, params: dict) -> Payout | None:
+    result = await db.execute(
+        select(Payout)
+        .from_statement(text(sql))
+        .execution_options(populate_existing=True),
+        params,
+    )
+    return result.scalar_one_or_none()
 
 
 async def request_payout(
@@ -23,55 +108,83 @@ async def request_payout(
     amount: Decimal,
     payout_type: str,
     reason: str | None = None,
-) -> Payout:
-    """Client requests a payout. Amount must not exceed available balance."""
-    balance_info = await get_client_balance(db, client.id)
-    available = balance_info["balance"]
-
+    idempotency_key: str | None = None,
+) -> tuple[Payout, bool]:
+    """
+    Client requests a payout. Amount must not exceed available balance.
+
+    Returns (payout, created); created is False when idempotency_key
+    matched an earlier request, whose payout is returned unchanged.
+    """
+    payout = await _execute_returning(db, _REQUEST_SQL, {
+        "client_id": client.id,
+        "collector_id": client.collector_id,
+        "amount": amount,
+        "payout_type": payout_type,
+        "reason": reason,
+        "idempotency_key": idempotency_key,
+    })
+    if payout is not None:
+        await db.commit()
+        return payout, True
+
+    if idempotency_key is not None:
+        result = await db.execute(
+            select(Payout).where(
+                Payout.client_id == client.id,
+                Payout.idempotency_key == idempotency_key,
+            )
+        )
+        existing = result.scalar_one_or_none()
+        if existing is not None:
+            if existing.amount != amount or existing.payout_type != payout_type:
+                await db.rollback()
+                raise ValueError("Idempotency key was already used for a different payout")
+            await db.commit()
+            return existing, False
+
+    available = (await get_client_balance(db, client.id))["balance"]
+    await db.rollback()
     if available <= 0:
         raise ValueError("No available balance for payout")
-    if amount > available:
-        raise ValueError(
-            f"Payout amount GHS {amount} exceeds available balance GHS {available}"
-        )
-
-    payout = Payout(
-        collector_id=client.collector_id,
-        client_id=client.id,
-        amount=amount,
-        payout_type=payout_type,
-        status="REQUESTED",
-        reason=reason,
+    raise ValueError(
+        f"Payout amount GHS {amount} exceeds available balance GHS {available}"
     )
-    db.add(payout)
-    await db.commit()
-    await db.refresh(payout)
-    return payout
 
 
-async def approve_payout(
+async def _transition_error(
     db: AsyncSession,
     payout_id: uuid.UUID,
     collector_id: uuid.UUID,
-) -> Payout:
-    """Collector approves a REQUESTED payout. Re-checks balance before approving."""
-    payout = await _get_payout_for_collector(db, payout_id, collector_id)
-
-    if payout.status != "REQUESTED":
-        raise ValueError(f"Cannot approve payout with status {payout.status}")
-
-    # Re-check balance — it may have changed since the request was made
-    balance_info = await get_client_balance(db, payout.client_id)
-    available = balance_info["balance"]
-    if payout.amount > available:
-        raise ValueError(
+    expected_status: str,
+    action: str,
+) -> ValueError:
+    """Why a conditional transition updated nothing. Releases the ledger lock."""
+    try:
+        payout = await _get_payout_for_collector(db, payout_id, collector_id)
+        if payout.status != expected_status:
+            return ValueError(f"Cannot {action} payout with status {payout.status}")
+        available = (await get_client_balance(db, payout.client_id))["balance"]
+        return ValueError(
             f"Insufficient balance. Client has GHS {available} but payout is GHS {payout.amount}"
         )
+    except ValueError as e:
+        return e
+    finally:
+        await db.rollback()
 
-    payout.status = "APPROVED"
-    payout.approved_at = datetime.now(timezone.utc)
+
+async def approve_payout(
+    db: AsyncSession,
+    payout_id: uuid.UUID,
+    collector_id: uuid.UUID,
+) -> Payout:
+    """Collector approves a REQUESTED payout. Re-checks balance before approving."""
+    params = {"payout_id": payout_id, "collector_id": collector_id}
+    payout = await _execute_returning(db, _APPROVE_SQL, params)
+    if payout is None:
+        raise await _transition_error(db, payout_id, collector_id, "REQUESTED", "approve")
     await db.commit()
-    await db.refresh(payout)
     return payout
 
 
@@ -82,15 +195,21 @@ async def decline_payout(
     reason: str,
 ) -> Payout:
     """Collector declines a REQUESTED payout with a reason."""
-    payout = await _get_payout_for_collector(db, payout_id, collector_id)
-
-    if payout.status != "REQUESTED":
-        raise ValueError(f"Cannot decline payout with status {payout.status}")
-
-    payout.status = "DECLINED"
-    payout.reason = reason
+    result = await db.execute(
+        update(Payout)
+        .where(
+            Payout.id == payout_id,
+            Payout.collector_id == collector_id,
+            Payout.status == "REQUESTED",
+        )
+        .values(status="DECLINED", reason=reason)
+        .returning(Payout)
+        .execution_options(populate_existing=True)
+    )
+    payout = result.scalar_one_or_none()
+    if payout is None:
+        raise await _transition_error(db, payout_id, collector_id, "REQUESTED", "decline")
     await db.commit()
-    await db.refresh(payout)
     return payout
 
 
@@ -100,23 +219,12 @@ async def complete_payout(
     collector_id: uuid.UUID,
 ) -> Payout:
     """Collector marks an APPROVED payout as COMPLETED. Balance is deducted at this point."""
-    payout = await _get_payout_for_collector(db, payout_id, collector_id)
-
-    if payout.status != "APPROVED":
-        raise ValueError(f"Cannot complete payout with status {payout.status}")
-
-    # Final balance check before deducting
-    balance_info = await get_client_balance(db, payout.client_id)
-    available = balance_info["balance"]
-    if payout.amount > available:
-        raise ValueError(
-            f"Insufficient balance. Client has GHS {available} but payout is GHS {payout.amount}"
-        )
-
-    payout.status = "COMPLETED"
-    payout.completed_at = datetime.now(timezone.utc)
+    params = {"payout_id": payout_id, "collector_id": collector_id}
+    payout = await _execute_returning(db, _COMPLETE_SQL, params)
+    if payout is None:
+        raise await _transition_error(db, payout_id, collector_id, "APPROVED", "complete")
     await db.commit()
-    await db.refresh(payout)
+    await invalidate_ussd_snapshot(payout.client_id)
     return payout
 
 
@@ -0,0 +1,159 @@
+"""
+Short-TTL cache of authenticated principals (collectors and clients).
+
+Resolving the principal is the most frequent query in the API, so the column
+values of active collectors/clients are cached per subject id: a small
+in-process LRU in front of Redis. Entries are dropped explicitly whenever a
+principal's row changes (profile update, PIN set/reset, deactivation) and
+expire on their own otherwise.
+
+Deactivation leaves a tombstone for the lifetime of an access token so
+token-only dependencies (no DB query) reject the subject too.
+
+pin_hash is never cached.
+"""
+
+import functools
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.cache import get_redis
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EXCLUDED = {"pin_hash"}
+_INACTIVE = {"is_active": False}
+
+# key -> (expires_at, values)
+_local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+
+def _key(role: str, subject_id: uuid.UUID) -> str:
+    return f"principal:{role}:{subject_id}"
+
+
+def _encode(value):
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode(python_type: type, value):
+    if value is None:
+        return None
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return value
+
+
+@functools.cache
+def _columns(model) -> dict[str, type]:
+    columns = {}
+    for attr in inspect(model).column_attrs:
+        if attr.key in _EXCLUDED:
+            continue
+        try:
+            columns[attr.key] = attr.columns[0].type.python_type
+        except NotImplementedError:
+            columns[attr.key] = object
+    return columns
+
+
+def _local_get(key: str) -> dict | None:
+    entry = _local.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _local[key]
+        return None
+    _local.move_to_end(key)
+    return entry[1]
+
+
+def _local_put(key: str, values: dict, ttl: float) -> None:
+    _local[key] = (time.monotonic() + ttl, values)
+    _local.move_to_end(key)
+    while len(_local) > settings.PRINCIPAL_CACHE_SIZE:
+        _local.popitem(last=False)
+
+
+async def get_cached(role: str, subject_id: uuid.UUID) -> dict | None:
+    """Encoded column values (or the inactive tombstone), or None on a miss."""
+    key = _key(role, subject_id)
+    values = _local_get(key)
+    if values is not None:
+        return values
+    try:
+        raw = await get_redis().get(key)
+    except Exception:
+        logger.warning("Redis unavailable — principal cache bypassed")
+        return None
+    if raw is None:
+        return None
+    values = json.loads(raw)
+    _local_put(key, values, settings.PRINCIPAL_CACHE_LOCAL_TTL)
+    return values
+
+
+def is_inactive(values: dict) -> bool:
+    return values.get("is_active") is False
+
+
+async def put(role: str, obj) -> None:
+    key = _key(role, obj.id)
+    values = {k: _encode(getattr(obj, k)) for k in _columns(type(obj))}
+    _local_put(key, values, settings.PRINCIPAL_CACHE_LOCAL_TTL)
+    try:
+        await get_redis().set(key, json.dumps(values), ex=settings.PRINCIPAL_CACHE_TTL)
+    except Exception:
+        logger.warning("Redis unavailable — principal not cached")
+
+
+async def attach(db: AsyncSession, model, values: dict):
+    """Rebuild a model instance from cached values and attach it to db
+    without a SELECT, so routes can modify and commit it as usual."""
+    columns = _columns(model)
+    obj = model(**{k: _decode(columns[k], v) for k, v in values.items() if k in columns})
+    make_transient_to_detached(obj)
+    return await db.merge(obj, load=False)
+
+
+async def invalidate(role: str, *subject_ids: uuid.UUID) -> None:
+    keys = [_key(role, sid) for sid in subject_ids]
+    for key in keys:
+        _local.pop(key, None)
+    if not keys:
+        return
+    try:
+        await get_redis().delete(*keys)
+    except Exception:
+        logger.warning("Redis unavailable — principal invalidation is local only")
+
+
+async def mark_inactive(role: str, subject_id: uuid.UUID) -> None:
+    """Replace the entry with a tombstone that outlives any issued access token."""
+    key = _key(role, subject_id)
+    ttl = settings.ACCESS_TOKEN_EXPIRE_HOURS * 3600
+    _local_put(key, _INACTIVE, ttl)
+    try:
+        await get_redis().set(key, json.dumps(_INACTIVE), ex=ttl)
+    except Exception:
+        logger.warning("Redis unavailable — deactivation tombstone is local only")
@@ -0,0 +1,112 @@
+"""
+Async Web Push (VAPID) sender.
+
+Delivery goes through one pooled HTTP/2-capable httpx client per event loop,
+so bursts reuse connections to each push service. The signed VAPID JWT is
+cached per push-service origin until shortly before it expires, and payload
+encryption (ECDH + AES-GCM) runs in a worker thread to keep the loop free.
+"""
+
+import asyncio
+import logging
+import time
+from urllib.parse import urlparse
+
+import httpx
+from py_vapid import Vapid
+from pywebpush import WebPusher
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Push services accept VAPID tokens valid for at most 24h
+VAPID_TOKEN_TTL = 12 * 3600
+VAPID_REFRESH_MARGIN = 300
+PUSH_TTL = 24 * 3600
+PUSH_TIMEOUT = 10.0
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_vapid: Vapid | None = None
+# origin -> (headers, expires_at)
+_vapid_headers: dict[str, tuple[dict[str, str], int]] = {}
+
+
+class PushSubscriptionGone(Exception):
+    """The push service reports the subscription no longer exists (404/410)."""
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=PUSH_TIMEOUT,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_push_client() -> None:
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+def _get_vapid() -> Vapid:
+    global _vapid
+    if _vapid is None:
+        _vapid = Vapid.from_string(private_key=settings.VAPID_PRIVATE_KEY)
+    return _vapid
+
+
+def vapid_headers(endpoint: str) -> dict[str, str]:
+    """Authorization header for the endpoint's origin, signed at most once per TTL."""
+    parsed = urlparse(endpoint)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    now = int(time.time())
+
+    cached = _vapid_headers.get(origin)
+    if cached and cached[1] - now > VAPID_REFRESH_MARGIN:
+        return cached[0]
+
+    expires_at = now + VAPID_TOKEN_TTL
+    headers = _get_vapid().sign({
+        "sub": f"mailto:{settings.VAPID_CLAIMS_EMAIL}",
+        "aud": origin,
+        "exp": expires_at,
+    })
+    _vapid_headers[origin] = (headers, expires_at)
+    return headers
+
+
+def _encrypt(subscription_info: dict, payload: str) -> bytes:
+    encoded = WebPusher(subscription_info).encode(payload.encode(), "aes128gcm")
+    return encoded["body"]
+
+
+async def send_web_push(subscription_info: dict, payload: str, ttl: int = PUSH_TTL) -> None:
+    """
+    Encrypt and deliver one push message.
+    Raises PushSubscriptionGone for expired subscriptions and
+    httpx.HTTPError for any other delivery failure.
+    """
+    endpoint = subscription_info["endpoint"]
+    body = await asyncio.to_thread(_encrypt, subscription_info, payload)
+
+    headers = {
+        "TTL": str(ttl),
+        "Content-Encoding": "aes128gcm",
+        "Content-Type": "application/octet-stream",
+        **vapid_headers(endpoint),
+    }
+    response = await _get_client().post(endpoint, content=body, headers=headers)
+    if response.status_code in (404, 410):
+        raise PushSubscriptionGone(endpoint)
+    response.raise_for_status()
+
@@ -1,34 +1,116 @@
 """
-Rate limiter — in-memory fallback when Redis is unavailable.
+Rate limiter — Redis sliding window, in-memory fallback when Redis is unavailable.
 
 Client submissions: 5/hour per client.
+
+Each key is a Redis sorted set of hit timestamps. One Lua script prunes
+entries older than the window, counts what is left and (optionally) records
+the new hit if it is allowed, so a check or check-and-increment is a single
+atomic round trip and the limit holds across every API process. Refused
+hits are not recorded and do not extend the window.
 """
 
+import logging
+import time
 import uuid
-from collections import defaultdict
-from datetime import datetime, timezone
+from collections import OrderedDict, deque
+
+from app.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+SUBMISSION_LIMIT = 5
+SUBMISSION_WINDOW = 3600  # seconds
+
+# Fallback store is bounded: least recently used keys are evicted
+FALLBACK_MAX_KEYS = 10_000
+
+# KEYS[1] = window key
+# ARGV = now_ms, window_ms, limit, increment (0/1), member
+# Records the hit only when it is allowed and increment is set.
+# Returns {allowed (0/1), count after the call}
+_SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local increment = ARGV[4] == "1"
+
+redis.call("ZREMRANGEBYSCORE", key, "-inf", now - window)
+local count = redis.call("ZCARD", key)
+local allowed = count < limit
+if increment and allowed then
+    redis.call("ZADD", key, now, ARGV[5])
+    count = count + 1
+    redis.call("PEXPIRE", key, window)
+end
+return {allowed and 1 or 0, count}
+"""
 
-# In-memory store: {client_id: [timestamp, ...]}
-_store: dict[str, list[float]] = defaultdict(list)
+_script = None
 
+# In-memory fallback: {key: deque[timestamp, ...]}, LRU-ordered
+_store: OrderedDict[str, deque[float]] = OrderedDict()
 
-async def check_submission_rate_limit(client_id: uuid.UUID) -> bool:
+
+def _memory_hit(key: str, limit: int, window: int, increment: bool, now: float) -> bool:
+    hits = _store.get(key)
+    if hits is None:
+        hits = _store[key] = deque()
+    _store.move_to_end(key)
+
+    cutoff = now - window
+    while hits and hits[0] <= cutoff:
+        hits.popleft()
+    allowed = len(hits) < limit
+    if increment and allowed:
+        hits.append(now)
+    elif not hits:
+        del _store[key]
+
+    while len(_store) > FALLBACK_MAX_KEYS:
+        _store.popitem(last=False)
+    return allowed
+
+
+async def hit(key: str, limit: int, window: int, increment: bool = True) -> bool:
     """
-    Returns True if the client is under the rate limit (5 submissions/hour).
-    Returns False if the limit is exceeded.
+    Sliding-window check for `key`: True if fewer than `limit` hits were
+    recorded in the last `window` seconds. With increment=True an allowed
+    hit is recorded atomically in the same round trip.
     """
-    key = str(client_id)
-    now = datetime.now(timezone.utc).timestamp()
-    cutoff = now - 3600  # 1 hour ago
+    global _script
+    now = time.time()
+    try:
+        redis = get_redis()
+        if _script is None:
+            _script = redis.register_script(_SLIDING_WINDOW_LUA)
+        allowed, _ = await _script(
+            keys=[key],
+            args=[
+                int(now * 1000),
+                window * 1000,
+                limit,
+                "1" if increment else "0",
+                f"{int(now * 1000)}-{uuid.uuid4().hex[:8]}",
+            ],
+            client=redis,
+        )
+        return bool(allowed)
+    except Exception:
+        logger.warning("Redis unavailable — using in-memory rate limit for %s", key)
+        return _memory_hit(key, limit, window, increment, now)
 
-    # Prune old entries
-    _store[key] = [ts for ts in _store[key] if ts > cutoff]
 
-    return len(_store[key]) < 5
+def _submission_key(client_id: uuid.UUID) -> str:
+    return f"ratelimit:submissions:{client_id}"
 
 
-async def increment_submission_count(client_id: uuid.UUID) -> None:
-    """Increment the submission counter for a client."""
-    key = str(client_id)
-    now = datetime.now(timezone.utc).timestamp()
-    _store[key].append(now)
+async def take_submission_slot(client_id: uuid.UUID) -> bool:
+    """
+    Record a submission attempt if the client is under the rate limit
+    (5 submissions/hour) and return True; return False, recording nothing,
+    if the limit is exceeded. Check and record are one atomic call, so
+    concurrent submissions cannot all pass the check.
+    """
+    return await hit(_submission_key(client_id), SUBMISSION_LIMIT, SUBMISSION_WINDOW)
@@ -4,16 +4,33 @@ Report service: monthly summaries, PDF generation, client statements.
 All queries scoped by collector_id for multi-tenant isolation.
 """
 
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import multiprocessing
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
 from decimal import Decimal
+from html import escape
+from itertools import groupby
 
 from sqlalchemy import func, select, text, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import get_redis
+from app.config import settings
 from app.models.client import Client
 from app.models.payout import Payout
-from app.models.transaction import Transaction
+from app.services.rollup_service import get_client_totals
+
+logger = logging.getLogger(__name__)
+
+# PDF rendering pool (spawned lazily, shut down with the app)
+_pdf_pool: ProcessPoolExecutor | None = None
 
 
 async def get_monthly_summary(
@@ -29,25 +46,12 @@ async def get_monthly_summary(
     else:
         month_end = datetime(year, month + 1, 1, tzinfo=timezone.utc)
 
-    # Deposit aggregation per client
-    deposit_q = await db.execute(
-        select(
-            Client.id.label("client_id"),
-            Client.full_name,
-            func.coalesce(func.sum(Transaction.amount), 0).label("total_deposits"),
-            func.count(Transaction.id).label("deposit_count"),
-        )
-        .outerjoin(
-            Transaction,
-            (Transaction.client_id == Client.id)
-            & (Transaction.status == "CONFIRMED")
-            & (Transaction.confirmed_at >= month_start)
-            & (Transaction.confirmed_at < month_end),
-        )
-        .where(Client.collector_id == collector_id)
-        .group_by(Client.id, Client.full_name)
+    # Deposit aggregation per client, from the daily rollup
+    clients_q = await db.execute(
+        select(Client.id, Client.full_name).where(Client.collector_id == collector_id)
     )
-    deposit_rows = {row.client_id: row for row in deposit_q.all()}
+    client_names = {row.id: row.full_name for row in clients_q.all()}
+    deposit_totals = await get_client_totals(db, collector_id, month_start, month_end)
 
     # Payout aggregation per client
     payout_q = await db.execute(
@@ -73,17 +77,16 @@ async def get_monthly_summary(
     grand_deposits = Decimal("0.00")
     grand_payouts = Decimal("0.00")
 
-    for client_id, dep_row in deposit_rows.items():
+    for client_id, client_name in client_names.items():
         pay_row = payout_rows.get(client_id)
-        deposits = Decimal(str(dep_row.total_deposits))
+        deposits, dep_count = deposit_totals.get(client_id, (Decimal("0.00"), 0))
         payouts = Decimal(str(pay_row.total_payouts)) if pay_row else Decimal("0.00")
-        dep_count = dep_row.deposit_count
         pay_count = pay_row.payout_count if pay_row else 0
 
         clients.append(
             {
                 "client_id": str(client_id),
-                "client_name": dep_row.full_name,
+                "client_name": client_name,
                 "total_deposits": deposits,
                 "deposit_count": dep_count,
                 "total_payouts": payouts,
@@ -105,49 +108,83 @@ async def get_monthly_summary(
     }
 
 
-async def generate_pdf_report(
-    db: AsyncSession,
-    collector_id: uuid.UUID,
-    year: int,
-    month: int,
-) -> bytes:
-    """Generate a PDF monthly summary report using WeasyPrint."""
+def render_pdf(html_content: str) -> bytes:
+    """HTML to PDF bytes. Blocking: run in the PDF pool or a worker thread."""
     from weasyprint import HTML
 
-    summary = await get_monthly_summary(db, collector_id, year, month)
+    return HTML(string=html_content).write_pdf()
 
-    month_name = datetime(year, month, 1).strftime("%B %Y")
 
-    # Build HTML
-    client_rows = ""
-    for c in summary["clients"]:
-        client_rows += (
-            f"<tr>"
-            f"<td>{c['client_name']}</td>"
-            f"<td style='text-align:right'>{c['total_deposits']:.2f}</td>"
-            f"<td style='text-align:center'>{c['deposit_count']}</td>"
-            f"<td style='text-align:right'>{c['total_payouts']:.2f}</td>"
-            f"<td style='text-align:center'>{c['payout_count']}</td>"
-            f"<td style='text-align:right'>{c['net_balance']:.2f}</td>"
-            f"</tr>"
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
         )
+    return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+    _pdf_pool = None
+
+
+def summary_version(summary: dict) -> str:
+    """Content hash of a monthly summary; changes whenever its figures do."""
+    payload = json.dumps(summary, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
 
-    html_content = f"""<!DOCTYPE html>
+def _pdf_cache_key(collector_id: uuid.UUID, year: int, month: int, version: str) -> str:
+    return f"report:pdf:{collector_id}:{year}-{month:02d}:{version}"
+
+
+_REPORT_CSS = """
+    body { font-family: Arial, sans-serif; margin: 20px; }
+    h1 { color: #1a5276; }
+    h2 { color: #2e86c1; }
+    table { width: 100%; border-collapse: collapse; margin-top: 10px; }
+    th, td { border: 1px solid #ddd; padding: 8px; font-size: 12px; }
+    th { background-color: #1a5276; color: white; }
+    .summary { margin: 15px 0; }
+    .summary span { font-weight: bold; }
+    .footer { margin-top: 20px; font-size: 10px; color: #888; }
+    .page + .page { page-break-before: always; }
+"""
+
+
+def _html_document(body: str) -> str:
+    """Wrap report body markup in the shared SusuPay page layout."""
+    return f"""<!DOCTYPE html>
 <html>
 <head>
-<style>
-    body {{ font-family: Arial, sans-serif; margin: 20px; }}
-    h1 {{ color: #1a5276; }}
-    h2 {{ color: #2e86c1; }}
-    table {{ width: 100%; border-collapse: collapse; margin-top: 10px; }}
-    th, td {{ border: 1px solid #ddd; padding: 8px; font-size: 12px; }}
-    th {{ background-color: #1a5276; color: white; }}
-    .summary {{ margin: 15px 0; }}
-    .summary span {{ font-weight: bold; }}
-    .footer {{ margin-top: 20px; font-size: 10px; color: #888; }}
-</style>
+<style>{_REPORT_CSS}</style>
 </head>
 <body>
+{body}
+</body>
+</html>"""
+
+
+def _summary_html(summary: dict, year: int, month: int) -> str:
+    month_name = datetime(year, month, 1).strftime("%B %Y")
+
+    client_rows = "".join(
+        f"<tr>"
+        f"<td>{escape(c['client_name'])}</td>"
+        f"<td style='text-align:right'>{c['total_deposits']:.2f}</td>"
+        f"<td style='text-align:center'>{c['deposit_count']}</td>"
+        f"<td style='text-align:right'>{c['total_payouts']:.2f}</td>"
+        f"<td style='text-align:center'>{c['payout_count']}</td>"
+        f"<td style='text-align:right'>{c['net_balance']:.2f}</td>"
+        f"</tr>"
+        for c in summary["clients"]
+    )
+
+    return _html_document(f"""
     <h1>SusuPay Monthly Report</h1>
     <h2>{month_name}</h2>
 
@@ -176,119 +213,312 @@ async def generate_pdf_report(
 
     <div class="footer">
         Generated by SusuPay &middot; {datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")}
-    </div>
-</body>
-</html>"""
+    </div>""")
 
-    pdf_bytes = HTML(string=html_content).write_pdf()
+
+async def generate_pdf_report(
+    db: AsyncSession,
+    collector_id: uuid.UUID,
+    year: int,
+    month: int,
+) -> bytes:
+    """
+    Generate a PDF monthly summary report using WeasyPrint.
+
+    Rendering runs in a worker process so it never blocks the event loop.
+    Finished PDFs are cached in Redis under the summary's content hash, so a
+    month whose figures have not changed (every past month) is served from
+    cache and only a changed current month is re-rendered.
+    """
+    summary = await get_monthly_summary(db, collector_id, year, month)
+    key = _pdf_cache_key(collector_id, year, month, summary_version(summary))
+
+    try:
+        cached = await get_redis().get(key)
+    except Exception:
+        logger.warning("Redis unavailable — PDF report cache bypassed")
+        cached = None
+    if cached is not None:
+        return base64.b64decode(cached)
+
+    html_content = _summary_html(summary, year, month)
+    loop = asyncio.get_running_loop()
+    try:
+        pdf_bytes = await loop.run_in_executor(_get_pdf_pool(), render_pdf, html_content)
+    except BrokenProcessPool:
+        shutdown_pdf_pool()
+        raise
+
+    try:
+        await get_redis().set(
+            key, base64.b64encode(pdf_bytes).decode(), ex=settings.REPORT_PDF_CACHE_TTL
+        )
+    except Exception:
+        logger.warning("Redis unavailable — PDF report not cached")
     return pdf_bytes
 
 
+# One round trip: client check, opening balance (from :opening when cached,
+# otherwise summed from history) and line items with their running balance.
+# The row id breaks ties so entries sharing a timestamp keep a stable order.
+_STATEMENT_SQL = """
+    WITH opening AS (
+        SELECT c.full_name,
+               COALESCE(
+                   CAST(:opening AS numeric),
+                   (SELECT COALESCE(SUM(amount), 0) FROM transactions
+                    WHERE client_id = c.id AND status = 'CONFIRMED'
+                      AND confirmed_at < :start)
+                   - (SELECT COALESCE(SUM(amount), 0) FROM payouts
+                      WHERE client_id = c.id AND status = 'COMPLETED'
+                        AND completed_at < :start)
+               ) AS balance
+        FROM clients c
+        WHERE c.id = CAST(:client_id AS uuid)
+          AND c.collector_id = CAST(:collector_id AS uuid)
+    ),
+    items AS (
+        SELECT id, confirmed_at AS occurred_at, 'DEPOSIT' AS entry_type, amount, amount AS delta
+        FROM transactions
+        WHERE client_id = CAST(:client_id AS uuid) AND status = 'CONFIRMED'
+          AND confirmed_at >= :start AND confirmed_at < :end
+        UNION ALL
+        SELECT id, completed_at, 'PAYOUT', amount, -amount
+        FROM payouts
+        WHERE client_id = CAST(:client_id AS uuid) AND status = 'COMPLETED'
+          AND completed_at >= :start AND completed_at < :end
+    )
+    SELECT o.full_name, o.balance AS opening_balance,
+           i.occurred_at, i.entry_type, i.amount,
+           o.balance + SUM(i.delta) OVER (
+               ORDER BY i.occurred_at, i.entry_type, i.id ROWS UNBOUNDED PRECEDING
+           ) AS running_balance
+    FROM opening o
+    LEFT JOIN items i ON true
+    ORDER BY i.occurred_at, i.entry_type, i.id
+"""
+
+_DESCRIPTIONS = {"DEPOSIT": "Payment deposit", "PAYOUT": "Payout withdrawal"}
+
+
+def _add_months(year: int, month: int, months: int) -> tuple[int, int]:
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def _opening_cache_key(client_id: uuid.UUID, start: datetime) -> str:
+    return f"statement:opening:{client_id}:{start.date().isoformat()}"
+
+
 async def get_client_statement(
     db: AsyncSession,
     client_id: uuid.UUID,
     collector_id: uuid.UUID,
     year: int,
     month: int,
+    months: int = 1,
 ) -> dict:
-    """Get a per-client statement with opening balance and line items."""
-    # Verify client belongs to collector
+    """
+    Get a per-client statement with opening balance and line items, covering
+    `months` calendar months from year/month (months=12 from January is the
+    yearly statement).
+
+    Confirmed deposits and completed payouts are final, so the opening
+    balance at a past instant never changes and is cached in Redis; the
+    statement itself is a single query either way.
+    """
+    period_start = datetime(year, month, 1, tzinfo=timezone.utc)
+    period_end = datetime(*_add_months(year, month, months), 1, tzinfo=timezone.utc)
+
+    cache_key = _opening_cache_key(client_id, period_start)
+    try:
+        cached_opening = await get_redis().get(cache_key)
+    except Exception:
+        logger.warning("Redis unavailable — statement opening balance not cached")
+        cached_opening = None
+
     result = await db.execute(
-        select(Client).where(
-            Client.id == client_id,
-            Client.collector_id == collector_id,
-        )
+        text(_STATEMENT_SQL),
+        {
+            "client_id": client_id,
+            "collector_id": collector_id,
+            "opening": Decimal(cached_opening) if cached_opening is not None else None,
+            "start": period_start,
+            "end": period_end,
+        },
     )
-    client_obj = result.scalar_one_or_none()
-    if client_obj is None:
+    rows = result.all()
+    if not rows:
         raise ValueError("Client not found in your group")
 
-    month_start = datetime(year, month, 1, tzinfo=timezone.utc)
-    if month == 12:
-        month_end = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
-    else:
-        month_end = datetime(year, month + 1, 1, tzinfo=timezone.utc)
-
-    # Opening balance: all confirmed deposits - completed payouts before month_start
-    deposits_before = await db.execute(
-        select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-            Transaction.client_id == client_id,
-            Transaction.status == "CONFIRMED",
-            Transaction.confirmed_at < month_start,
-        )
-    )
-    payouts_before = await db.execute(
-        select(func.coalesce(func.sum(Payout.amount), 0)).where(
-            Payout.client_id == client_id,
-            Payout.status == "COMPLETED",
-            Payout.completed_at < month_start,
-        )
-    )
-    opening_balance = Decimal(str(deposits_before.scalar())) - Decimal(
-        str(payouts_before.scalar())
-    )
-
-    # Line items: deposits in month
-    dep_result = await db.execute(
-        select(Transaction.confirmed_at, Transaction.amount)
-        .where(
-            Transaction.client_id == client_id,
-            Transaction.status == "CONFIRMED",
-            Transaction.confirmed_at >= month_start,
-            Transaction.confirmed_at < month_end,
-        )
-        .order_by(Transaction.confirmed_at.asc())
-    )
-    deposit_items = [
-        {"date": row.confirmed_at, "type": "DEPOSIT", "amount": Decimal(str(row.amount))}
-        for row in dep_result.all()
-    ]
-
-    # Line items: payouts in month
-    pay_result = await db.execute(
-        select(Payout.completed_at, Payout.amount)
-        .where(
-            Payout.client_id == client_id,
-            Payout.status == "COMPLETED",
-            Payout.completed_at >= month_start,
-            Payout.completed_at < month_end,
-        )
-        .order_by(Payout.completed_at.asc())
-    )
-    payout_items = [
-        {"date": row.completed_at, "type": "PAYOUT", "amount": Decimal(str(row.amount))}
-        for row in pay_result.all()
+    opening_balance = Decimal(str(rows[0].opening_balance))
+    if cached_opening is None and period_start <= datetime.now(timezone.utc):
+        try:
+            await get_redis().set(
+                cache_key, str(opening_balance), ex=settings.STATEMENT_OPENING_CACHE_TTL
+            )
+        except Exception:
+            logger.warning("Redis unavailable — statement opening balance not cached")
+
+    return _statement_from_rows(rows, year, month, months)
+
+
+def _statement_from_rows(rows: list, year: int, month: int, months: int) -> dict:
+    """Statement dict from one client's statement rows (an item-less row
+    carries only the name and opening balance)."""
+    opening_balance = Decimal(str(rows[0].opening_balance))
+    statement_items = [
+        {
+            "date": row.occurred_at,
+            "type": row.entry_type,
+            "description": _DESCRIPTIONS[row.entry_type],
+            "amount": Decimal(str(row.amount)),
+            "running_balance": Decimal(str(row.running_balance)),
+        }
+        for row in rows
+        if row.occurred_at is not None
     ]
 
-    # Merge and sort chronologically
-    all_items = sorted(deposit_items + payout_items, key=lambda x: x["date"])
-
-    # Build running balance
-    running = opening_balance
-    statement_items = []
-    for item in all_items:
-        if item["type"] == "DEPOSIT":
-            running += item["amount"]
-            description = "Payment deposit"
-        else:
-            running -= item["amount"]
-            description = "Payout withdrawal"
-
-        statement_items.append(
-            {
-                "date": item["date"],
-                "type": item["type"],
-                "description": description,
-                "amount": item["amount"],
-                "running_balance": running,
-            }
-        )
-
     return {
-        "client_name": client_obj.full_name,
+        "client_name": rows[0].full_name,
         "year": year,
         "month": month,
+        "months": months,
         "opening_balance": opening_balance,
-        "closing_balance": running,
+        "closing_balance": (
+            statement_items[-1]["running_balance"] if statement_items else opening_balance
+        ),
         "items": statement_items,
     }
+
+
+# Every client of a collector in one pass: opening balances come from the
+# daily rollup (deposits) and payouts before the period, line items are
+# windowed per client.
+_BATCH_STATEMENT_SQL = """
+    WITH deposits_before AS (
+        SELECT client_id, SUM(amount) AS total
+        FROM daily_client_totals
+        WHERE collector_id = CAST(:collector_id AS uuid) AND day < :start_day
+        GROUP BY client_id
+    ),
+    payouts_before AS (
+        SELECT client_id, SUM(amount) AS total
+        FROM payouts
+        WHERE collector_id = CAST(:collector_id AS uuid) AND status = 'COMPLETED'
+          AND completed_at < :start
+        GROUP BY client_id
+    ),
+    opening AS (
+        SELECT c.id AS client_id, c.full_name,
+               COALESCE(d.total, 0) - COALESCE(p.total, 0) AS balance
+        FROM clients c
+        LEFT JOIN deposits_before d ON d.client_id = c.id
+        LEFT JOIN payouts_before p ON p.client_id = c.id
+        WHERE c.collector_id = CAST(:collector_id AS uuid)
+    ),
+    items AS (
+        SELECT client_id, id, confirmed_at AS occurred_at, 'DEPOSIT' AS entry_type,
+               amount, amount AS delta
+        FROM transactions
+        WHERE collector_id = CAST(:collector_id AS uuid) AND status = 'CONFIRMED'
+          AND confirmed_at >= :start AND confirmed_at < :end
+        UNION ALL
+        SELECT client_id, id, completed_at, 'PAYOUT', amount, -amount
+        FROM payouts
+        WHERE collector_id = CAST(:collector_id AS uuid) AND status = 'COMPLETED'
+          AND completed_at >= :start AND completed_at < :end
+    )
+    SELECT o.client_id, o.full_name, o.balance AS opening_balance,
+           i.occurred_at, i.entry_type, i.amount,
+           o.balance + SUM(i.delta) OVER (
+               PARTITION BY o.client_id
+               ORDER BY i.occurred_at, i.entry_type, i.id ROWS UNBOUNDED PRECEDING
+           ) AS running_balance
+    FROM opening o
+    LEFT JOIN items i ON i.client_id = o.client_id
+    ORDER BY o.full_name, o.client_id, i.occurred_at, i.entry_type, i.id
+"""
+
+
+async def get_batch_statements(
+    db: AsyncSession,
+    collector_id: uuid.UUID,
+    year: int,
+    month: int,
+    months: int = 1,
+) -> list[dict]:
+    """Statements for every client of a collector (ordered by name), from one query."""
+    period_start = datetime(year, month, 1, tzinfo=timezone.utc)
+    period_end = datetime(*_add_months(year, month, months), 1, tzinfo=timezone.utc)
+
+    result = await db.execute(
+        text(_BATCH_STATEMENT_SQL),
+        {
+            "collector_id": collector_id,
+            "start": period_start,
+            "start_day": period_start.date(),
+            "end": period_end,
+        },
+    )
+    statements = []
+    for client_id, rows in groupby(result.all(), key=lambda row: row.client_id):
+        statement = _statement_from_rows(list(rows), year, month, months)
+        statement["client_id"] = str(client_id)
+        statements.append(statement)
+    return statements
+
+
+def _statement_body(statement: dict) -> str:
+    start = datetime(statement["year"], statement["month"], 1)
+    period = start.strftime("%B %Y")
+    if statement["months"] > 1:
+        last_year, last_month = _add_months(
+            statement["year"], statement["month"], statement["months"] - 1
+        )
+        last = datetime(last_year, last_month, 1)
+        period = f"{period} – {last.strftime('%B %Y')}"
+
+    item_rows = "".join(
+        f"<tr>"
+        f"<td>{item['date'].strftime('%Y-%m-%d %H:%M')}</td>"
+        f"<td>{item['description']}</td>"
+        f"<td style='text-align:right'>{'-' if item['type'] == 'PAYOUT' else ''}{item['amount']:.2f}</td>"
+        f"<td style='text-align:right'>{item['running_balance']:.2f}</td>"
+        f"</tr>"
+        for item in statement["items"]
+    )
+
+    return f"""<div class="page">
+    <h1>{escape(statement['client_name'])}</h1>
+    <h2>Statement · {period}</h2>
+
+    <div class="summary">
+        <p>Opening Balance: <span>GHS {statement['opening_balance']:.2f}</span></p>
+        <p>Closing Balance: <span>GHS {statement['closing_balance']:.2f}</span></p>
+    </div>
+
+    <table>
+        <thead>
+            <tr>
+                <th>Date</th>
+                <th>Description</th>
+                <th>Amount (GHS)</th>
+                <th>Balance (GHS)</th>
+            </tr>
+        </thead>
+        <tbody>
+            {item_rows}
+        </tbody>
+    </table>
+</div>"""
+
+
+def statement_html(statement: dict) -> str:
+    """Printable HTML for one client statement."""
+    return _html_document(_statement_body(statement))
+
+
+def statements_html(statements: list[dict]) -> str:
+    """Printable HTML for several statements, each starting a new page."""
+    return _html_document("\n".join(_statement_body(s) for s in statements))
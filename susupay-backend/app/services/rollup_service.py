@@ -0,0 +1,192 @@
+"""
+Daily confirmed-deposit rollup (daily_client_totals).
+
+One row per (client, UTC day of confirmed_at) holds the confirmed amount and
+transaction count. Rows are upserted in the same transaction as each
+confirmation, so period, trend and leaderboard aggregates read at most one
+row per client per day instead of every transaction. Day boundaries match
+the UTC period boundaries used throughout analytics.
+"""
+
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import Date, DateTime, cast, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.daily_client_total import DailyClientTotal
+
+_TRUNC_UNIT = {"DAILY": "day", "WEEKLY": "week", "MONTHLY": "month"}
+
+
+def _as_date(d: date | datetime) -> date:
+    """UTC calendar day of d (dates pass through)."""
+    if isinstance(d, datetime):
+        return (d.astimezone(timezone.utc) if d.tzinfo else d).date()
+    return d
+
+
+async def record_confirmed_deposit(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    collector_id: uuid.UUID,
+    amount: Decimal,
+    confirmed_at: datetime,
+) -> None:
+    """Add a confirmed deposit to its day bucket. Caller commits."""
+    await record_confirmed_deposits(db, collector_id, [(client_id, amount, confirmed_at)])
+
+
+async def record_confirmed_deposits(
+    db: AsyncSession,
+    collector_id: uuid.UUID,
+    deposits: list[tuple[uuid.UUID, Decimal, datetime]],
+) -> None:
+    """Add (client_id, amount, confirmed_at) deposits to their day buckets
+    in one upsert. Caller commits."""
+    buckets: dict[tuple[uuid.UUID, date], list] = {}
+    for client_id, amount, confirmed_at in deposits:
+        bucket = buckets.setdefault((client_id, _as_date(confirmed_at)), [Decimal("0.00"), 0])
+        bucket[0] += Decimal(str(amount))
+        bucket[1] += 1
+    if not buckets:
+        return
+
+    stmt = insert(DailyClientTotal).values([
+        {
+            "client_id": client_id,
+            "day": day,
+            "collector_id": collector_id,
+            "amount": amount,
+            "txn_count": count,
+        }
+        for (client_id, day), (amount, count) in sorted(buckets.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyClientTotal.client_id, DailyClientTotal.day],
+        set_={
+            "amount": DailyClientTotal.amount + stmt.excluded.amount,
+            "txn_count": DailyClientTotal.txn_count + stmt.excluded.txn_count,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def rebuild_daily_totals(
+    db: AsyncSession, collector_id: uuid.UUID | None = None
+) -> int:
+    """Recompute rollup rows from transactions (all collectors, or one). Commits."""
+    params = {"collector_id": collector_id}
+    await db.execute(
+        text("""
+            DELETE FROM daily_client_totals
+            WHERE CAST(:collector_id AS uuid) IS NULL OR collector_id = :collector_id
+        """),
+        params,
+    )
+    result = await db.execute(
+        text("""
+            INSERT INTO daily_client_totals (client_id, day, collector_id, amount, txn_count)
+            SELECT client_id,
+                   CAST(confirmed_at AT TIME ZONE 'UTC' AS date),
+                   collector_id,
+                   SUM(amount),
+                   COUNT(*)
+            FROM transactions
+            WHERE status = 'CONFIRMED' AND confirmed_at IS NOT NULL
+              AND (CAST(:collector_id AS uuid) IS NULL OR collector_id = :collector_id)
+            GROUP BY client_id, CAST(confirmed_at AT TIME ZONE 'UTC' AS date), collector_id
+        """),
+        params,
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def get_client_totals(
+    db: AsyncSession,
+    collector_id: uuid.UUID,
+    start: date | datetime,
+    end: date | datetime,
+    client_ids: list[uuid.UUID] | None = None,
+) -> dict[uuid.UUID, tuple[Decimal, int]]:
+    """(amount, txn_count) per client (all, or only client_ids) for days in [start, end)."""
+    query = (
+        select(
+            DailyClientTotal.client_id,
+            func.sum(DailyClientTotal.amount),
+            func.sum(DailyClientTotal.txn_count),
+        )
+        .where(
+            DailyClientTotal.collector_id == collector_id,
+            DailyClientTotal.day >= _as_date(start),
+            DailyClientTotal.day < _as_date(end),
+        )
+        .group_by(DailyClientTotal.client_id)
+    )
+    if client_ids is not None:
+        query = query.where(DailyClientTotal.client_id.in_(client_ids))
+    result = await db.execute(query)
+    return {row[0]: (Decimal(str(row[1])), int(row[2])) for row in result.all()}
+
+
+async def get_collector_daily_totals(
+    db: AsyncSession,
+    collector_id: uuid.UUID,
+    start: date | datetime,
+    end: date | datetime,
+) -> list[tuple[date, Decimal]]:
+    """Collector-wide confirmed amount per day in [start, end), in date order."""
+    result = await db.execute(
+        select(DailyClientTotal.day, func.sum(DailyClientTotal.amount))
+        .where(
+            DailyClientTotal.collector_id == collector_id,
+            DailyClientTotal.day >= _as_date(start),
+            DailyClientTotal.day < _as_date(end),
+        )
+        .group_by(DailyClientTotal.day)
+        .order_by(DailyClientTotal.day)
+    )
+    return [(row[0], Decimal(str(row[1]))) for row in result.all()]
+
+
+async def get_client_bucket_totals(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    frequency: str,
+    start: date,
+    end: date,
+) -> dict[date, Decimal]:
+    """One client's confirmed amount per DAILY/WEEKLY/MONTHLY bucket start,
+    for days in [start, end). Weeks start on Monday."""
+    totals = await get_clients_bucket_totals(db, [client_id], frequency, start, end)
+    return totals.get(client_id, {})
+
+
+async def get_clients_bucket_totals(
+    db: AsyncSession,
+    client_ids: list[uuid.UUID],
+    frequency: str,
+    start: date,
+    end: date,
+) -> dict[uuid.UUID, dict[date, Decimal]]:
+    """get_client_bucket_totals for several clients in one grouped query."""
+    if not client_ids:
+        return {}
+    unit = _TRUNC_UNIT.get(frequency, "day")
+    bucket = cast(func.date_trunc(unit, cast(DailyClientTotal.day, DateTime)), Date)
+    result = await db.execute(
+        select(DailyClientTotal.client_id, bucket.label("bucket"), func.sum(DailyClientTotal.amount))
+        .where(
+            DailyClientTotal.client_id.in_(client_ids),
+            DailyClientTotal.day >= start,
+            DailyClientTotal.day < end,
+        )
+        .group_by(DailyClientTotal.client_id, "bucket")
+    )
+    totals: dict[uuid.UUID, dict[date, Decimal]] = {}
+    for client_id, period, amount in result.all():
+        totals.setdefault(client_id, {})[period] = Decimal(str(amount))
+    return totals
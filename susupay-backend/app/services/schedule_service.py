@@ -1,11 +1,71 @@
 import uuid
 from datetime import date, timedelta
 
-from sqlalchemy import select, update
+from sqlalchemy import select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.client import Client
 from app.models.collector import Collector
+from app.services import principal_cache
+
+
+# Current-cycle payout date for every positioned active client, computed in
+# SQL with the same arithmetic as get_rotation_schedule: the cycle length is
+# (positioned clients in the group) * interval, and a client's date is
+# current_cycle_start + (position - 1) * interval.
+SCHEDULED_PAYOUTS_SQL = """
+    WITH positioned AS (
+        SELECT c.id AS client_id, c.collector_id, c.full_name, c.phone, c.push_token,
+               c.payout_position,
+               col.cycle_start_date, col.payout_interval_days,
+               COUNT(*) OVER (PARTITION BY c.collector_id)
+                   * NULLIF(col.payout_interval_days, 0) AS cycle_length
+        FROM clients c
+        JOIN collectors col ON col.id = c.collector_id
+        WHERE col.is_active = true
+          AND col.cycle_start_date IS NOT NULL
+          AND c.is_active = true
+          AND c.payout_position IS NOT NULL
+    )
+    SELECT client_id, collector_id, full_name, phone, push_token, payout_position,
+           payout_interval_days,
+           cycle_start_date
+               + CASE WHEN CAST(:today AS date) < cycle_start_date THEN 0
+                      ELSE ((CAST(:today AS date) - cycle_start_date) / cycle_length) * cycle_length
+                 END
+               + (payout_position - 1) * payout_interval_days AS payout_date
+    FROM positioned
+"""
+
+
+async def get_due_payout_reminders(
+    db: AsyncSession,
+    today: date | None = None,
+    days_ahead: tuple[int, ...] = (0, 1, 3),
+) -> list[dict]:
+    """Clients (across all collectors) whose payout is days_ahead days away,
+    with contact details, in a single query."""
+    today = today or date.today()
+    result = await db.execute(
+        text(f"""
+            SELECT client_id, phone, push_token, payout_date,
+                   payout_date - CAST(:today AS date) AS days_until
+            FROM ({SCHEDULED_PAYOUTS_SQL}) AS scheduled
+            WHERE payout_date - CAST(:today AS date) = ANY(:days_ahead)
+            ORDER BY payout_date, client_id
+        """),
+        {"today": today, "days_ahead": list(days_ahead)},
+    )
+    return [
+        {
+            "client_id": row.client_id,
+            "phone": row.phone,
+            "push_token": row.push_token,
+            "payout_date": row.payout_date,
+            "days_until": row.days_until,
+        }
+        for row in result.all()
+    ]
 
 
 async def get_rotation_schedule(db: AsyncSession, collector_id: uuid.UUID) -> dict | None:
@@ -125,12 +185,15 @@ async def set_rotation_order(
     """
     if not positions:
         # Clear all positions
-        await db.execute(
+        cleared = await db.execute(
             update(Client)
             .where(Client.collector_id == collector_id)
             .values(payout_position=None)
+            .returning(Client.id)
         )
+        cleared_ids = list(cleared.scalars().all())
         await db.commit()
+        await principal_cache.invalidate("CLIENT", *cleared_ids)
         return
 
     # Validate contiguous 1..N
@@ -157,11 +220,13 @@ async def set_rotation_order(
         raise ValueError(f"Clients not found in your group: {missing}")
 
     # Clear existing positions first (avoids unique constraint conflicts)
-    await db.execute(
+    cleared = await db.execute(
         update(Client)
         .where(Client.collector_id == collector_id)
         .values(payout_position=None)
+        .returning(Client.id)
     )
+    cleared_ids = list(cleared.scalars().all())
     await db.flush()
 
     # Set new positions
@@ -173,3 +238,4 @@ async def set_rotation_order(
         )
 
     await db.commit()
+    await principal_cache.invalidate("CLIENT", *cleared_ids)
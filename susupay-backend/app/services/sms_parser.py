@@ -1,10 +1,18 @@
 """
-MTN Ghana MoMo SMS Parser.
+Ghana mobile money SMS Parser.
 
-Extracts transaction details from MTN confirmation SMS text using regex.
+Extracts transaction details from MoMo confirmation SMS text using regex.
 Returns a ParsedSMS with confidence: HIGH | PARTIAL | FAILED.
 
-Example SMS:
+Each supported message format is an SmsTemplate in a registry. One combined,
+precompiled detector regex finds the template in a single search; the
+template's head pattern is then matched right at that position and usually
+captures every field in one pass. Only fields the head missed fall back to
+the template's per-field extractors. Text that matches no template is run
+through the MTN "sent" extractors so partially pasted messages still yield
+what they can.
+
+Example SMS (MTN, sent):
     You have sent GHS 20.00 to Ama Owusu (0244123456).
     Transaction ID: 8675309ABC
     Date: 22/02/2025 10:34 AM
@@ -12,18 +20,37 @@ Example SMS:
 """
 
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 
-PATTERNS = {
-    "amount": r"sent\s+GHS\s?([\d,]+\.?\d*)",
-    "recipient_name": r"sent\s+GHS[\d.,\s]+to\s+([A-Za-z\s]+?)\s*\(",
-    "recipient_phone": r"to\s+[^(]+\((0\d{9})\)",
-    "transaction_id": r"Transaction\s+ID[:\s]+([A-Za-z0-9]+)",
-    "date": r"Date[:\s]+(\d{2}/\d{2}/\d{4}\s+\d{1,2}:\d{2}\s+[AP]M)",
-}
+_FLAGS = re.IGNORECASE
+
+# Pattern fragments. Markers use the plain ones (no named groups, since all
+# markers are combined into one regex); extractors name each group after the
+# ParsedSMS field it fills, and dates after their parts (d m Y H M S p).
+_CUR = r"(?:GHS|GH¢|GHC|¢)\s?"
+_NUM = r"[\d,]+(?:\.\d+)?"
+_MSISDN = r"(?:\+?233|0)\d{9}"
+_AMOUNT = rf"(?P<amount>{_NUM})"
+_DMY = r"(?P<d>\d{2})[/-](?P<m>\d{2})[/-](?P<Y>\d{4})"
+_YMD = r"(?P<Y>\d{4})-(?P<m>\d{2})-(?P<d>\d{2})"
+_TIME = r"(?P<H>\d{1,2}):(?P<M>\d{2})(?::(?P<S>\d{2}))?(?:\s*(?P<p>[AP]M))?"
+
+
+def _name(group: str) -> str:
+    return rf"(?P<{group}>[A-Za-z][A-Za-z.'\- ]*?)"
+
 
-DATE_FORMAT = "%d/%m/%Y %I:%M %p"
+def _phone(group: str) -> str:
+    return rf"(?P<{group}>{_MSISDN})"
+
+
+_TXN_LABEL = r"Transaction\s+ID"
+_AT_TXN_LABEL = r"Trans(?:action)?\.?\s+ID"
+
+
+def _txn_id(label: str = _TXN_LABEL) -> str:
+    return rf"{label}[:\s]+(?P<transaction_id>[A-Za-z0-9]+)"
 
 
 @dataclass
@@ -35,51 +62,251 @@ class ParsedSMS:
     transaction_date: datetime | None = None
     raw_text: str = ""
     confidence: str = "FAILED"
+    sender_name: str | None = None
+    sender_phone: str | None = None
+    provider: str | None = None
+    template: str | None = None
+    direction: str | None = None  # SENT | RECEIVED, from the template
 
 
-def parse_mtn_sms(text: str) -> ParsedSMS:
-    result = ParsedSMS(raw_text=text)
+@dataclass(frozen=True)
+class SmsTemplate:
+    """
+    One provider message format.
+
+    marker: regex source that identifies the format (no named groups).
+    head: optional pattern matched at the marker position that captures
+        several fields at once.
+    fields: ParsedSMS field -> pattern used when the head did not fill it.
+    direction: SENT (the message's owner paid recipient_*) or RECEIVED
+        (the owner was paid by sender_*).
+    """
+
+    name: str
+    provider: str
+    marker: str
+    fields: dict[str, re.Pattern] = field(hash=False)
+    head: re.Pattern | None = None
+    direction: str = "SENT"
+
+
+def _compile(pattern: str) -> re.Pattern:
+    return re.compile(pattern, _FLAGS)
+
+
+def _fields(**patterns: str) -> dict[str, re.Pattern]:
+    return {name: _compile(p) for name, p in patterns.items()}
+
+
+_registry: list[SmsTemplate] = []
+_detector: re.Pattern | None = None
+
+
+def register_template(template: SmsTemplate) -> None:
+    """Add a template. Earlier templates win when markers match at the same position."""
+    global _detector
+    _registry.append(template)
+    _detector = None
+
+
+def _detect(text: str) -> tuple[SmsTemplate | None, int]:
+    global _detector
+    if _detector is None:
+        _detector = _compile(
+            "|".join(f"(?P<t{i}>{t.marker})" for i, t in enumerate(_registry))
+        )
+    match = _detector.search(text)
+    if match is None:
+        return None, 0
+    return _registry[int(match.lastgroup[1:])], match.start()
 
-    # Amount
-    match = re.search(PATTERNS["amount"], text, re.IGNORECASE)
-    if match:
-        result.amount = float(match.group(1).replace(",", ""))
-
-    # Recipient name
-    match = re.search(PATTERNS["recipient_name"], text, re.IGNORECASE)
-    if match:
-        result.recipient_name = match.group(1).strip()
-
-    # Recipient phone
-    match = re.search(PATTERNS["recipient_phone"], text, re.IGNORECASE)
-    if match:
-        result.recipient_phone = match.group(1)
-
-    # Transaction ID
-    match = re.search(PATTERNS["transaction_id"], text, re.IGNORECASE)
-    if match:
-        result.transaction_id = match.group(1)
-
-    # Date
-    match = re.search(PATTERNS["date"], text, re.IGNORECASE)
-    if match:
+
+def detect_template(text: str) -> SmsTemplate | None:
+    """Single search over all template markers."""
+    return _detect(text)[0]
+
+
+def _normalize_phone(phone: str) -> str:
+    digits = phone.lstrip("+")
+    return "0" + digits[3:] if digits.startswith("233") else digits
+
+
+_CONVERTERS = {
+    "amount": lambda v: float(v.replace(",", "")),
+    "recipient_phone": _normalize_phone,
+    "sender_phone": _normalize_phone,
+}
+_DATE_PARTS = frozenset("dmYHMSp")
+
+
+def _collect(match: re.Match, result: ParsedSMS, found: set[str]) -> None:
+    """Copy every field captured by match into result and found."""
+    groups = match.groupdict()
+    for name, value in groups.items():
+        if value is None or name in _DATE_PARTS or name in found:
+            continue
+        setattr(result, name, _CONVERTERS.get(name, str.strip)(value))
+        found.add(name)
+
+    if groups.get("Y") and "transaction_date" not in found:
+        hour = int(groups["H"])
+        if groups["p"]:
+            hour = hour % 12 + (12 if groups["p"].upper() == "PM" else 0)
         try:
-            result.transaction_date = datetime.strptime(match.group(1), DATE_FORMAT)
+            result.transaction_date = datetime(
+                int(groups["Y"]), int(groups["m"]), int(groups["d"]),
+                hour, int(groups["M"]), int(groups["S"] or 0),
+            )
+            found.add("transaction_date")
         except ValueError:
             pass
 
-    # Confidence: count non-None fields (excluding raw_text and confidence)
-    filled = sum(
-        1
-        for v in [
-            result.amount,
-            result.recipient_name,
-            result.recipient_phone,
-            result.transaction_id,
-            result.transaction_date,
-        ]
-        if v is not None
-    )
-    result.confidence = "HIGH" if filled == 5 else "PARTIAL" if filled >= 3 else "FAILED"
 
+MTN_SENT = SmsTemplate(
+    name="mtn_sent",
+    provider="MTN",
+    marker=rf"sent\s+{_CUR}{_NUM}\s+to\s+[A-Za-z]",
+    head=_compile(
+        rf"sent\s+{_CUR}{_AMOUNT}\s+to\s+{_name('recipient_name')}\s*"
+        rf"\({_phone('recipient_phone')}\)\.?\s*{_txn_id()}"
+    ),
+    fields=_fields(
+        amount=rf"sent\s+{_CUR}{_AMOUNT}",
+        recipient_name=rf"sent\s+{_CUR}[\d.,\s]+to\s+{_name('recipient_name')}\s*\(",
+        recipient_phone=rf"to\s+[^(]+\({_phone('recipient_phone')}\)",
+        transaction_id=_txn_id(),
+        transaction_date=rf"Date[:\s]+{_DMY}\s+{_TIME}",
+    ),
+)
+
+# AirtelTigo Money puts the number before the name
+AIRTELTIGO_SENT = SmsTemplate(
+    name="airteltigo_sent",
+    provider="AIRTELTIGO",
+    marker=rf"sent\s+{_CUR}{_NUM}\s+to\s+{_MSISDN}",
+    head=_compile(
+        rf"sent\s+{_CUR}{_AMOUNT}\s+to\s+{_phone('recipient_phone')}\s+"
+        rf"{_name('recipient_name')}\s*\.\s*{_txn_id(_AT_TXN_LABEL)}"
+        rf"\.?\s*Date[:\s]+{_DMY}\s+{_TIME}"
+    ),
+    fields=_fields(
+        amount=rf"sent\s+{_CUR}{_AMOUNT}",
+        recipient_phone=rf"sent\s+{_CUR}{_NUM}\s+to\s+{_phone('recipient_phone')}",
+        recipient_name=rf"to\s+{_MSISDN}\s+{_name('recipient_name')}\s*\.",
+        transaction_id=_txn_id(_AT_TXN_LABEL),
+        transaction_date=rf"Date[:\s]+{_DMY}\s+{_TIME}",
+    ),
+)
+
+MTN_PAYMENT_MADE = SmsTemplate(
+    name="mtn_payment_made",
+    provider="MTN",
+    marker=rf"Payment\s+made\s+for\s+{_CUR}",
+    head=_compile(
+        rf"Payment\s+made\s+for\s+{_CUR}{_AMOUNT}\s+to\s+{_name('recipient_name')}\s+"
+        rf"{_phone('recipient_phone')}"
+    ),
+    fields=_fields(
+        amount=rf"Payment\s+made\s+for\s+{_CUR}{_AMOUNT}",
+        recipient_name=rf"\s+to\s+{_name('recipient_name')}\s+{_MSISDN}",
+        recipient_phone=rf"\s+to\s+[^.]*?{_phone('recipient_phone')}",
+        transaction_id=_txn_id(),
+        transaction_date=rf"Date[:\s]+{_YMD}\s+{_TIME}",
+    ),
+)
+
+MTN_RECEIVED = SmsTemplate(
+    name="mtn_received",
+    provider="MTN",
+    direction="RECEIVED",
+    marker=rf"Payment\s+received\s+for\s+{_CUR}",
+    head=_compile(
+        rf"Payment\s+received\s+for\s+{_CUR}{_AMOUNT}\s+from\s+{_name('sender_name')}\s+"
+        rf"{_phone('sender_phone')}"
+    ),
+    fields=_fields(
+        amount=rf"Payment\s+received\s+for\s+{_CUR}{_AMOUNT}",
+        sender_name=rf"from\s+{_name('sender_name')}\s+{_MSISDN}",
+        sender_phone=rf"from\s+[^.]*?{_phone('sender_phone')}",
+        transaction_id=_txn_id(),
+        transaction_date=rf"Date[:\s]+{_YMD}\s+{_TIME}",
+    ),
+)
+
+# Vodafone Cash / Telecel Cash: "<id> Confirmed. GHS20.00 sent to NAME 0201234567 on ..."
+VODAFONE_SENT = SmsTemplate(
+    name="vodafone_sent",
+    provider="VODAFONE",
+    marker=rf"Confirmed\.\s*{_CUR}{_NUM}\s+sent\s+to",
+    head=_compile(
+        rf"Confirmed\.\s*{_CUR}{_AMOUNT}\s+sent\s+to\s+{_name('recipient_name')}\s+"
+        rf"{_phone('recipient_phone')}\s+on\s+{_DMY}\s+at\s+{_TIME}"
+    ),
+    fields=_fields(
+        transaction_id=r"^\s*(?P<transaction_id>[A-Za-z0-9]+)\s+Confirmed",
+        amount=rf"Confirmed\.\s*{_CUR}{_AMOUNT}",
+        recipient_name=rf"sent\s+to\s+{_name('recipient_name')}\s+{_MSISDN}",
+        recipient_phone=rf"sent\s+to\s+[^.]*?{_phone('recipient_phone')}",
+        transaction_date=rf"\bon\s+{_DMY}\s+at\s+{_TIME}",
+    ),
+)
+
+VODAFONE_RECEIVED = SmsTemplate(
+    name="vodafone_received",
+    provider="VODAFONE",
+    direction="RECEIVED",
+    marker=rf"Confirmed\.\s*You\s+have\s+received\s+{_CUR}",
+    head=_compile(
+        rf"Confirmed\.\s*You\s+have\s+received\s+{_CUR}{_AMOUNT}\s+from\s+"
+        rf"{_name('sender_name')}\s+{_phone('sender_phone')}\s+on\s+{_DMY}\s+at\s+{_TIME}"
+    ),
+    fields=_fields(
+        transaction_id=r"^\s*(?P<transaction_id>[A-Za-z0-9]+)\s+Confirmed",
+        amount=rf"received\s+{_CUR}{_AMOUNT}",
+        sender_name=rf"from\s+{_name('sender_name')}\s+{_MSISDN}",
+        sender_phone=rf"from\s+[^.]*?{_phone('sender_phone')}",
+        transaction_date=rf"\bon\s+{_DMY}\s+at\s+{_TIME}",
+    ),
+)
+
+for _template in (
+    AIRTELTIGO_SENT,
+    MTN_SENT,
+    MTN_PAYMENT_MADE,
+    MTN_RECEIVED,
+    VODAFONE_SENT,
+    VODAFONE_RECEIVED,
+):
+    register_template(_template)
+
+
+def parse_sms(text: str) -> ParsedSMS:
+    result = ParsedSMS(raw_text=text)
+    template, start = _detect(text)
+    found: set[str] = set()
+    if template is not None:
+        result.provider = template.provider
+        result.template = template.name
+        result.direction = template.direction
+        if template.head is not None:
+            match = template.head.match(text, start)
+            if match is not None:
+                _collect(match, result, found)
+    else:
+        template = MTN_SENT
+
+    for name, pattern in template.fields.items():
+        if name not in found:
+            match = pattern.search(text)
+            if match is not None:
+                _collect(match, result, found)
+
+    # Confidence: every field the format carries -> HIGH; 3+ -> PARTIAL
+    filled = len(found)
+    expected = len(template.fields)
+    result.confidence = "HIGH" if filled == expected else "PARTIAL" if filled >= 3 else "FAILED"
     return result
+
+
+# Submissions have always gone through this name
+parse_mtn_sms = parse_sms
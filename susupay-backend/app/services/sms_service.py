@@ -1,9 +1,124 @@
+"""
+Hubtel SMS delivery.
+
+A single long-lived HubtelSmsClient (one pooled httpx client per event loop)
+sends all messages with keep-alive, so OTP spikes and reminder runs reuse
+connections instead of paying a TLS handshake per SMS. Transient failures
+(5xx, 429, network errors) are retried with exponential backoff, and
+send_bulk_sms groups identical bodies into Hubtel batch sends.
+"""
+
+import asyncio
 import logging
+from collections import defaultdict
+
+import httpx
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+HUBTEL_SEND_URL = "https://smsc.hubtel.com/v1/messages/send"
+HUBTEL_BATCH_URL = "https://smsc.hubtel.com/v1/messages/batch/simple/send"
+
+
+def _masked(phone: str) -> str:
+    return phone[-4:].rjust(10, "*")
+
+
+def _dev_mode() -> bool:
+    return settings.APP_ENV == "development" or not settings.HUBTEL_CLIENT_ID
+
+
+class HubtelSmsClient:
+    """Pooled Hubtel client with retry/backoff and batch sends."""
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        batch_size: int = 100,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                auth=(settings.HUBTEL_CLIENT_ID, settings.HUBTEL_CLIENT_SECRET),
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+    def _retry_delay(self, attempt: int, response: httpx.Response | None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), 30.0)
+        return self.backoff * (2 ** attempt)
+
+    async def _post(self, url: str, payload: dict) -> bool:
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = await self._get_client().post(url, json=payload)
+            except httpx.TransportError as e:
+                logger.warning("Hubtel request error (attempt %d): %s", attempt + 1, e)
+            else:
+                if 200 <= response.status_code < 300:
+                    return True
+                if response.status_code != 429 and response.status_code < 500:
+                    logger.error("Hubtel SMS failed: %s %s", response.status_code, response.text)
+                    return False
+                logger.warning(
+                    "Hubtel SMS %s (attempt %d), retrying", response.status_code, attempt + 1
+                )
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._retry_delay(attempt, response))
+        logger.error("Hubtel SMS gave up after %d attempts", self.max_retries + 1)
+        return False
+
+    async def send(self, phone: str, message: str) -> bool:
+        return await self._post(
+            HUBTEL_SEND_URL,
+            {"From": settings.HUBTEL_SMS_SENDER, "To": phone, "Content": message},
+        )
+
+    async def send_batch(self, phones: list[str], message: str) -> bool:
+        """Send one body to many recipients, batch_size recipients per request."""
+        chunks = [
+            phones[i:i + self.batch_size] for i in range(0, len(phones), self.batch_size)
+        ]
+        results = await asyncio.gather(*(
+            self._post(
+                HUBTEL_BATCH_URL,
+                {"From": settings.HUBTEL_SMS_SENDER, "Recipients": chunk, "Content": message},
+            )
+            for chunk in chunks
+        ))
+        return all(results)
+
+
+sms_client = HubtelSmsClient()
+
+
+async def close_sms_client() -> None:
+    await sms_client.aclose()
+
 
 async def send_sms(phone: str, message: str) -> bool:
     """
@@ -12,25 +127,37 @@ async def send_sms(phone: str, message: str) -> bool:
     In development mode, logs the message instead of sending.
     Returns True if sent (or logged) successfully.
     """
-    if settings.APP_ENV == "development" or not settings.HUBTEL_CLIENT_ID:
-        logger.info("SMS to %s: %s", phone[-4:].rjust(10, "*"), message)
+    if _dev_mode():
+        logger.info("SMS to %s: %s", _masked(phone), message)
         return True
 
-    # Production: Hubtel SMS API integration
-    # TODO: Implement Hubtel API call in Phase 4
-    import httpx
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://smsc.hubtel.com/v1/messages/send",
-            auth=(settings.HUBTEL_CLIENT_ID, settings.HUBTEL_CLIENT_SECRET),
-            json={
-                "From": settings.HUBTEL_SMS_SENDER,
-                "To": phone,
-                "Content": message,
-            },
-        )
-        if response.status_code == 200:
-            return True
-        logger.error("Hubtel SMS failed: %s %s", response.status_code, response.text)
-        return False
+    return await sms_client.send(phone, message)
+
+
+async def send_bulk_sms(messages: list[tuple[str, str]]) -> list[bool]:
+    """
+    Send many (phone, message) pairs, grouping identical bodies into batch
+    requests. Returns per-message success in input order.
+    """
+    if _dev_mode():
+        for phone, message in messages:
+            logger.info("SMS to %s: %s", _masked(phone), message)
+        return [True] * len(messages)
+
+    by_body: dict[str, list[int]] = defaultdict(list)
+    for i, (_, message) in enumerate(messages):
+        by_body[message].append(i)
+
+    async def deliver(message: str, indexes: list[int]) -> tuple[list[int], bool]:
+        phones = [messages[i][0] for i in indexes]
+        if len(phones) == 1:
+            return indexes, await sms_client.send(phones[0], message)
+        return indexes, await sms_client.send_batch(phones, message)
+
+    results = [False] * len(messages)
+    for indexes, ok in await asyncio.gather(
+        *(deliver(message, indexes) for message, indexes in by_body.items())
+    ):
+        for i in indexes:
+            results[i] = ok
+    return results
@@ -0,0 +1,158 @@
+"""
+Batch client statements — every member's statement as one combined PDF or a
+ZIP of per-client PDFs, built by a background worker.
+
+A job is a Redis hash scoped to its collector (state, done/total progress,
+output filename and path); the finished file is written to REPORT_BATCH_DIR,
+which the API and the worker share, and is swept once REPORT_BATCH_TTL has
+passed. Statements for all clients come from a
+single set-based query (report_service.get_batch_statements) and are laid out
+with the same HTML and renderer as the on-demand reports. A ZIP is rendered
+per client with progress after each one; the combined PDF is one document,
+so it completes in a single step.
+
+Rendering runs on a thread rather than report_service's PDF process pool:
+the job already runs in a Celery worker, off the API event loop, and
+prefork worker children are daemonic and cannot start pool processes.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+import uuid
+import zipfile
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import get_redis
+from app.config import settings
+from app.services.report_service import (
+    get_batch_statements,
+    render_pdf,
+    statement_html,
+    statements_html,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_FORMATS = {"pdf": "application/pdf", "zip": "application/zip"}
+
+
+def _job_key(collector_id: uuid.UUID, job_id: str) -> str:
+    return f"report:batch:{collector_id}:{job_id}"
+
+
+def _output_path(collector_id: uuid.UUID, job_id: str, fmt: str) -> str:
+    return os.path.join(settings.REPORT_BATCH_DIR, f"{collector_id}-{job_id}.{fmt}")
+
+
+async def _update_job(collector_id: uuid.UUID, job_id: str, **fields) -> None:
+    key = _job_key(collector_id, job_id)
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={k: str(v) for k, v in fields.items()})
+        pipe.expire(key, settings.REPORT_BATCH_TTL)
+        await pipe.execute()
+
+
+async def create_job(collector_id: uuid.UUID, fmt: str) -> str:
+    """Register a new PENDING job and return its id."""
+    job_id = uuid.uuid4().hex
+    await _update_job(collector_id, job_id, state="PENDING", format=fmt, done=0, total=0)
+    return job_id
+
+
+async def fail_job(collector_id: uuid.UUID, job_id: str, error: str) -> None:
+    """Mark a job FAILURE before the worker ever picked it up."""
+    await _update_job(collector_id, job_id, state="FAILURE", error=error)
+
+
+async def get_job(collector_id: uuid.UUID, job_id: str) -> dict | None:
+    job = await get_redis().hgetall(_job_key(collector_id, job_id))
+    if not job:
+        return None
+    return {
+        "job_id": job_id,
+        "state": job["state"],
+        "format": job["format"],
+        "done": int(job["done"]),
+        "total": int(job["total"]),
+        "filename": job.get("filename"),
+        "error": job.get("error"),
+    }
+
+
+async def get_job_path(collector_id: uuid.UUID, job_id: str) -> str | None:
+    """Path of the finished job's output, or None if it is gone."""
+    path = await get_redis().hget(_job_key(collector_id, job_id), "path")
+    return path if path is not None and os.path.exists(path) else None
+
+
+def _sweep_expired(directory: str) -> None:
+    """Delete outputs older than REPORT_BATCH_TTL."""
+    cutoff = time.time() - settings.REPORT_BATCH_TTL
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def _write_file(path: str, content: bytes) -> None:
+    with open(path, "wb") as fh:
+        fh.write(content)
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^\w\- ]", "_", name).strip() or "client"
+
+
+async def run_job(
+    db: AsyncSession,
+    job_id: str,
+    collector_id: uuid.UUID,
+    year: int,
+    month: int,
+    months: int,
+    fmt: str,
+) -> dict:
+    """Build the job's output and store it. Runs inside the worker."""
+    try:
+        statements = await get_batch_statements(db, collector_id, year, month, months)
+        if not statements:
+            raise ValueError("No clients in your group")
+        await _update_job(collector_id, job_id, state="PROGRESS", total=len(statements))
+
+        os.makedirs(settings.REPORT_BATCH_DIR, exist_ok=True)
+        path = _output_path(collector_id, job_id, fmt)
+        partial = f"{path}.part"
+        try:
+            if fmt == "zip":
+                with zipfile.ZipFile(partial, "w", zipfile.ZIP_DEFLATED) as archive:
+                    for done, statement in enumerate(statements, start=1):
+                        name = f"{_safe_name(statement['client_name'])}-{statement['client_id'][:8]}.pdf"
+                        pdf = await asyncio.to_thread(render_pdf, statement_html(statement))
+                        await asyncio.to_thread(archive.writestr, name, pdf)
+                        await _update_job(collector_id, job_id, done=done)
+            else:
+                pdf = await asyncio.to_thread(render_pdf, statements_html(statements))
+                await asyncio.to_thread(_write_file, partial, pdf)
+                await _update_job(collector_id, job_id, done=len(statements))
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.unlink(partial)
+        size = os.path.getsize(path)
+
+        filename = f"susupay-statements-{year}-{month:02d}.{fmt}"
+        await _update_job(
+            collector_id, job_id, state="SUCCESS", filename=filename, path=path, bytes=size
+        )
+        await asyncio.to_thread(_sweep_expired, settings.REPORT_BATCH_DIR)
+        return {"job_id": job_id, "statements": len(statements), "bytes": size}
+    except Exception as e:
+        logger.warning("Statement batch %s failed", job_id, exc_info=True)
+        await _update_job(collector_id, job_id, state="FAILURE", error=str(e))
+        raise
@@ -0,0 +1,318 @@
+"""
+Payment streak engine.
+
+A streak is the number of consecutive fully-paid periods (DAILY, WEEKLY or
+MONTHLY, following the collector's contribution settings) ending with the
+period before the current one.
+
+Per-period totals come from one grouped query over the daily rollup
+(daily_client_totals) and are walked in memory.
+The result is persisted in client_streaks and advanced incrementally when a
+transaction is confirmed, so reads are a single row lookup.
+"""
+
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.client_streak import ClientStreak
+from app.models.collector import Collector
+from app.services.rollup_service import (
+    get_client_bucket_totals,
+    get_client_totals,
+    get_clients_bucket_totals,
+)
+
+MAX_STREAK = 90
+
+_TRUNC_UNIT = {"DAILY": "day", "WEEKLY": "week", "MONTHLY": "month"}
+
+
+def period_start(frequency: str, d: date) -> date:
+    """First day of the period containing d (weeks start on Monday)."""
+    if frequency == "WEEKLY":
+        return d - timedelta(days=d.weekday())
+    if frequency == "MONTHLY":
+        return d.replace(day=1)
+    return d
+
+
+def previous_period(frequency: str, start: date) -> date:
+    """Start of the period before the one starting at start."""
+    if frequency == "WEEKLY":
+        return start - timedelta(days=7)
+    if frequency == "MONTHLY":
+        if start.month == 1:
+            return start.replace(year=start.year - 1, month=12)
+        return start.replace(month=start.month - 1)
+    return start - timedelta(days=1)
+
+
+def _next_period(frequency: str, start: date) -> date:
+    if frequency == "WEEKLY":
+        return start + timedelta(days=7)
+    if frequency == "MONTHLY":
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+    return start + timedelta(days=1)
+
+
+async def get_period_totals(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    frequency: str,
+    since: date,
+    until: date,
+) -> dict[date, Decimal]:
+    """Confirmed amount per period start in [since, until), from the daily rollup."""
+    return await get_client_bucket_totals(db, client_id, frequency, since, until)
+
+
+def walk_streak(
+    totals: dict[date, Decimal],
+    frequency: str,
+    expected: Decimal,
+    anchor: date,
+    limit: int = MAX_STREAK,
+) -> int:
+    """Count consecutive fully-paid periods walking backward from anchor."""
+    if expected <= 0:
+        return 0
+    streak = 0
+    p = anchor
+    while streak < limit and totals.get(p, Decimal("0.00")) >= expected:
+        streak += 1
+        p = previous_period(frequency, p)
+    return streak
+
+
+def _history_window(frequency: str, current: date) -> tuple[date, date]:
+    """[since, until) covering every period a from-scratch walk can reach."""
+    since = current
+    for _ in range(MAX_STREAK + 1):
+        since = previous_period(frequency, since)
+    return since, _next_period(frequency, current)
+
+
+def _state_from_totals(
+    totals: dict[date, Decimal],
+    frequency: str,
+    expected: Decimal,
+    current: date,
+) -> tuple[int, date | None]:
+    for anchor in (current, previous_period(frequency, current)):
+        count = walk_streak(totals, frequency, expected, anchor, MAX_STREAK + 1)
+        if count:
+            return count, anchor
+    return 0, None
+
+
+async def compute_streak_state(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    frequency: str,
+    expected: Decimal,
+    today: date | None = None,
+) -> tuple[int, date | None]:
+    """
+    Recompute (streak_count, last_full_period) from scratch.
+    last_full_period is the current period if already paid, else the previous
+    period if paid, else None.
+    """
+    current = period_start(frequency, today or date.today())
+    since, until = _history_window(frequency, current)
+    totals = await get_period_totals(db, client_id, frequency, since, until)
+    return _state_from_totals(totals, frequency, expected, current)
+
+
+async def compute_streak_states(
+    db: AsyncSession,
+    client_ids: list[uuid.UUID],
+    frequency: str,
+    expected: Decimal,
+    today: date | None = None,
+) -> dict[uuid.UUID, tuple[int, date | None]]:
+    """compute_streak_state for several clients from one grouped rollup read."""
+    current = period_start(frequency, today or date.today())
+    since, until = _history_window(frequency, current)
+    totals = await get_clients_bucket_totals(db, client_ids, frequency, since, until)
+    return {
+        client_id: _state_from_totals(totals.get(client_id, {}), frequency, expected, current)
+        for client_id in client_ids
+    }
+
+
+def streak_from_state(
+    streak_count: int,
+    last_full_period: date | None,
+    frequency: str,
+    today: date | None = None,
+) -> int:
+    """Derive the streak (ending at the previous period) from stored state."""
+    if last_full_period is None:
+        return 0
+    current = period_start(frequency, today or date.today())
+    if last_full_period == current:
+        return min(streak_count - 1, MAX_STREAK)
+    if last_full_period == previous_period(frequency, current):
+        return min(streak_count, MAX_STREAK)
+    return 0
+
+
+async def _save_state(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    frequency: str,
+    expected: Decimal,
+    count: int,
+    last_full: date | None,
+) -> None:
+    await _save_states(db, frequency, expected, [(client_id, count, last_full)])
+
+
+async def _save_states(
+    db: AsyncSession,
+    frequency: str,
+    expected: Decimal,
+    states: list[tuple[uuid.UUID, int, date | None]],
+) -> None:
+    """Upsert (client_id, streak_count, last_full_period) rows, one per client."""
+    if not states:
+        return
+    stmt = insert(ClientStreak).values([
+        {
+            "client_id": client_id,
+            "frequency": frequency,
+            "expected_amount": expected,
+            "streak_count": count,
+            "last_full_period": last_full,
+        }
+        for client_id, count, last_full in sorted(states, key=lambda s: s[0])
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ClientStreak.client_id],
+        set_={
+            "frequency": stmt.excluded.frequency,
+            "expected_amount": stmt.excluded.expected_amount,
+            "streak_count": stmt.excluded.streak_count,
+            "last_full_period": stmt.excluded.last_full_period,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def get_payment_streak(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    frequency: str,
+    expected: Decimal,
+) -> int:
+    """Current payment streak. Recomputes (and flushes) the stored state only
+    if it is missing or was built for different contribution settings.
+    Caller commits."""
+    state = await db.get(ClientStreak, client_id)
+    if (
+        state is None
+        or state.frequency != frequency
+        or Decimal(str(state.expected_amount)) != expected
+    ):
+        count, last_full = await compute_streak_state(db, client_id, frequency, expected)
+        await _save_state(db, client_id, frequency, expected, count, last_full)
+        await db.flush()
+        return streak_from_state(count, last_full, frequency)
+    return streak_from_state(state.streak_count, state.last_full_period, frequency)
+
+
+async def record_confirmed_payment(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    collector_id: uuid.UUID,
+) -> None:
+    """Advance the stored streak after a confirmation. Caller commits."""
+    await record_confirmed_payments(db, collector_id, [client_id])
+
+
+async def record_confirmed_payments(
+    db: AsyncSession,
+    collector_id: uuid.UUID,
+    client_ids: list[uuid.UUID],
+) -> None:
+    """
+    Advance the stored streaks of several clients of one collector after
+    their confirmations: one read of the stored states, one grouped rollup
+    read for clients that can be advanced, one for clients whose state must
+    be rebuilt, and one upsert, whatever the number of clients. Caller commits.
+    """
+    client_ids = list(dict.fromkeys(client_ids))
+    if not client_ids:
+        return
+    result = await db.execute(
+        select(
+            Collector.contribution_amount,
+            Collector.contribution_frequency,
+            ClientStreak.client_id,
+            ClientStreak.frequency,
+            ClientStreak.expected_amount,
+            ClientStreak.streak_count,
+            ClientStreak.last_full_period,
+        )
+        .outerjoin(ClientStreak, ClientStreak.client_id.in_(client_ids))
+        .where(Collector.id == collector_id)
+    )
+    rows = result.all()
+    if not rows:
+        return
+
+    expected = Decimal(str(rows[0].contribution_amount))
+    frequency = rows[0].contribution_frequency
+    if expected <= 0:
+        return
+
+    current = period_start(frequency, date.today())
+    stored = {row.client_id: row for row in rows if row.client_id is not None}
+    states: list[tuple[uuid.UUID, int, date | None]] = []
+    pending = []
+    rebuild = []
+    for client_id in client_ids:
+        row = stored.get(client_id)
+        if (
+            row is None
+            or row.frequency != frequency
+            or row.expected_amount is None
+            or Decimal(str(row.expected_amount)) != expected
+        ):
+            rebuild.append(client_id)
+        elif row.last_full_period != current:
+            pending.append(row)
+        # else: already counted — extra money doesn't extend the streak
+
+    if rebuild:
+        rebuilt = await compute_streak_states(db, rebuild, frequency, expected)
+        states.extend((client_id, *rebuilt[client_id]) for client_id in rebuild)
+
+    if pending:
+        # The rollup already includes these confirmations (record_confirmed_deposit
+        # runs first in the same transaction)
+        paid = await get_client_totals(
+            db,
+            collector_id,
+            current,
+            _next_period(frequency, current),
+            [row.client_id for row in pending],
+        )
+        previous = previous_period(frequency, current)
+        for row in pending:
+            if paid.get(row.client_id, (Decimal("0.00"), 0))[0] < expected:
+                continue
+            # Every confirmation passes through here, so the previous period was
+            # fully paid exactly when it is the stored anchor.
+            count = row.streak_count + 1 if row.last_full_period == previous else 1
+            states.append((row.client_id, min(count, MAX_STREAK + 1), current))
+
+    await _save_states(db, frequency, expected, states)
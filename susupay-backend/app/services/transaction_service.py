@@ -7,14 +7,21 @@ All queries scoped by collector_id for multi-tenant isolation.
 
 import uuid
 from datetime import datetime, timezone
+from decimal import Decimal
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.client import Client
 from app.models.collector import Collector
 from app.models.transaction import Transaction
+from app.services.balance_service import apply_deposit, apply_deposits
+from app.services.dashboard_service import invalidate_dashboard
+from app.services.pagination import apply_keyset, page_cursor
+from app.services.rollup_service import record_confirmed_deposit, record_confirmed_deposits
 from app.services.sms_parser import ParsedSMS, parse_mtn_sms
+from app.services.streak_service import record_confirmed_payment, record_confirmed_payments
+from app.services.ussd_snapshot import invalidate_ussd_snapshot
 from app.services.validator import ValidationResult, validate_submission
 
 
@@ -32,7 +39,7 @@ async def submit_sms(
     parsed = parse_mtn_sms(sms_text)
 
     # Validate
-    validation = await validate_submission(db, parsed, collector)
+    validation = await validate_submission(db, parsed, collector, client)
 
     # Determine status
     if validation.auto_reject:
@@ -56,6 +63,7 @@ async def submit_sms(
     )
     db.add(txn)
     await db.commit()
+    await invalidate_dashboard(collector.id)
     await db.refresh(txn)
 
     return txn, parsed, validation
@@ -70,7 +78,7 @@ async def submit_sms_as_client(
     collector = await _get_collector_for_client(db, client)
 
     parsed = parse_mtn_sms(sms_text)
-    validation = await validate_submission(db, parsed, collector)
+    validation = await validate_submission(db, parsed, collector, client, "CLIENT")
 
     if validation.auto_reject:
         status = "AUTO_REJECTED"
@@ -92,6 +100,7 @@ async def submit_sms_as_client(
     )
     db.add(txn)
     await db.commit()
+    await invalidate_dashboard(collector.id)
     await db.refresh(txn)
 
     return txn, parsed, validation
@@ -117,6 +126,7 @@ async def submit_screenshot_as_client(
     )
     db.add(txn)
     await db.commit()
+    await invalidate_dashboard(collector.id)
     await db.refresh(txn)
 
     return txn
@@ -143,58 +153,73 @@ async def submit_screenshot(
     )
     db.add(txn)
     await db.commit()
+    await invalidate_dashboard(collector.id)
     await db.refresh(txn)
 
     return txn
 
 
+async def _count(db: AsyncSession, where_clauses: list) -> int:
+    result = await db.execute(
+        select(func.count())
+        .select_from(Transaction)
+        .where(*where_clauses)
+    )
+    return result.scalar_one()
+
+
+def _feed_item(txn: Transaction, client_name: str) -> dict:
+    return {
+        "id": txn.id,
+        "client_id": txn.client_id,
+        "client_name": client_name,
+        "amount": txn.amount,
+        "submission_type": txn.submission_type,
+        "trust_level": txn.trust_level,
+        "status": txn.status,
+        "validation_flags": txn.validation_flags,
+        "submitted_at": txn.submitted_at,
+        "confirmed_at": txn.confirmed_at,
+        "collector_note": txn.collector_note,
+    }
+
+
 async def get_pending_feed(
     db: AsyncSession,
     collector_id: uuid.UUID,
     skip: int = 0,
     limit: int = 20,
+    cursor: str | None = None,
+    include_total: bool = True,
 ) -> dict:
-    """Get pending transactions for a collector, with client names (paginated)."""
+    """Get pending transactions for a collector, with client names (paginated).
+    Pass the previous page's next_cursor as cursor for keyset paging."""
     where_clause = [
         Transaction.collector_id == collector_id,
         Transaction.status == "PENDING",
     ]
 
-    # Count total
-    count_result = await db.execute(
-        select(func.count())
-        .select_from(Transaction)
-        .where(*where_clause)
-    )
-    total = count_result.scalar_one()
+    total = await _count(db, where_clause) if include_total else None
 
-    # Fetch page
-    result = await db.execute(
+    # Fetch page (oldest first)
+    query = apply_keyset(
         select(Transaction, Client.full_name)
         .join(Client, Transaction.client_id == Client.id)
-        .where(*where_clause)
-        .order_by(Transaction.submitted_at.asc())
-        .offset(skip)
-        .limit(limit)
+        .where(*where_clause),
+        Transaction.submitted_at, Transaction.id, cursor, skip, limit, descending=False,
     )
-    items = []
-    for txn, client_name in result.all():
-        items.append(
-            {
-                "id": txn.id,
-                "client_id": txn.client_id,
-                "client_name": client_name,
-                "amount": txn.amount,
-                "submission_type": txn.submission_type,
-                "trust_level": txn.trust_level,
-                "status": txn.status,
-                "validation_flags": txn.validation_flags,
-                "submitted_at": txn.submitted_at,
-                "confirmed_at": txn.confirmed_at,
-                "collector_note": txn.collector_note,
-            }
-        )
-    return {"items": items, "total": total, "skip": skip, "limit": limit}
+    result = await db.execute(query)
+    rows, next_cursor = page_cursor(
+        result.all(), limit, lambda row: (row[0].submitted_at, row[0].id)
+    )
+    items = [_feed_item(txn, client_name) for txn, client_name in rows]
+    return {
+        "items": items,
+        "total": total,
+        "skip": 0 if cursor else skip,
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
 
 
 async def get_collector_transactions(
@@ -203,6 +228,8 @@ async def get_collector_transactions(
     status_filter: str | None = None,
     skip: int = 0,
     limit: int = 20,
+    cursor: str | None = None,
+    include_total: bool = True,
 ) -> dict:
     """Get transactions for a collector, optionally filtered by status (paginated)."""
     where_clauses = [
@@ -212,42 +239,57 @@ async def get_collector_transactions(
     if status_filter:
         where_clauses.append(Transaction.status == status_filter)
 
-    # Count total
-    count_result = await db.execute(
-        select(func.count())
-        .select_from(Transaction)
-        .where(*where_clauses)
-    )
-    total = count_result.scalar_one()
+    total = await _count(db, where_clauses) if include_total else None
 
-    # Fetch page
-    query = (
+    # Fetch page (newest first)
+    query = apply_keyset(
         select(Transaction, Client.full_name)
         .join(Client, Transaction.client_id == Client.id)
-        .where(*where_clauses)
-        .order_by(Transaction.submitted_at.desc())
-        .offset(skip)
-        .limit(limit)
+        .where(*where_clauses),
+        Transaction.submitted_at, Transaction.id, cursor, skip, limit,
     )
     result = await db.execute(query)
-    items = []
-    for txn, client_name in result.all():
-        items.append(
-            {
-                "id": txn.id,
-                "client_id": txn.client_id,
-                "client_name": client_name,
-                "amount": txn.amount,
-                "submission_type": txn.submission_type,
-                "trust_level": txn.trust_level,
-                "status": txn.status,
-                "validation_flags": txn.validation_flags,
-                "submitted_at": txn.submitted_at,
-                "confirmed_at": txn.confirmed_at,
-                "collector_note": txn.collector_note,
-            }
+    rows, next_cursor = page_cursor(
+        result.all(), limit, lambda row: (row[0].submitted_at, row[0].id)
+    )
+    items = [_feed_item(txn, client_name) for txn, client_name in rows]
+    return {
+        "items": items,
+        "total": total,
+        "skip": 0 if cursor else skip,
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
+
+
+async def _transition(
+    db: AsyncSession,
+    txn_id: uuid.UUID,
+    collector_id: uuid.UUID,
+    from_statuses: tuple[str, ...],
+    action: str,
+    **values,
+) -> Transaction:
+    """
+    Move a transaction out of from_statuses with one conditional UPDATE, so
+    of two racing transitions only one applies. Caller commits.
+    """
+    result = await db.execute(
+        update(Transaction)
+        .where(
+            Transaction.id == txn_id,
+            Transaction.collector_id == collector_id,
+            Transaction.status.in_(from_statuses),
         )
-    return {"items": items, "total": total, "skip": skip, "limit": limit}
+        .values(**values)
+        .returning(Transaction)
+        .execution_options(populate_existing=True)
+    )
+    txn = result.scalar_one_or_none()
+    if txn is None:
+        txn = await _get_transaction_for_collector(db, txn_id, collector_id)
+        raise ValueError(f"Cannot {action} transaction with status {txn.status}")
+    return txn
 
 
 async def confirm_transaction(
@@ -256,15 +298,19 @@ async def confirm_transaction(
     collector_id: uuid.UUID,
 ) -> Transaction:
     """Collector confirms a PENDING or QUERIED transaction."""
-    txn = await _get_transaction_for_collector(db, txn_id, collector_id)
-
-    if txn.status not in ("PENDING", "QUERIED"):
-        raise ValueError(f"Cannot confirm transaction with status {txn.status}")
-
-    txn.status = "CONFIRMED"
-    txn.confirmed_at = datetime.now(timezone.utc)
+    txn = await _transition(
+        db, txn_id, collector_id, ("PENDING", "QUERIED"), "confirm",
+        status="CONFIRMED", confirmed_at=datetime.now(timezone.utc),
+    )
+    # Only the confirmation that won the UPDATE credits the derived tables
+    await apply_deposit(db, txn.client_id, txn.collector_id, txn.amount)
+    await record_confirmed_deposit(
+        db, txn.client_id, txn.collector_id, txn.amount, txn.confirmed_at
+    )
+    await record_confirmed_payment(db, txn.client_id, txn.collector_id)
     await db.commit()
-    await db.refresh(txn)
+    await invalidate_dashboard(collector_id)
+    await invalidate_ussd_snapshot(txn.client_id)
     return txn
 
 
@@ -275,15 +321,12 @@ async def query_transaction(
     note: str,
 ) -> Transaction:
     """Collector queries a PENDING transaction."""
-    txn = await _get_transaction_for_collector(db, txn_id, collector_id)
-
-    if txn.status != "PENDING":
-        raise ValueError(f"Cannot query transaction with status {txn.status}")
-
-    txn.status = "QUERIED"
-    txn.collector_note = note
+    txn = await _transition(
+        db, txn_id, collector_id, ("PENDING",), "query",
+        status="QUERIED", collector_note=note,
+    )
     await db.commit()
-    await db.refresh(txn)
+    await invalidate_dashboard(collector_id)
     return txn
 
 
@@ -294,16 +337,120 @@ async def reject_transaction(
     note: str,
 ) -> Transaction:
     """Collector rejects a QUERIED transaction."""
-    txn = await _get_transaction_for_collector(db, txn_id, collector_id)
+    txn = await _transition(
+        db, txn_id, collector_id, ("QUERIED",), "reject",
+        status="REJECTED", collector_note=note,
+    )
+    await db.commit()
+    await invalidate_dashboard(collector_id)
+    return txn
+
 
-    if txn.status != "QUERIED":
-        raise ValueError(f"Cannot reject transaction with status {txn.status}")
+# Bulk action -> (statuses it applies to, resulting status)
+BULK_ACTIONS = {
+    "confirm": (["PENDING", "QUERIED"], "CONFIRMED"),
+    "query": (["PENDING"], "QUERIED"),
+    "reject": (["QUERIED"], "REJECTED"),
+}
+
+_BULK_TRANSITION_SQL = """
+    UPDATE transactions
+    SET status = CAST(:new_status AS varchar),
+        confirmed_at = CASE WHEN CAST(:new_status AS varchar) = 'CONFIRMED'
+                            THEN now() ELSE confirmed_at END,
+        collector_note = COALESCE(:note, collector_note)
+    WHERE collector_id = CAST(:collector_id AS uuid)
+      AND id = ANY(CAST(:ids AS uuid[]))
+      AND status = ANY(CAST(:from_statuses AS text[]))
+    RETURNING id, client_id, amount, confirmed_at
+"""
+
+
+async def bulk_transition_transactions(
+    db: AsyncSession,
+    collector_id: uuid.UUID,
+    txn_ids: list[uuid.UUID],
+    action: str,
+    note: str | None = None,
+) -> list[dict]:
+    """
+    Confirm, query or reject many transactions with one conditional UPDATE.
+
+    Ids not in an eligible status (or not the collector's) are left alone and
+    reported. Confirmations credit ledgers, the daily rollup and streaks in
+    one set-based write each. Returns one outcome per distinct id, in order;
+    successful ones carry client_id and amount for notifications.
+    """
+    from_statuses, new_status = BULK_ACTIONS[action]
+    if action != "confirm" and not note:
+        raise ValueError(f"A note is required to {action} transactions")
+    txn_ids = list(dict.fromkeys(txn_ids))
+
+    result = await db.execute(text(_BULK_TRANSITION_SQL), {
+        "new_status": new_status,
+        "note": note if action != "confirm" else None,
+        "collector_id": collector_id,
+        "ids": txn_ids,
+        "from_statuses": from_statuses,
+    })
+    updated = {row.id: row for row in result.all()}
+
+    if action == "confirm" and updated:
+        amounts: dict[uuid.UUID, Decimal] = {}
+        for row in updated.values():
+            amounts[row.client_id] = amounts.get(row.client_id, Decimal("0.00")) + row.amount
+        await apply_deposits(db, collector_id, amounts)
+        await record_confirmed_deposits(
+            db,
+            collector_id,
+            [(row.client_id, row.amount, row.confirmed_at) for row in updated.values()],
+        )
+        await record_confirmed_payments(db, collector_id, list(amounts))
+
+    # Why the rest were skipped — only looked up when some were
+    skipped = [txn_id for txn_id in txn_ids if txn_id not in updated]
+    current_status = {}
+    if skipped:
+        rows = await db.execute(
+            select(Transaction.id, Transaction.status).where(
+                Transaction.collector_id == collector_id,
+                Transaction.id.in_(skipped),
+            )
+        )
+        current_status = dict(rows.all())
 
-    txn.status = "REJECTED"
-    txn.collector_note = note
     await db.commit()
-    await db.refresh(txn)
-    return txn
+    if updated:
+        await invalidate_dashboard(collector_id)
+        if action == "confirm":
+            await invalidate_ussd_snapshot(*{row.client_id for row in updated.values()})
+
+    outcomes = []
+    for txn_id in txn_ids:
+        row = updated.get(txn_id)
+        if row is not None:
+            outcomes.append({
+                "transaction_id": txn_id,
+                "ok": True,
+                "status": new_status,
+                "confirmed_at": row.confirmed_at if action == "confirm" else None,
+                "client_id": row.client_id,
+                "amount": row.amount,
+            })
+        elif txn_id in current_status:
+            outcomes.append({
+                "transaction_id": txn_id,
+                "ok": False,
+                "status": current_status[txn_id],
+                "error": f"Cannot {action} transaction with status {current_status[txn_id]}",
+            })
+        else:
+            outcomes.append({
+                "transaction_id": txn_id,
+                "ok": False,
+                "error": "Transaction not found",
+            })
+    return outcomes
 
 
 async def get_client_history(
@@ -312,6 +459,8 @@ async def get_client_history(
     status_filter: str | None = None,
     skip: int = 0,
     limit: int = 20,
+    cursor: str | None = None,
+    include_total: bool = True,
 ) -> dict:
     """Get transactions for a specific client (paginated)."""
     where_clauses = [
@@ -321,24 +470,25 @@ async def get_client_history(
     if status_filter:
         where_clauses.append(Transaction.status == status_filter)
 
-    # Count total
-    count_result = await db.execute(
-        select(func.count())
-        .select_from(Transaction)
-        .where(*where_clauses)
-    )
-    total = count_result.scalar_one()
+    total = await _count(db, where_clauses) if include_total else None
 
-    # Fetch page
+    # Fetch page (newest first)
     result = await db.execute(
-        select(Transaction)
-        .where(*where_clauses)
-        .order_by(Transaction.submitted_at.desc())
-        .offset(skip)
-        .limit(limit)
+        apply_keyset(
+            select(Transaction).where(*where_clauses),
+            Transaction.submitted_at, Transaction.id, cursor, skip, limit,
+        )
+    )
+    items, next_cursor = page_cursor(
+        list(result.scalars().all()), limit, lambda txn: (txn.submitted_at, txn.id)
     )
-    items = list(result.scalars().all())
-    return {"items": items, "total": total, "skip": skip, "limit": limit}
+    return {
+        "items": items,
+        "total": total,
+        "skip": 0 if cursor else skip,
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
 
 
 async def _get_client_for_collector(
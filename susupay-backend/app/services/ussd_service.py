@@ -1,31 +1,92 @@
 """
 USSD feature phone fallback via Hubtel.
 
-Session state stored in Redis with 5-minute TTL.
-Only clients use USSD — phone number is identity (no PIN).
+Session state stored in Redis with 5-minute TTL, as a hash per session on the
+shared pooled client: a hop loads the session and refreshes its TTL in one
+pipelined round trip, and stage changes write only the changed field.
+Only clients use USSD — phone number is identity (no PIN). A phone that
+belongs to several groups is asked to pick one first (GROUP_SELECT); its
+groups and balances are loaded in one query at initiation and kept in the
+session, so the selection hop does not query again.
+
+Balance, payment history and collector info are answered from pre-rendered
+screens in Redis (see ussd_snapshot), so only initiation and payouts query
+Postgres once the snapshot is warm.
+
+Per-stage latency histograms (per process) are kept so hops can be checked
+against the gateway's response deadline; see get_latency_histograms.
 """
 
+import bisect
 import json
+import logging
+import time
 import uuid
 from decimal import Decimal, InvalidOperation
 
-import redis.asyncio as aioredis
-from sqlalchemy import select
+from redis.exceptions import RedisError
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import get_redis
 from app.config import settings
 from app.models.client import Client
-from app.models.collector import Collector
 from app.schemas.ussd import USSDRequest, USSDResponse
+from app.services import ussd_snapshot
 from app.services.balance_service import get_client_balance
 from app.services.payout_service import request_payout
-from app.services.transaction_service import get_client_history
+
+logger = logging.getLogger(__name__)
 
 SESSION_TTL = 300  # 5 minutes
 
+# Latency histogram bucket upper bounds (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# stage -> [count per bucket..., overflow count], plus running totals
+_histograms: dict[str, list[int]] = {}
+_latency_totals: dict[str, float] = {}
+
+# Main-menu options get their own stage label; anything else is "invalid"
+_MENU_CHOICES = {"0", "1", "2", "3", "4"}
+
+# Every active membership of a phone number with its group and balance,
+# in join order — one query however many groups the member belongs to
+_MEMBER_GROUPS_SQL = """
+    SELECT c.id AS client_id, c.collector_id, col.full_name AS collector_name,
+           COALESCE(l.balance, 0) AS balance
+    FROM clients c
+    JOIN collectors col ON col.id = c.collector_id
+    LEFT JOIN client_ledgers l ON l.client_id = c.id
+    WHERE c.phone = :phone AND c.is_active
+    ORDER BY c.joined_at, c.id
+"""
+
 
-async def _get_redis() -> aioredis.Redis:
-    return aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+def _observe(stage: str, elapsed_ms: float) -> None:
+    counts = _histograms.get(stage)
+    if counts is None:
+        counts = _histograms[stage] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    counts[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+    _latency_totals[stage] = _latency_totals.get(stage, 0.0) + elapsed_ms
+    if elapsed_ms > settings.USSD_SLOW_HOP_MS:
+        logger.warning("Slow USSD hop: %s took %.0f ms", stage, elapsed_ms)
+
+
+def get_latency_histograms() -> dict:
+    """Per-stage hop latency for this process: bucket counts, count and mean."""
+    stages = {}
+    for stage, counts in _histograms.items():
+        total = sum(counts)
+        stages[stage] = {
+            "buckets": {
+                **{f"le_{b}": c for b, c in zip(LATENCY_BUCKETS_MS, counts)},
+                "inf": counts[-1],
+            },
+            "count": total,
+            "mean_ms": round(_latency_totals[stage] / total, 2) if total else 0.0,
+        }
+    return {"buckets_ms": list(LATENCY_BUCKETS_MS), "stages": stages}
 
 
 def normalize_phone(phone: str) -> str:
@@ -39,21 +100,27 @@ def _session_key(session_id: str) -> str:
     return f"ussd:{session_id}"
 
 
-async def _save_session(
-    r: aioredis.Redis, session_id: str, data: dict
-) -> None:
-    await r.set(_session_key(session_id), json.dumps(data), ex=SESSION_TTL)
+async def _save_session(session_id: str, data: dict) -> None:
+    """Write fields (all of a new session, or only the changed ones) and refresh TTL."""
+    key = _session_key(session_id)
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping=data)
+        pipe.expire(key, SESSION_TTL)
+        await pipe.execute()
 
 
-async def _load_session(r: aioredis.Redis, session_id: str) -> dict | None:
-    raw = await r.get(_session_key(session_id))
-    if raw is None:
-        return None
-    return json.loads(raw)
+async def _load_session(session_id: str) -> dict | None:
+    """Read the session and refresh its TTL in one round trip."""
+    key = _session_key(session_id)
+    async with get_redis().pipeline(transaction=False) as pipe:
+        pipe.hgetall(key)
+        pipe.expire(key, SESSION_TTL)
+        data, _ = await pipe.execute()
+    return data or None
 
 
-async def _delete_session(r: aioredis.Redis, session_id: str) -> None:
-    await r.delete(_session_key(session_id))
+async def _delete_session(session_id: str) -> None:
+    await get_redis().delete(_session_key(session_id))
 
 
 def _release(session_id: str, message: str) -> USSDResponse:
@@ -75,122 +142,141 @@ MAIN_MENU = (
 
 
 async def handle_ussd(db: AsyncSession, request: USSDRequest) -> USSDResponse:
-    try:
-        r = await _get_redis()
-    except Exception:
-        return _release(request.SessionId, "Service temporarily unavailable. Please try again later.")
+    started = time.perf_counter()
+    stage = request.Type.upper()
     try:
         if request.Type == "Initiation":
-            return await _handle_initiation(db, r, request)
+            return await _handle_initiation(db, request)
         elif request.Type == "Response":
-            return await _handle_response(db, r, request)
+            session = await _load_session(request.SessionId)
+            if session is None:
+                stage = "EXPIRED"
+                return _release(request.SessionId, "Session expired. Please dial again.")
+            stage = session["stage"]
+            choice = request.Message.strip()
+            if stage == "MAIN_MENU":
+                stage = f"MAIN_MENU.{choice if choice in _MENU_CHOICES else 'invalid'}"
+            return await _handle_response(db, request, session, choice)
         elif request.Type in ("Release", "Timeout"):
-            await _delete_session(r, request.SessionId)
+            await _delete_session(request.SessionId)
             return _release(request.SessionId, "")
         else:
+            stage = "INVALID"
             return _release(request.SessionId, "Invalid request")
+    except RedisError:
+        logger.warning("Redis unavailable for USSD session %s", request.SessionId)
+        stage = "UNAVAILABLE"
+        return _release(request.SessionId, "Service temporarily unavailable. Please try again later.")
     finally:
-        await r.aclose()
+        _observe(stage, (time.perf_counter() - started) * 1000)
 
 
-async def _handle_initiation(
-    db: AsyncSession, r: aioredis.Redis, request: USSDRequest
-) -> USSDResponse:
+async def _handle_initiation(db: AsyncSession, request: USSDRequest) -> USSDResponse:
     phone = normalize_phone(request.PhoneNumber)
 
-    result = await db.execute(select(Client).where(Client.phone == phone))
-    client = result.scalar_one_or_none()
+    result = await db.execute(text(_MEMBER_GROUPS_SQL), {"phone": phone})
+    groups = [
+        [str(row.client_id), str(row.collector_id), row.collector_name, f"{row.balance:.2f}"]
+        for row in result.all()
+    ]
 
-    if client is None:
+    if not groups:
         return _release(
             request.SessionId,
             "Phone not registered. Contact your susu collector to join.",
         )
 
+    if len(groups) == 1:
+        return await _enter_group(db, request.SessionId, groups[0], {"phone": phone})
+
+    # Member of several groups — cache them all and ask which one
     session_data = {
         "phone": phone,
-        "stage": "MAIN_MENU",
-        "client_id": str(client.id),
-        "collector_id": str(client.collector_id),
+        "stage": "GROUP_SELECT",
+        "groups": json.dumps(groups),
     }
-    await _save_session(r, request.SessionId, session_data)
-    return _respond(request.SessionId, MAIN_MENU)
+    await _save_session(request.SessionId, session_data)
+    return _respond(request.SessionId, _group_menu(groups))
 
 
-async def _handle_response(
-    db: AsyncSession, r: aioredis.Redis, request: USSDRequest
+def _group_menu(groups: list[list[str]]) -> str:
+    lines = [
+        f"{i}. {collector_name} (GHS {balance})"
+        for i, (_, _, collector_name, balance) in enumerate(groups, start=1)
+    ]
+    return "Select your group:\n" + "\n".join(lines)
+
+
+async def _enter_group(
+    db: AsyncSession, session_id: str, group: list[str], fields: dict
 ) -> USSDResponse:
-    session = await _load_session(r, request.SessionId)
-    if session is None:
-        return _release(request.SessionId, "Session expired. Please dial again.")
+    client_id, collector_id = group[0], group[1]
+    await _save_session(
+        session_id,
+        {**fields, "stage": "MAIN_MENU", "client_id": client_id, "collector_id": collector_id},
+    )
+    await ussd_snapshot.warm_snapshot(db, uuid.UUID(client_id))
+    return _respond(session_id, MAIN_MENU)
+
 
+async def _handle_group_select(
+    db: AsyncSession,
+    request: USSDRequest,
+    session: dict,
+    choice: str,
+) -> USSDResponse:
+    groups = json.loads(session["groups"])
+    if not (choice.isdigit() and 1 <= int(choice) <= len(groups)):
+        return _respond(request.SessionId, "Invalid option.\n" + _group_menu(groups))
+    return await _enter_group(db, request.SessionId, groups[int(choice) - 1], {})
+
+
+async def _handle_response(
+    db: AsyncSession, request: USSDRequest, session: dict, choice: str
+) -> USSDResponse:
     stage = session["stage"]
-    choice = request.Message.strip()
 
     if stage == "MAIN_MENU":
-        return await _handle_main_menu(db, r, request, session, choice)
+        return await _handle_main_menu(db, request, session, choice)
+    elif stage == "GROUP_SELECT":
+        return await _handle_group_select(db, request, session, choice)
     elif stage == "PAYOUT_AMOUNT":
-        return await _handle_payout_amount(db, r, request, session, choice)
+        return await _handle_payout_amount(db, request, session, choice)
     else:
         return _release(request.SessionId, "Invalid session. Please dial again.")
 
 
 async def _handle_main_menu(
     db: AsyncSession,
-    r: aioredis.Redis,
     request: USSDRequest,
     session: dict,
     choice: str,
 ) -> USSDResponse:
     client_id = uuid.UUID(session["client_id"])
 
-    if choice == "1":
-        # Check balance
-        balance_info = await get_client_balance(db, client_id)
-        balance = balance_info["balance"]
-        name = balance_info["full_name"]
-        return _release(
-            request.SessionId,
-            f"{name}, your balance is GHS {balance:.2f}",
-        )
-
-    elif choice == "2":
-        # Payment history (last 5 confirmed)
-        txns_result = await get_client_history(db, client_id, status_filter="CONFIRMED", limit=5)
-        confirmed = txns_result["items"]
-        if not confirmed:
-            return _release(request.SessionId, "No transactions found.")
-        lines = []
-        for t in confirmed:
-            date_str = t.submitted_at.strftime("%d/%m/%Y")
-            lines.append(f"GHS {t.amount:.2f} on {date_str}")
-        return _release(
-            request.SessionId,
-            "Recent payments:\n" + "\n".join(lines),
-        )
+    if choice in (ussd_snapshot.BALANCE_SCREEN, ussd_snapshot.HISTORY_SCREEN):
+        # Balance / payment history (last 5 confirmed), pre-rendered
+        screen = await ussd_snapshot.get_client_screen(db, client_id, choice)
+        if screen is None:
+            return _release(request.SessionId, "Client not found.")
+        return _release(request.SessionId, screen)
 
     elif choice == "3":
         # Request payout — prompt for amount
-        session["stage"] = "PAYOUT_AMOUNT"
-        await _save_session(r, request.SessionId, session)
+        await _save_session(request.SessionId, {"stage": "PAYOUT_AMOUNT"})
         return _respond(request.SessionId, "Enter payout amount (GHS):")
 
-    elif choice == "4":
+    elif choice == ussd_snapshot.COLLECTOR_SCREEN:
         # Collector info
-        collector_id = uuid.UUID(session["collector_id"])
-        result = await db.execute(
-            select(Collector).where(Collector.id == collector_id)
+        screen = await ussd_snapshot.get_collector_screen(
+            db, uuid.UUID(session["collector_id"])
         )
-        collector = result.scalar_one_or_none()
-        if collector is None:
+        if screen is None:
             return _release(request.SessionId, "Collector not found.")
-        return _release(
-            request.SessionId,
-            f"Collector: {collector.full_name}\nPhone: {collector.phone}",
-        )
+        return _release(request.SessionId, screen)
 
     elif choice == "0":
-        await _delete_session(r, request.SessionId)
+        await _delete_session(request.SessionId)
         return _release(request.SessionId, "Goodbye! Thank you for using SusuPay.")
 
     else:
@@ -200,7 +286,6 @@ async def _handle_main_menu(
 
 async def _handle_payout_amount(
     db: AsyncSession,
-    r: aioredis.Redis,
     request: USSDRequest,
     session: dict,
     amount_str: str,
@@ -233,13 +318,11 @@ async def _handle_payout_amount(
         return _release(request.SessionId, "Client not found.")
 
     try:
-        payout = await request_payout(
-            db, client_obj, amount, "EMERGENCY", "USSD request"
-        )
+        await request_payout(db, client_obj, amount, "EMERGENCY", "USSD request")
     except ValueError as e:
         return _release(request.SessionId, str(e))
 
-    await _delete_session(r, request.SessionId)
+    await _delete_session(request.SessionId)
     return _release(
         request.SessionId,
         f"Payout of GHS {amount:.2f} requested. Your collector will be notified.",
@@ -0,0 +1,183 @@
+"""
+Pre-rendered USSD screens.
+
+The read-only main-menu options (1. balance, 2. payment history) are kept per
+client as a Redis hash of finished screen text, and the collector-info screen
+(4) once per collector, so a warm menu hop is a single HGET and never
+touches Postgres. A client's snapshot is built with one query on session
+initiation if it is missing, and deleted whenever money moves for that
+client (confirmed deposit, completed payout) or a displayed name changes;
+USSD_SNAPSHOT_TTL only bounds how long an idle snapshot lingers.
+
+Each cached screen has a generation counter that invalidation bumps before
+deleting it. A rebuild reads the generation before its query and is stored
+only if the generation is unchanged, so a build that raced an invalidation
+never writes its stale screens back.
+"""
+
+import logging
+import uuid
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import get_redis
+from app.config import settings
+from app.models.collector import Collector
+
+logger = logging.getLogger(__name__)
+
+BALANCE_SCREEN = "1"
+HISTORY_SCREEN = "2"
+COLLECTOR_SCREEN = "4"
+
+HISTORY_LIMIT = 5
+
+# Client name and ledger balance repeated on each of the last five
+# confirmed payments (one row with NULL payment columns if there are none)
+_SNAPSHOT_SQL = f"""
+    SELECT c.full_name, COALESCE(l.balance, 0) AS balance,
+           t.amount, t.submitted_at
+    FROM clients c
+    LEFT JOIN client_ledgers l ON l.client_id = c.id
+    LEFT JOIN LATERAL (
+        SELECT amount, submitted_at
+        FROM transactions
+        WHERE client_id = c.id AND status = 'CONFIRMED'
+        ORDER BY submitted_at DESC, id DESC
+        LIMIT {HISTORY_LIMIT}
+    ) t ON true
+    WHERE c.id = CAST(:client_id AS uuid)
+    ORDER BY t.submitted_at DESC
+"""
+
+
+# KEYS[1] = screen key, KEYS[2] = generation key
+# ARGV = generation read before the build, ttl, then field/value pairs
+# Returns 1 if stored, 0 if invalidated since the build started
+_STORE_IF_CURRENT_LUA = """
+if (redis.call("GET", KEYS[2]) or "0") ~= ARGV[1] then
+    return 0
+end
+redis.call("DEL", KEYS[1])
+redis.call("HSET", KEYS[1], unpack(ARGV, 3))
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+return 1
+"""
+
+_store_script = None
+
+
+def _snapshot_key(client_id: uuid.UUID | str) -> str:
+    return f"ussd:snapshot:{client_id}"
+
+
+def _collector_key(collector_id: uuid.UUID | str) -> str:
+    return f"ussd:collector:{collector_id}"
+
+
+def _generation_key(key: str) -> str:
+    return f"ussd:gen:{key.removeprefix('ussd:')}"
+
+
+async def _generation(key: str) -> str:
+    return await get_redis().get(_generation_key(key)) or "0"
+
+
+async def _store_if_current(key: str, generation: str, screens: dict[str, str]) -> bool:
+    global _store_script
+    redis = get_redis()
+    if _store_script is None:
+        _store_script = redis.register_script(_STORE_IF_CURRENT_LUA)
+    fields = [item for pair in screens.items() for item in pair]
+    stored = await _store_script(
+        keys=[key, _generation_key(key)],
+        args=[generation, settings.USSD_SNAPSHOT_TTL, *fields],
+    )
+    return bool(stored)
+
+
+async def _invalidate(*keys: str) -> None:
+    async with get_redis().pipeline(transaction=True) as pipe:
+        for key in keys:
+            gen_key = _generation_key(key)
+            pipe.incr(gen_key)
+            pipe.expire(gen_key, settings.USSD_SNAPSHOT_TTL)
+        pipe.delete(*keys)
+        await pipe.execute()
+
+
+async def _build_snapshot(db: AsyncSession, client_id: uuid.UUID) -> dict[str, str]:
+    rows = (await db.execute(text(_SNAPSHOT_SQL), {"client_id": client_id})).all()
+    if not rows:
+        return {}
+    first = rows[0]
+    balance = f"{first.full_name}, your balance is GHS {first.balance:.2f}"
+    payments = [
+        f"GHS {row.amount:.2f} on {row.submitted_at.strftime('%d/%m/%Y')}"
+        for row in rows
+        if row.amount is not None
+    ]
+    history = (
+        "Recent payments:\n" + "\n".join(payments) if payments else "No transactions found."
+    )
+    return {BALANCE_SCREEN: balance, HISTORY_SCREEN: history}
+
+
+async def warm_snapshot(db: AsyncSession, client_id: uuid.UUID) -> None:
+    """Build the client's snapshot if it is not cached already."""
+    key = _snapshot_key(client_id)
+    if await get_redis().exists(key):
+        return
+    generation = await _generation(key)
+    screens = await _build_snapshot(db, client_id)
+    if screens:
+        await _store_if_current(key, generation, screens)
+
+
+async def get_client_screen(db: AsyncSession, client_id: uuid.UUID, screen: str) -> str | None:
+    """Balance or history screen text; rebuilds the snapshot on a miss."""
+    key = _snapshot_key(client_id)
+    cached = await get_redis().hget(key, screen)
+    if cached is not None:
+        return cached
+    generation = await _generation(key)
+    screens = await _build_snapshot(db, client_id)
+    if not screens:
+        return None
+    await _store_if_current(key, generation, screens)
+    return screens[screen]
+
+
+async def get_collector_screen(db: AsyncSession, collector_id: uuid.UUID) -> str | None:
+    """Collector info screen, shared by all of the collector's clients."""
+    key = _collector_key(collector_id)
+    cached = await get_redis().hget(key, COLLECTOR_SCREEN)
+    if cached is not None:
+        return cached
+    generation = await _generation(key)
+    result = await db.execute(
+        select(Collector.full_name, Collector.phone).where(Collector.id == collector_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    screen = f"Collector: {row.full_name}\nPhone: {row.phone}"
+    await _store_if_current(key, generation, {COLLECTOR_SCREEN: screen})
+    return screen
+
+
+async def invalidate_ussd_snapshot(*client_ids: uuid.UUID) -> None:
+    if not client_ids:
+        return
+    try:
+        await _invalidate(*(_snapshot_key(cid) for cid in client_ids))
+    except Exception:
+        logger.warning("Redis unavailable — USSD snapshot not invalidated")
+
+
+async def invalidate_ussd_collector(collector_id: uuid.UUID) -> None:
+    try:
+        await _invalidate(_collector_key(collector_id))
+    except Exception:
+        logger.warning("Redis unavailable — USSD collector screen not invalidated")
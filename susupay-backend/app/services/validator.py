@@ -1,8 +1,10 @@
 """
-Three automatic validations for transaction submissions.
+Automatic validations for transaction submissions.
 
 1. Duplicate check — MTN Transaction ID must be globally unique
 2. Recipient phone — must match collector's registered MoMo number
+   (received-money SMS: the collector must be the receiver and the sender
+   must be the client)
 3. Date window — transaction must be within 48 hours
 """
 
@@ -12,6 +14,7 @@ from datetime import datetime, timedelta, timezone
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.client import Client
 from app.models.collector import Collector
 from app.models.transaction import Transaction
 from app.services.sms_parser import ParsedSMS
@@ -29,7 +32,10 @@ async def validate_submission(
     db: AsyncSession,
     parsed: ParsedSMS,
     collector: Collector,
+    client: Client,
+    submitted_by: str = "COLLECTOR",
 ) -> ValidationResult:
+    """submitted_by: COLLECTOR or CLIENT — whose phone the pasted SMS came from."""
     result = ValidationResult()
 
     # Validation 1: Duplicate Transaction ID
@@ -43,8 +49,27 @@ async def validate_submission(
             result.trust_level = "AUTO_REJECTED"
             return result
 
-    # Validation 2: Recipient phone matches collector's MoMo number
-    if parsed.recipient_phone and parsed.recipient_phone != collector.momo_number:
+    # Validation 2: Recipient phone matches collector's MoMo number. A
+    # received-money SMS names no recipient — it is on the receiver's phone —
+    # so it only counts when the collector pasted it and the client sent it.
+    if parsed.direction == "RECEIVED":
+        if submitted_by != "COLLECTOR":
+            result.flags.append(
+                {
+                    "field": "direction",
+                    "message": "SMS records money received, not a payment to the collector",
+                    "severity": "HIGH",
+                }
+            )
+        if parsed.sender_phone != client.phone:
+            result.flags.append(
+                {
+                    "field": "sender_phone",
+                    "message": "Sender number does not match the client's phone",
+                    "severity": "HIGH",
+                }
+            )
+    elif parsed.recipient_phone and parsed.recipient_phone != collector.momo_number:
         result.flags.append(
             {
                 "field": "recipient_phone",
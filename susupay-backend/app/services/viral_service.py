@@ -17,6 +17,9 @@ from app.models.collector import Collector
 from app.models.referral import Referral
 from app.models.savings_goal import SavingsGoal
 from app.models.transaction import Transaction
+from app.services import principal_cache
+from app.services.rollup_service import get_client_totals
+from app.services.streak_service import get_payment_streak
 
 
 # ─── Achievement definitions ─────────────────────────────────────────────────
@@ -116,6 +119,7 @@ async def get_or_create_referral_code(db: AsyncSession, collector: Collector) ->
     code = generate_referral_code(collector.full_name)
     collector.referral_code = code
     await db.commit()
+    await principal_cache.invalidate("COLLECTOR", collector.id)
     return code
 
 
@@ -206,7 +210,7 @@ async def check_and_award_achievements(
     db: AsyncSession, client_id: uuid.UUID
 ) -> list[str]:
     """Check all achievement conditions and award any newly earned ones.
-    Returns list of newly awarded achievement types."""
+    Returns list of newly awarded achievement types. Caller commits."""
     # Get already earned
     result = await db.execute(
         select(Achievement.achievement_type).where(Achievement.client_id == client_id)
@@ -248,30 +252,30 @@ async def check_and_award_achievements(
         if achievement_type not in earned and total_saved >= threshold:
             newly_awarded.append(achievement_type)
 
-    # Streak achievements — get from client analytics
-    client_result = await db.execute(
-        select(Client).where(Client.id == client_id)
+    # Streak achievements — from the persisted streak
+    result = await db.execute(
+        select(Collector.contribution_amount, Collector.contribution_frequency)
+        .join(Client, Client.collector_id == Collector.id)
+        .where(Client.id == client_id)
     )
-    client = client_result.scalar_one_or_none()
-    if client:
-        collector_result = await db.execute(
-            select(Collector).where(Collector.id == client.collector_id)
+    settings_row = result.first()
+    if settings_row:
+        streak = await get_payment_streak(
+            db,
+            client_id,
+            settings_row.contribution_frequency,
+            Decimal(str(settings_row.contribution_amount)),
         )
-        collector = collector_result.scalar_one_or_none()
-        if collector:
-            from app.services.analytics_service import get_client_analytics
-            analytics = await get_client_analytics(db, client)
-            streak = analytics.get("payment_streak", 0)
-
-            streak_milestones = [
-                ("STREAK_3", 3),
-                ("STREAK_7", 7),
-                ("STREAK_14", 14),
-                ("STREAK_30", 30),
-            ]
-            for achievement_type, threshold in streak_milestones:
-                if achievement_type not in earned and streak >= threshold:
-                    newly_awarded.append(achievement_type)
+
+        streak_milestones = [
+            ("STREAK_3", 3),
+            ("STREAK_7", 7),
+            ("STREAK_14", 14),
+            ("STREAK_30", 30),
+        ]
+        for achievement_type, threshold in streak_milestones:
+            if achievement_type not in earned and streak >= threshold:
+                newly_awarded.append(achievement_type)
 
     # Award new achievements
     for achievement_type in newly_awarded:
@@ -281,9 +285,6 @@ async def check_and_award_achievements(
         )
         db.add(achievement)
 
-    if newly_awarded:
-        await db.commit()
-
     return newly_awarded
 
 
@@ -378,22 +379,15 @@ async def get_group_leaderboard(
         date.today().replace(day=1), datetime.min.time()
     ).replace(tzinfo=timezone.utc)
 
-    deposits_result = await db.execute(
-        select(Transaction.client_id, func.sum(Transaction.amount))
-        .where(
-            Transaction.collector_id == client.collector_id,
-            Transaction.status == "CONFIRMED",
-            Transaction.confirmed_at >= month_start,
-        )
-        .group_by(Transaction.client_id)
-        .order_by(func.sum(Transaction.amount).desc())
+    month_totals = await get_client_totals(
+        db, client.collector_id, month_start, date.today() + timedelta(days=1)
     )
+    ranked = sorted(month_totals.items(), key=lambda item: item[1][0], reverse=True)
 
     entries = []
     rank = 0
     my_rank = None
-    for row in deposits_result.all():
-        cid = row[0]
+    for cid, (total, _) in ranked:
         if cid not in clients_map:
             continue
         rank += 1
@@ -405,7 +399,7 @@ async def get_group_leaderboard(
             "client_id": cid,
             "full_name": clients_map[cid],
             "streak": 0,  # Will be enriched if needed
-            "total_deposits": Decimal(str(row[1])),
+            "total_deposits": total,
             "is_current_user": is_me,
         })
 
@@ -0,0 +1,90 @@
+"""
+Per-process async runtime for Celery workers.
+
+Each worker process keeps one event loop and one pooled engine for its whole
+lifetime instead of building them per task. Both are created on
+worker_process_init (prefork children) or lazily on first use (solo pool,
+tests) and torn down on shutdown.
+
+Assumes the prefork or solo pool: the loop is driven by one thread at a time.
+"""
+
+import asyncio
+import logging
+
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+_loop: asyncio.AbstractEventLoop | None = None
+_engine: AsyncEngine | None = None
+_session_factory: async_sessionmaker[AsyncSession] | None = None
+
+# Async cleanup hooks (HTTP clients, etc.) run on the worker loop at shutdown
+_shutdown_hooks: list = []
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run_async(coro):
+    """Run an async coroutine from a sync Celery task on the worker's loop."""
+    return get_loop().run_until_complete(coro)
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    global _engine, _session_factory
+    if _session_factory is None:
+        from app.database import make_engine
+
+        _engine = make_engine()
+        _session_factory = async_sessionmaker(_engine, class_=AsyncSession, expire_on_commit=False)
+    return _session_factory
+
+
+def on_shutdown(hook) -> None:
+    """Register an async callable to run on the worker loop at shutdown."""
+    _shutdown_hooks.append(hook)
+
+
+async def _dispose() -> None:
+    global _engine, _session_factory
+    for hook in _shutdown_hooks:
+        try:
+            await hook()
+        except Exception:
+            logger.warning("Worker shutdown hook %r failed", hook, exc_info=True)
+
+    from app.cache import close_redis
+
+    await close_redis()
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _session_factory = None
+
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs) -> None:
+    get_loop()
+    get_session_factory()
+    logger.info("Worker runtime initialised")
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _shutdown_worker_process(**kwargs) -> None:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        return
+    try:
+        _loop.run_until_complete(_dispose())
+    finally:
+        _loop.close()
+        _loop = None
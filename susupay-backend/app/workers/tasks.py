@@ -3,21 +3,28 @@ Celery tasks for async processing.
 
 Tasks:
 - send_notification_task: dispatch push/SMS notification
+- send_notifications_task: dispatch a group of notifications in one task
 - daily_reminder_task: remind unpaid clients at 8 AM daily
+- statement_batch_task: render every client's statement for a collector
 """
 
-import asyncio
 import logging
+import time
+import uuid
 from datetime import date, datetime, timezone
 
-from sqlalchemy import select, text
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import text
 
-from app.config import settings
+from app.services.push_service import close_push_client
+from app.services.sms_service import close_sms_client
 from app.workers.celery_app import celery
+from app.workers.runtime import get_session_factory, on_shutdown, run_async
 
 logger = logging.getLogger(__name__)
 
+on_shutdown(close_push_client)
+on_shutdown(close_sms_client)
+
 
 def safe_delay(task, *args, **kwargs):
     """Call task.delay() but silently skip if the broker (Redis) is unavailable."""
@@ -27,21 +34,6 @@ def safe_delay(task, *args, **kwargs):
         logger.warning("Celery broker unavailable — skipping task %s", task.name)
 
 
-def _run_async(coro):
-    """Run an async coroutine from a sync Celery task."""
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
-
-
-async def _get_session() -> AsyncSession:
-    engine = create_async_engine(settings.DATABASE_URL, echo=False)
-    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    return factory(), engine
-
-
 @celery.task(name="app.workers.tasks.send_notification_task")
 def send_notification_task(
     push_token: str | None,
@@ -53,11 +45,23 @@ def send_notification_task(
     """Send a notification via push or SMS fallback."""
     from app.services.notification_service import notify
 
-    channel = _run_async(notify(push_token, phone, title, body, data))
+    channel = run_async(notify(push_token, phone, title, body, data))
     logger.info("Notification sent via %s to %s: %s", channel, phone[-4:].rjust(10, "*"), title)
     return channel
 
 
+@celery.task(name="app.workers.tasks.send_notifications_task")
+def send_notifications_task(messages: list[list]) -> dict:
+    """
+    Send [push_token, phone, title, body] notifications as one group: pushes
+    concurrently, SMS fallbacks in one bulk send. Returns count per channel.
+    """
+    from app.services.notification_service import notify_many
+
+    channels = run_async(notify_many([tuple(m) for m in messages]))
+    return {channel: channels.count(channel) for channel in set(channels)}
+
+
 @celery.task(name="app.workers.tasks.notify_payment_submitted_task")
 def notify_payment_submitted_task(
     collector_push_token: str | None,
@@ -67,7 +71,7 @@ def notify_payment_submitted_task(
 ) -> str:
     from app.services.notification_service import notify_payment_submitted
 
-    return _run_async(
+    return run_async(
         notify_payment_submitted(collector_push_token, collector_phone, client_name, amount)
     )
 
@@ -81,7 +85,7 @@ def notify_payment_confirmed_task(
 ) -> str:
     from app.services.notification_service import notify_payment_confirmed
 
-    return _run_async(
+    return run_async(
         notify_payment_confirmed(client_push_token, client_phone, amount, balance)
     )
 
@@ -94,7 +98,7 @@ def notify_payment_queried_task(
 ) -> str:
     from app.services.notification_service import notify_payment_queried
 
-    return _run_async(notify_payment_queried(client_push_token, client_phone, note))
+    return run_async(notify_payment_queried(client_push_token, client_phone, note))
 
 
 @celery.task(name="app.workers.tasks.notify_duplicate_task")
@@ -104,7 +108,7 @@ def notify_duplicate_task(
 ) -> str:
     from app.services.notification_service import notify_duplicate_submission
 
-    return _run_async(notify_duplicate_submission(client_push_token, client_phone))
+    return run_async(notify_duplicate_submission(client_push_token, client_phone))
 
 
 @celery.task(name="app.workers.tasks.notify_payout_requested_task")
@@ -116,7 +120,7 @@ def notify_payout_requested_task(
 ) -> str:
     from app.services.notification_service import notify_payout_requested
 
-    return _run_async(
+    return run_async(
         notify_payout_requested(collector_push_token, collector_phone, client_name, amount)
     )
 
@@ -129,7 +133,7 @@ def notify_payout_approved_task(
 ) -> str:
     from app.services.notification_service import notify_payout_approved
 
-    return _run_async(notify_payout_approved(client_push_token, client_phone, amount))
+    return run_async(notify_payout_approved(client_push_token, client_phone, amount))
 
 
 @celery.task(name="app.workers.tasks.notify_payout_declined_task")
@@ -140,17 +144,18 @@ def notify_payout_declined_task(
 ) -> str:
     from app.services.notification_service import notify_payout_declined
 
-    return _run_async(notify_payout_declined(client_push_token, client_phone, reason))
+    return run_async(notify_payout_declined(client_push_token, client_phone, reason))
 
 
 @celery.task(name="app.workers.tasks.daily_reminder_task")
-def daily_reminder_task() -> int:
+def daily_reminder_task() -> dict:
     """
     Send daily reminders to active clients who haven't paid today.
-    Includes streak info for motivation.
+    Streams clients in checkpointed batches with bounded send concurrency.
+    Returns sent/failed counts and throughput.
     Runs at 8 AM Africa/Accra via Celery Beat.
     """
-    return _run_async(_daily_reminder_async())
+    return run_async(_daily_reminder_async())
 
 
 @celery.task(name="app.workers.tasks.payout_reminder_task")
@@ -159,106 +164,152 @@ def payout_reminder_task() -> int:
     Send payout reminders to clients whose payout is in 0-3 days.
     Runs at 9 AM Africa/Accra via Celery Beat.
     """
-    return _run_async(_payout_reminder_async())
+    return run_async(_payout_reminder_async())
 
 
-async def _daily_reminder_async() -> int:
-    from app.services.notification_service import notify_daily_reminder
+@celery.task(name="app.workers.tasks.statement_batch_task")
+def statement_batch_task(
+    job_id: str,
+    collector_id: str,
+    year: int,
+    month: int,
+    months: int,
+    fmt: str,
+) -> dict:
+    """Render all client statements of a collector as one PDF or a ZIP of PDFs."""
+    return run_async(_statement_batch_async(job_id, collector_id, year, month, months, fmt))
 
-    engine = create_async_engine(settings.DATABASE_URL, echo=False)
-    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
-    async with factory() as session:
-        today_start = datetime.combine(date.today(), datetime.min.time()).replace(
-            tzinfo=timezone.utc
-        )
+# Daily reminder fan-out: rows are streamed in batches, each batch is sent
+# with bounded concurrency and then checkpointed, so a crashed run resumes
+# after the last completed batch instead of re-sending.
+REMINDER_BATCH_SIZE = 200
+REMINDER_CONCURRENCY = 50
+REMINDER_CHECKPOINT_TTL = 2 * 24 * 3600
+
+
+def _reminder_checkpoint_key(day: date) -> str:
+    return f"reminders:daily:{day.isoformat()}"
+
+
+async def _load_checkpoint(key: str) -> str | None:
+    from app.cache import get_redis
+
+    try:
+        return await get_redis().get(key)
+    except Exception:
+        logger.warning("Redis unavailable — daily reminders start without checkpoint")
+        return None
+
+
+async def _save_checkpoint(key: str, last_id: str) -> None:
+    from app.cache import get_redis
 
-        # Find active clients who have NOT submitted a payment today
-        # Include streak info for motivational messages
-        result = await session.execute(
+    try:
+        await get_redis().set(key, last_id, ex=REMINDER_CHECKPOINT_TTL)
+    except Exception:
+        logger.warning("Redis unavailable — could not checkpoint daily reminders")
+
+
+async def _daily_reminder_async() -> dict:
+    from app.services.notification_service import daily_reminder_message, notify_many
+
+    today = date.today()
+    today_start = datetime.combine(today, datetime.min.time()).replace(tzinfo=timezone.utc)
+    checkpoint_key = _reminder_checkpoint_key(today)
+    resume_after = await _load_checkpoint(checkpoint_key)
+
+    stats = {"sent": 0, "failed": 0}
+
+    async def send(batch) -> None:
+        # Push first, then one grouped SMS send for the batch's fallbacks
+        messages = [
+            (row.push_token, row.phone,
+             *daily_reminder_message(row.collector_name, float(row.contribution_amount)))
+            for row in batch
+        ]
+        try:
+            channels = await notify_many(messages, REMINDER_CONCURRENCY)
+        except Exception:
+            logger.warning("Daily reminder batch after %s failed", batch[0].id, exc_info=True)
+            channels = ["none"] * len(batch)
+        for channel in channels:
+            stats["failed" if channel == "none" else "sent"] += 1
+
+    started = time.monotonic()
+    async with get_session_factory()() as session:
+        # Active clients who have NOT submitted a payment today, in id order
+        # so the checkpoint is a simple keyset position.
+        result = await session.stream(
             text("""
                 SELECT c.id, c.phone, c.push_token,
                        co.full_name AS collector_name,
-                       co.contribution_amount,
-                       co.contribution_frequency
+                       co.contribution_amount
                 FROM clients c
                 JOIN collectors co ON co.id = c.collector_id
                 WHERE c.is_active = true
+                AND (CAST(:after AS uuid) IS NULL OR c.id > CAST(:after AS uuid))
                 AND NOT EXISTS (
                     SELECT 1 FROM transactions t
                     WHERE t.client_id = c.id
                     AND t.submitted_at >= :today_start
                 )
+                ORDER BY c.id
             """),
-            {"today_start": today_start},
+            {"today_start": today_start, "after": resume_after},
         )
-        rows = result.all()
+        async for batch in result.partitions(REMINDER_BATCH_SIZE):
+            await send(batch)
+            await _save_checkpoint(checkpoint_key, str(batch[-1].id))
+
+    elapsed = time.monotonic() - started
+    total = stats["sent"] + stats["failed"]
+    report = {
+        "sent": stats["sent"],
+        "failed": stats["failed"],
+        "resumed": resume_after is not None,
+        "elapsed_seconds": round(elapsed, 2),
+        "per_second": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    logger.info(
+        "Daily reminders: %d sent, %d failed in %.1fs (%.1f/s)%s",
+        report["sent"],
+        report["failed"],
+        report["elapsed_seconds"],
+        report["per_second"],
+        " [resumed]" if report["resumed"] else "",
+    )
+    return report
+
+
+async def _payout_reminder_async() -> int:
+    from app.services.notification_service import notify_payout_reminder
+    from app.services.schedule_service import get_due_payout_reminders
 
-    await engine.dispose()
+    async with get_session_factory()() as session:
+        # Remind 3 days before, 1 day before, and on the day
+        due = await get_due_payout_reminders(session, date.today(), (0, 1, 3))
 
     count = 0
-    for row in rows:
-        await notify_daily_reminder(
-            row.push_token,
-            row.phone,
-            row.collector_name,
-            float(row.contribution_amount),
+    for entry in due:
+        await notify_payout_reminder(
+            entry["push_token"],
+            entry["phone"],
+            entry["days_until"],
+            entry["payout_date"].strftime("%d %b"),
         )
         count += 1
 
-    logger.info("Sent %d daily reminders", count)
+    logger.info("Sent %d payout reminders", count)
     return count
 
 
-async def _payout_reminder_async() -> int:
-    from app.services.notification_service import notify_payout_reminder
-    from app.services.schedule_service import get_rotation_schedule
-
-    engine = create_async_engine(settings.DATABASE_URL, echo=False)
-    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+async def _statement_batch_async(
+    job_id: str, collector_id: str, year: int, month: int, months: int, fmt: str
+) -> dict:
+    from app.services.statement_batch_service import run_job
 
-    count = 0
-    async with factory() as session:
-        # Get all active collectors with schedules
-        result = await session.execute(
-            text("""
-                SELECT id FROM collectors
-                WHERE is_active = true AND cycle_start_date IS NOT NULL
-            """)
+    async with get_session_factory()() as session:
+        return await run_job(
+            session, job_id, uuid.UUID(collector_id), year, month, months, fmt
         )
-        collector_ids = [row.id for row in result.all()]
-
-        today = date.today()
-
-        for cid in collector_ids:
-            schedule = await get_rotation_schedule(session, cid)
-            if not schedule:
-                continue
-
-            for entry in schedule["entries"]:
-                payout_date = entry["payout_date"]
-                days_until = (payout_date - today).days
-
-                # Remind 3 days before, 1 day before, and on the day
-                if days_until in (0, 1, 3):
-                    # Get client contact info
-                    client_result = await session.execute(
-                        text("""
-                            SELECT phone, push_token FROM clients
-                            WHERE id = :client_id AND is_active = true
-                        """),
-                        {"client_id": entry["client_id"]},
-                    )
-                    client_row = client_result.first()
-                    if client_row:
-                        await notify_payout_reminder(
-                            client_row.push_token,
-                            client_row.phone,
-                            days_until,
-                            payout_date.strftime("%d %b"),
-                        )
-                        count += 1
-
-    await engine.dispose()
-    logger.info("Sent %d payout reminders", count)
-    return count
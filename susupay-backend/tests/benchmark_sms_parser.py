@@ -0,0 +1,109 @@
+"""
+SMS parser benchmark over the sample corpus in tests/sms_samples.
+
+Compares the template-registry parser with the original single-template
+parser (five uncompiled re.search calls) on throughput and HIGH-confidence
+rate. Throughput is timed over several interleaved repeats, after a
+warm-up, and reported as the median with its range, since single runs are
+noisy. Not collected by pytest; run with:
+
+    python -m tests.benchmark_sms_parser [iterations] [repeats]
+"""
+
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.services.sms_parser import parse_sms
+
+SAMPLES_DIR = Path(__file__).parent / "sms_samples"
+
+_LEGACY_PATTERNS = {
+    "amount": r"sent\s+GHS\s?([\d,]+\.?\d*)",
+    "recipient_name": r"sent\s+GHS[\d.,\s]+to\s+([A-Za-z\s]+?)\s*\(",
+    "recipient_phone": r"to\s+[^(]+\((0\d{9})\)",
+    "transaction_id": r"Transaction\s+ID[:\s]+([A-Za-z0-9]+)",
+    "date": r"Date[:\s]+(\d{2}/\d{2}/\d{4}\s+\d{1,2}:\d{2}\s+[AP]M)",
+}
+
+
+def legacy_confidence(text: str) -> str:
+    """The original parser's work (searches and conversions); returns its confidence."""
+    values = {}
+    for name, pattern in _LEGACY_PATTERNS.items():
+        match = re.search(pattern, text, re.IGNORECASE)
+        if not match:
+            continue
+        if name == "amount":
+            values[name] = float(match.group(1).replace(",", ""))
+        elif name == "date":
+            try:
+                values[name] = datetime.strptime(match.group(1), "%d/%m/%Y %I:%M %p")
+            except ValueError:
+                pass
+        else:
+            values[name] = match.group(1).strip()
+    filled = len(values)
+    return "HIGH" if filled == 5 else "PARTIAL" if filled >= 3 else "FAILED"
+
+
+def load_corpus() -> list[tuple[str, str]]:
+    return [(p.stem, p.read_text()) for p in sorted(SAMPLES_DIR.glob("*.txt"))]
+
+
+def _rate(fn, corpus: list[str], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for text in corpus:
+            fn(text)
+    return iterations * len(corpus) / (time.perf_counter() - started)
+
+
+def _rates(fns: dict, corpus: list[str], iterations: int, repeats: int) -> dict[str, list[float]]:
+    """repeats timed runs per parser, interleaved so drift hits both alike."""
+    for fn in fns.values():
+        _rate(fn, corpus, max(iterations // 10, 1))
+    rates: dict[str, list[float]] = {name: [] for name in fns}
+    for _ in range(repeats):
+        for name, fn in fns.items():
+            rates[name].append(_rate(fn, corpus, iterations))
+    return rates
+
+
+def main(iterations: int = 20_000, repeats: int = 7) -> None:
+    samples = load_corpus()
+    texts = [text for _, text in samples]
+
+    print(f"{'sample':<24}{'legacy':<10}{'registry':<10}template")
+    for name, text in samples:
+        parsed = parse_sms(text)
+        print(f"{name:<24}{legacy_confidence(text):<10}{parsed.confidence:<10}{parsed.template}")
+
+    legacy_high = sum(legacy_confidence(t) == "HIGH" for t in texts)
+    new_high = sum(parse_sms(t).confidence == "HIGH" for t in texts)
+    print(f"\nHIGH confidence: legacy {legacy_high}/{len(texts)}, registry {new_high}/{len(texts)}")
+
+    rates = _rates(
+        {"legacy": legacy_confidence, "registry": parse_sms}, texts, iterations, repeats
+    )
+    print(f"\nThroughput over {repeats} runs of {iterations:,} iterations (msg/s):")
+    for name, values in rates.items():
+        print(
+            f"  {name:<10}median {statistics.median(values):>9,.0f}"
+            f"   min {min(values):>9,.0f}   max {max(values):>9,.0f}"
+        )
+    ratios = [new / old for new, old in zip(rates["registry"], rates["legacy"])]
+    print(
+        f"  registry/legacy: median {statistics.median(ratios):.2f}x"
+        f" (range {min(ratios):.2f}x-{max(ratios):.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 7,
+    )
@@ -10,7 +10,7 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_session_factory
 from app.main import app
 
 _ssl_ctx = ssl_module.create_default_context()
@@ -47,6 +47,7 @@ async def _mock_celery_tasks():
 
     task_objects = [
         tasks.send_notification_task,
+        tasks.send_notifications_task,
         tasks.notify_payment_submitted_task,
         tasks.notify_payment_confirmed_task,
         tasks.notify_payment_queried_task,
@@ -55,11 +56,12 @@ async def _mock_celery_tasks():
         tasks.notify_payout_approved_task,
         tasks.notify_payout_declined_task,
         tasks.daily_reminder_task,
+        tasks.statement_batch_task,
     ]
     originals = {}
     for task in task_objects:
         originals[task] = task.delay
-        task.delay = MagicMock(return_value=None)
+        task.delay = MagicMock()
     yield
     for task in task_objects:
         task.delay = originals[task]
@@ -70,7 +72,9 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     async def override_get_db():
         yield db_session
 
+    factory = async_sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: factory
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
     ) as ac:
@@ -78,6 +82,22 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     app.dependency_overrides.clear()
 
 
+@pytest_asyncio.fixture(loop_scope="function")
+async def per_request_sessions(client: AsyncClient, db_session: AsyncSession):
+    """
+    Give every request its own session (and pooled connection) instead of the
+    shared db_session, so concurrent requests really contend in Postgres.
+    """
+    factory = async_sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+
+    async def own_session():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = own_session
+    yield
+
+
 @pytest_asyncio.fixture(loop_scope="function")
 async def flush_ussd_keys():
     """Flush all ussd:* keys from Redis before each USSD test."""
@@ -5,9 +5,18 @@ from decimal import Decimal
 
 import pytest
 from httpx import AsyncClient
-
-from app.services.analytics_service import classify_payment, get_current_period
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.analytics_service import (
+    classify_payment,
+    decode_bitmap,
+    encode_bitmap,
+    get_current_period,
+)
 from app.services.auth_service import create_verification_token
+from app.services.rollup_service import rebuild_daily_totals
+from app.services.streak_service import previous_period, streak_from_state, walk_streak
 
 
 STANDARD_SMS = (
@@ -147,6 +156,33 @@ def test_get_current_period_monthly():
     assert label == "February 2026"
 
 
+def test_previous_period_monthly_wraps_year():
+    assert previous_period("MONTHLY", date(2026, 1, 1)) == date(2025, 12, 1)
+    assert previous_period("WEEKLY", date(2026, 2, 23)) == date(2026, 2, 16)
+
+
+def test_walk_streak_stops_at_gap():
+    today = date(2026, 3, 10)
+    totals = {
+        date(2026, 3, 9): Decimal("20"),
+        date(2026, 3, 8): Decimal("25"),
+        date(2026, 3, 7): Decimal("10"),  # partial breaks the streak
+        date(2026, 3, 6): Decimal("20"),
+    }
+    assert walk_streak(totals, "DAILY", Decimal("20"), today - timedelta(days=1)) == 2
+    assert walk_streak(totals, "DAILY", Decimal("0"), today - timedelta(days=1)) == 0
+
+
+def test_streak_from_state_excludes_current_period():
+    today = date(2026, 3, 10)
+    # Anchored at today: today's payment is not part of the streak yet
+    assert streak_from_state(3, today, "DAILY", today) == 2
+    # Anchored at yesterday
+    assert streak_from_state(3, date(2026, 3, 9), "DAILY", today) == 3
+    # Anchor older than the previous period: streak broken
+    assert streak_from_state(3, date(2026, 3, 8), "DAILY", today) == 0
+
+
 # --- Integration tests ---
 
 
@@ -402,3 +438,167 @@ async def test_group_members_period_status(client: AsyncClient):
     assert len(members) == 1
     assert "period_paid" in members[0]
     assert "period_status" in members[0]
+
+
+@pytest.mark.asyncio
+async def test_daily_rollup_matches_rebuild(client: AsyncClient, db_session: AsyncSession):
+    """Confirmations maintain daily_client_totals; a rebuild reproduces them."""
+    collector_phone = "0244700012"
+    access_token, invite_code = await _create_collector_and_login(client, collector_phone)
+    _, client_id = await _create_client(client, invite_code, "0244800012", "Jack")
+    await _submit_and_confirm(client, access_token, collector_phone, client_id, "TXN-ROLL-001")
+    await _submit_and_confirm(client, access_token, collector_phone, client_id, "TXN-ROLL-002")
+
+    query = text(
+        "SELECT amount, txn_count FROM daily_client_totals WHERE client_id = CAST(:cid AS uuid)"
+    )
+    before = (await db_session.execute(query, {"cid": client_id})).all()
+    assert [(Decimal(str(a)), n) for a, n in before] == [(Decimal("40.00"), 2)]
+
+    await db_session.execute(text("DELETE FROM daily_client_totals"))
+    await db_session.commit()
+    await rebuild_daily_totals(db_session)
+
+    after = (await db_session.execute(query, {"cid": client_id})).all()
+    assert after == before
+
+
+def test_heatmap_bitmap_roundtrip():
+    mask = (1 << 0) | (1 << 9) | (1 << 364)
+    encoded = encode_bitmap(mask, 365)
+    assert len(encoded) == 64  # 46 bytes
+    assert decode_bitmap(encoded) == mask
+
+
+@pytest.mark.asyncio
+async def test_activity_heatmap_compact(client: AsyncClient):
+    """Compact heatmap returns one base64 bitmap per client; today is the last bit."""
+    collector_phone = "0244700013"
+    access_token, invite_code = await _create_collector_and_login(client, collector_phone)
+    _, client_id = await _create_client(client, invite_code, "0244800013", "Kofi")
+    await _submit_and_confirm(client, access_token, collector_phone, client_id, "TXN-HEAT-001")
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    resp = await client.get(
+        "/api/v1/collectors/me/analytics/heatmap?days=365&format=compact", headers=headers
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total_days"] == 365
+    row = data["clients"][0]
+    assert row["paid_count"] == 1
+    assert decode_bitmap(row["bitmap"]) == 1 << 364
+
+    resp = await client.get("/api/v1/collectors/me/analytics/heatmap?days=7", headers=headers)
+    days = resp.json()["clients"][0]["days"]
+    assert len(days) == 7
+    assert [d["paid"] for d in days] == [False] * 6 + [True]
+
+
+@pytest.mark.asyncio
+async def test_bulk_confirm_builds_missing_streaks(client: AsyncClient, db_session: AsyncSession):
+    """A bulk confirm for clients with no stored streak builds all their states at once."""
+    collector_phone = "0244700070"
+    token, invite_code = await _create_collector_and_login(client, collector_phone)
+    _, client_a = await _create_client(client, invite_code, "0244800070", "Streak A")
+    _, client_b = await _create_client(client, invite_code, "0244800071", "Streak B")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    txn_ids = []
+    for cid, ref in ((client_a, "STRK01"), (client_b, "STRK02")):
+        resp = await client.post(
+            "/api/v1/transactions/submit/sms",
+            json={"client_id": cid, "sms_text": STANDARD_SMS.format(momo=collector_phone, txn_id=ref)},
+            headers=headers,
+        )
+        txn_ids.append(resp.json()["transaction_id"])
+
+    count_sql = text("SELECT COUNT(*) FROM client_streaks")
+    assert (await db_session.execute(count_sql)).scalar_one() == 0
+
+    resp = await client.post(
+        "/api/v1/transactions/bulk",
+        json={"action": "confirm", "transaction_ids": txn_ids},
+        headers=headers,
+    )
+    assert resp.json()["succeeded"] == 2
+
+    rows = (await db_session.execute(text(
+        "SELECT client_id::text, frequency, streak_count, last_full_period FROM client_streaks"
+    ))).all()
+    today = date.today()
+    assert sorted(rows) == sorted(
+        (cid, "DAILY", 1, today) for cid in (client_a, client_b)
+    )
+
+
+@pytest.mark.asyncio
+async def test_streak_rebuild_leaves_commit_to_caller(client: AsyncClient, db_session: AsyncSession):
+    """Rebuilding a missing streak state does not commit the caller's pending writes."""
+    import uuid
+
+    from app.services.streak_service import get_payment_streak
+
+    _, invite_code = await _create_collector_and_login(client, "0244700072")
+    _, client_id = await _create_client(client, invite_code, "0244800072", "Pending Name")
+
+    name_sql = text("SELECT full_name FROM clients WHERE id = CAST(:id AS uuid)")
+    await db_session.execute(
+        text("UPDATE clients SET full_name = 'Uncommitted' WHERE id = CAST(:id AS uuid)"),
+        {"id": client_id},
+    )
+    assert await get_payment_streak(db_session, uuid.UUID(client_id), "DAILY", Decimal("20")) == 0
+    await db_session.rollback()
+
+    assert (await db_session.execute(name_sql, {"id": client_id})).scalar_one() == "Pending Name"
+    streaks = (await db_session.execute(text("SELECT COUNT(*) FROM client_streaks"))).scalar_one()
+    assert streaks == 0
+
+
+@pytest.mark.asyncio
+async def test_collector_dashboard_totals_from_rollup(client: AsyncClient):
+    """Today's total and period progress reflect confirmations via the daily rollup."""
+    collector_phone = "0244700073"
+    token, invite_code = await _create_collector_and_login(client, collector_phone)
+    _, paid_client = await _create_client(client, invite_code, "0244800073", "Paid")
+    await _create_client(client, invite_code, "0244800074", "Unpaid")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    resp = await client.post(
+        "/api/v1/transactions/submit/sms",
+        json={"client_id": paid_client, "sms_text": STANDARD_SMS.format(momo=collector_phone, txn_id="DASH01")},
+        headers=headers,
+    )
+    txn_id = resp.json()["transaction_id"]
+    await client.post(f"/api/v1/transactions/{txn_id}/confirm", json={}, headers=headers)
+
+    data = (await client.get("/api/v1/collectors/me/dashboard", headers=headers)).json()
+    assert data["total_confirmed_today"] == 20.0
+    assert float(data["amount_collected"]) == 20.0
+    assert (data["paid_count"], data["partial_count"], data["unpaid_count"]) == (1, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_schedule_update_refreshes_cached_dashboard(client: AsyncClient):
+    """Reordering the rotation is reflected in the (cached) dashboard next payout."""
+    token, invite_code = await _create_collector_and_login(client, "0244700075")
+    _, first = await _create_client(client, invite_code, "0244800075", "First")
+    _, second = await _create_client(client, invite_code, "0244800076", "Second")
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.patch(
+        "/api/v1/collectors/me",
+        json={"cycle_start_date": date.today().isoformat(), "payout_interval_days": 7},
+        headers=headers,
+    )
+
+    for order, expected in (((first, second), "First"), ((second, first), "Second")):
+        resp = await client.put(
+            "/api/v1/collectors/me/schedule",
+            json={"positions": [
+                {"client_id": cid, "position": n} for n, cid in enumerate(order, start=1)
+            ]},
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        data = (await client.get("/api/v1/collectors/me/dashboard", headers=headers)).json()
+        assert data["next_payout_client"] == expected
@@ -1,11 +1,18 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.otp_code import OTPCode
 from app.services.auth_service import (
+    OTP_HASH_PREFIX,
     create_verification_token,
     generate_otp,
     hash_otp,
     hash_pin,
+    pwd_context,
     verify_otp,
     verify_pin,
 )
@@ -30,6 +37,14 @@ def test_otp_hash_and_verify():
     assert not verify_otp("000000", hashed)
 
 
+def test_otp_uses_keyed_hash_and_accepts_legacy_bcrypt():
+    assert hash_otp("123456").startswith(OTP_HASH_PREFIX)
+    assert hash_otp("123456") == hash_otp("123456")
+    legacy = pwd_context.hash("123456")
+    assert verify_otp("123456", legacy)
+    assert not verify_otp("654321", legacy)
+
+
 # --- Integration tests ---
 
 
@@ -503,3 +518,81 @@ async def test_collector_reset_pin(client: AsyncClient):
         json={"phone": phone, "pin": "9999"},
     )
     assert resp.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_otp_locked_after_max_attempts(client: AsyncClient, db_session: AsyncSession):
+    phone = "0244000077"
+    db_session.add(OTPCode(
+        phone=phone,
+        code_hash=hash_otp("123456"),
+        purpose="REGISTER",
+        expires_at=datetime.now(timezone.utc) + timedelta(minutes=5),
+    ))
+    await db_session.commit()
+
+    for _ in range(5):
+        resp = await client.post(
+            "/api/v1/auth/otp/verify",
+            json={"phone": phone, "code": "000000", "purpose": "REGISTER"},
+        )
+        assert resp.status_code == 400
+
+    # Correct code no longer accepted once attempts are exhausted
+    resp = await client.post(
+        "/api/v1/auth/otp/verify",
+        json={"phone": phone, "code": "123456", "purpose": "REGISTER"},
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_concurrent_otp_guesses_capped_and_code_used_once(
+    client: AsyncClient, db_session: AsyncSession, per_request_sessions
+):
+    """Guesses racing on separate connections cannot exceed the attempt limit,
+    and a correct code racing with itself is accepted once."""
+    from sqlalchemy import select
+
+    phone = "0244000078"
+    otp = OTPCode(
+        phone=phone,
+        code_hash=hash_otp("123456"),
+        purpose="REGISTER",
+        expires_at=datetime.now(timezone.utc) + timedelta(minutes=5),
+    )
+    db_session.add(otp)
+    await db_session.commit()
+
+    guesses = [f"{n:06d}" for n in range(12)]
+    results = await asyncio.gather(*(
+        client.post(
+            "/api/v1/auth/otp/verify",
+            json={"phone": phone, "code": code, "purpose": "REGISTER"},
+        )
+        for code in guesses
+    ))
+    assert all(r.status_code == 400 for r in results)
+    db_session.expire_all()
+    attempts = (await db_session.execute(
+        select(OTPCode.attempts).where(OTPCode.id == otp.id)
+    )).scalar_one()
+    assert attempts == 5
+
+    phone = "0244000079"
+    db_session.add(OTPCode(
+        phone=phone,
+        code_hash=hash_otp("654321"),
+        purpose="REGISTER",
+        expires_at=datetime.now(timezone.utc) + timedelta(minutes=5),
+    ))
+    await db_session.commit()
+
+    results = await asyncio.gather(*(
+        client.post(
+            "/api/v1/auth/otp/verify",
+            json={"phone": phone, "code": "654321", "purpose": "REGISTER"},
+        )
+        for _ in range(3)
+    ))
+    assert sorted(r.status_code for r in results) == [200, 400, 400]
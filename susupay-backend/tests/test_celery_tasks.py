@@ -67,3 +67,15 @@ def test_notify_duplicate_task():
         result = notify_duplicate_task(None, "0244000001")
         assert result == "sms"
         mock_fn.assert_called_once_with(None, "0244000001")
+
+
+def test_tasks_share_one_event_loop():
+    """Consecutive tasks run on the same long-lived worker loop."""
+    import asyncio
+
+    from app.workers.runtime import run_async
+
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    assert run_async(current_loop()) is run_async(current_loop())
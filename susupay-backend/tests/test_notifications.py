@@ -34,6 +34,26 @@ async def test_push_dev_mode_returns_true():
     assert result is True
 
 
+@pytest.mark.asyncio
+async def test_push_gone_subscription_is_forgotten(monkeypatch):
+    """A 404/410 from the push service clears the stored subscription."""
+    from app.config import settings
+    from app.services.push_service import PushSubscriptionGone
+
+    monkeypatch.setattr(settings, "VAPID_PRIVATE_KEY", "test-key")
+    token = '{"endpoint": "https://push.example/gone", "keys": {}}'
+    with patch(
+        "app.services.notification_service.send_web_push",
+        new_callable=AsyncMock,
+        side_effect=PushSubscriptionGone("https://push.example/gone"),
+    ), patch(
+        "app.services.notification_service.forget_push_subscription",
+        new_callable=AsyncMock,
+    ) as forget:
+        assert await send_push_notification(token, "Test", "Body") is False
+    forget.assert_awaited_once_with(token)
+
+
 # --- notify (push + SMS fallback) ---
 
 
@@ -129,3 +149,61 @@ async def test_notify_sms_fallback_content():
         channel = await notify(None, "0244000001", "Payment Confirmed", "GHS 20.00")
         assert channel == "sms"
         mock_sms.assert_called_once_with("0244000001", "Payment Confirmed: GHS 20.00")
+
+
+# --- VAPID header cache ---
+
+
+def test_vapid_headers_signed_once_per_origin():
+    from unittest.mock import MagicMock
+
+    from app.services import push_service
+
+    signer = MagicMock()
+    signer.sign.return_value = {"Authorization": "vapid t=token,k=key"}
+    push_service._vapid_headers.clear()
+    with patch.object(push_service, "_get_vapid", return_value=signer):
+        first = push_service.vapid_headers("https://fcm.googleapis.com/fcm/send/abc")
+        second = push_service.vapid_headers("https://fcm.googleapis.com/fcm/send/def")
+        push_service.vapid_headers("https://updates.push.services.mozilla.com/wpush/v2/x")
+    push_service._vapid_headers.clear()
+
+    assert first == second
+    assert signer.sign.call_count == 2
+    claims = signer.sign.call_args_list[0].args[0]
+    assert claims["aud"] == "https://fcm.googleapis.com"
+
+
+# --- Bulk SMS ---
+
+
+@pytest.mark.asyncio
+async def test_send_bulk_sms_groups_identical_bodies():
+    from app.services import sms_service
+
+    messages = [
+        ("0244000001", "Reminder A"),
+        ("0244000002", "Reminder A"),
+        ("0244000003", "Reminder B"),
+    ]
+    with patch.object(sms_service, "_dev_mode", return_value=False), patch.object(
+        sms_service.sms_client, "send_batch", new_callable=AsyncMock, return_value=True
+    ) as send_batch, patch.object(
+        sms_service.sms_client, "send", new_callable=AsyncMock, return_value=False
+    ) as send:
+        results = await sms_service.send_bulk_sms(messages)
+
+    assert results == [True, True, False]
+    send_batch.assert_awaited_once_with(["0244000001", "0244000002"], "Reminder A")
+    send.assert_awaited_once_with("0244000003", "Reminder B")
+
+
+@pytest.mark.asyncio
+async def test_notify_many_falls_back_to_sms():
+    from app.services.notification_service import notify_many
+
+    channels = await notify_many([
+        ("token", "0244000001", "Test", "Hello"),
+        (None, "0244000002", "Test", "Hello"),
+    ])
+    assert channels == ["push", "sms"]
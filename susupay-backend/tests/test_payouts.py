@@ -1,7 +1,13 @@
+import asyncio
+import uuid
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.auth_service import create_verification_token
+from app.services.balance_service import rebuild_client_ledgers, verify_client_ledgers
 
 
 STANDARD_SMS = (
@@ -247,7 +253,7 @@ async def test_cannot_complete_without_approving(client: AsyncClient):
 
 @pytest.mark.asyncio
 async def test_completed_payout_reduces_balance(client: AsyncClient):
-    """Completed payout reduces client balance via the DB view."""
+    """Completed payout reduces client balance via the ledger."""
     coll_phone = "0244700008"
     coll_token, invite = await _create_collector_and_login(client, coll_phone)
     cli_token, cli_id = await _create_client(client, invite, "0244800008")
@@ -436,3 +442,101 @@ async def test_multi_tenant_payout_action_isolation(client: AsyncClient):
         headers={"Authorization": f"Bearer {token_b}"},
     )
     assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_ledger_verify_and_rebuild(client: AsyncClient, db_session: AsyncSession):
+    """A drifted ledger row is reported by verify and repaired by rebuild."""
+    coll_phone = "0244700024"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    cli_token, cli_id = await _create_client(client, invite, "0244800024")
+
+    await _fund_client(client, coll_token, coll_phone, cli_id, "PAY024")
+    assert await verify_client_ledgers(db_session) == []
+
+    await db_session.execute(
+        text("UPDATE client_ledgers SET balance = 999, total_deposits = 999 WHERE client_id = :cid"),
+        {"cid": uuid.UUID(cli_id)},
+    )
+    await db_session.commit()
+
+    mismatches = await verify_client_ledgers(db_session)
+    assert [str(m["client_id"]) for m in mismatches] == [cli_id]
+
+    await rebuild_client_ledgers(db_session)
+    assert await verify_client_ledgers(db_session) == []
+
+    bal = await client.get(
+        "/api/v1/clients/me/balance",
+        headers={"Authorization": f"Bearer {cli_token}"},
+    )
+    assert float(bal.json()["balance"]) == 20.0
+
+
+@pytest.mark.asyncio
+async def test_payout_request_idempotency_key(client: AsyncClient):
+    """Retrying a request with the same Idempotency-Key returns the first payout."""
+    coll_phone = "0244700025"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    cli_token, cli_id = await _create_client(client, invite, "0244800025")
+    await _fund_client(client, coll_token, coll_phone, cli_id, "PAY025")
+
+    headers = {"Authorization": f"Bearer {cli_token}", "Idempotency-Key": "retry-1"}
+    body = {"amount": "10.00", "payout_type": "EMERGENCY"}
+    first = await client.post("/api/v1/payouts/request", json=body, headers=headers)
+    second = await client.post("/api/v1/payouts/request", json=body, headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert first.json()["id"] == second.json()["id"]
+
+    mismatch = await client.post(
+        "/api/v1/payouts/request", json={**body, "amount": "5.00"}, headers=headers
+    )
+    assert mismatch.status_code == 400
+
+    listing = await client.get(
+        "/api/v1/payouts/my-payouts",
+        headers={"Authorization": f"Bearer {cli_token}"},
+    )
+    assert listing.json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_completions_cannot_overdraw(client: AsyncClient, per_request_sessions):
+    """
+    Two approved payouts that together exceed the balance, completed at once
+    on separate connections: the ledger row lock lets only one through.
+    """
+    coll_phone = "0244700026"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    cli_token, cli_id = await _create_client(client, invite, "0244800026")
+    await _fund_client(client, coll_token, coll_phone, cli_id, "PAY026")
+
+    payout_ids = []
+    for _ in range(2):
+        req = await client.post(
+            "/api/v1/payouts/request",
+            json={"amount": "15.00", "payout_type": "EMERGENCY"},
+            headers={"Authorization": f"Bearer {cli_token}"},
+        )
+        payout_ids.append(req.json()["id"])
+        await client.post(
+            f"/api/v1/payouts/{payout_ids[-1]}/approve",
+            headers={"Authorization": f"Bearer {coll_token}"},
+        )
+
+    results = await asyncio.gather(*(
+        client.post(
+            f"/api/v1/payouts/{pid}/complete",
+            headers={"Authorization": f"Bearer {coll_token}"},
+        )
+        for pid in payout_ids
+    ))
+    assert sorted(r.status_code for r in results) == [200, 400]
+    failed = next(r for r in results if r.status_code == 400)
+    assert "insufficient balance" in failed.json()["detail"].lower()
+
+    bal = await client.get(
+        "/api/v1/clients/me/balance",
+        headers={"Authorization": f"Bearer {cli_token}"},
+    )
+    assert float(bal.json()["balance"]) == 5.0
@@ -1,7 +1,16 @@
+import io
+import uuid
+import zipfile
+from datetime import datetime, timezone
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import get_redis
 from app.services.auth_service import create_verification_token
+from app.services.report_service import get_batch_statements
+from app.services.statement_batch_service import run_job
 
 
 STANDARD_SMS = (
@@ -135,6 +144,29 @@ async def test_pdf_returns_valid_pdf(client: AsyncClient):
     assert resp.content[:5] == b"%PDF-"
 
 
+@pytest.mark.asyncio
+async def test_pdf_cached_until_summary_changes(client: AsyncClient):
+    """A rendered PDF is cached per summary version; new data gets a new entry."""
+    coll_phone = "0244900004"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    _, cli_id = await _create_client(client, invite, "0244900104")
+    headers = {"Authorization": f"Bearer {coll_token}"}
+    coll_id = (await client.get("/api/v1/collectors/me", headers=headers)).json()["id"]
+    now = datetime.now(timezone.utc)
+    url = f"/api/v1/reports/monthly-summary/pdf?year={now.year}&month={now.month}"
+    pattern = f"report:pdf:{coll_id}:{now.year}-{now.month:02d}:*"
+
+    first = await client.get(url, headers=headers)
+    second = await client.get(url, headers=headers)
+    assert second.content == first.content
+    assert len(await get_redis().keys(pattern)) == 1
+
+    await _fund_client(client, coll_token, coll_phone, cli_id, "RPTPDF1")
+    third = await client.get(url, headers=headers)
+    assert third.content[:5] == b"%PDF-"
+    assert len(await get_redis().keys(pattern)) == 2
+
+
 @pytest.mark.asyncio
 async def test_client_statement_with_deposits(client: AsyncClient):
     """Client statement shows deposit line items."""
@@ -157,6 +189,36 @@ async def test_client_statement_with_deposits(client: AsyncClient):
     assert data["items"][0]["type"] == "DEPOSIT"
 
 
+@pytest.mark.asyncio
+async def test_client_statement_running_balance_and_yearly(client: AsyncClient):
+    """Running balance accumulates per line; later months open at the prior close."""
+    coll_phone = "0244900007"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    _, cli_id = await _create_client(client, invite, "0244900108", "Yearly Client")
+    await _fund_client(client, coll_token, coll_phone, cli_id, "RPTYR1")
+    await _fund_client(client, coll_token, coll_phone, cli_id, "RPTYR2")
+    headers = {"Authorization": f"Bearer {coll_token}"}
+    now = datetime.now(timezone.utc)
+
+    resp = await client.get(
+        f"/api/v1/reports/client-statement/{cli_id}/yearly?year={now.year}", headers=headers
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["months"] == 12
+    assert [float(i["running_balance"]) for i in data["items"]] == [20.0, 40.0]
+    assert float(data["closing_balance"]) == 40.0
+
+    resp = await client.get(
+        f"/api/v1/reports/client-statement/{cli_id}?year={now.year + 1}&month=1&months=3",
+        headers=headers,
+    )
+    data = resp.json()
+    assert float(data["opening_balance"]) == 40.0
+    assert float(data["closing_balance"]) == 40.0
+    assert data["items"] == []
+
+
 @pytest.mark.asyncio
 async def test_multi_tenant_client_statement(client: AsyncClient):
     """Collector B cannot view Collector A's client statement."""
@@ -185,3 +247,183 @@ async def test_invalid_month_422(client: AsyncClient):
         headers={"Authorization": f"Bearer {coll_token}"},
     )
     assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_ledger_export_csv(client: AsyncClient):
+    """CSV ledger export streams a header plus one row per confirmed deposit."""
+    coll_phone = "0244900005"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    _, cli_id = await _create_client(client, invite, "0244900105", "Export Client")
+    _, other_id = await _create_client(client, invite, "0244900106", "Other Client")
+    await _fund_client(client, coll_token, coll_phone, cli_id, "RPTEXP1")
+    await _fund_client(client, coll_token, coll_phone, other_id, "RPTEXP2")
+    headers = {"Authorization": f"Bearer {coll_token}"}
+
+    resp = await client.get("/api/v1/reports/ledger-export", headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    lines = resp.text.strip().splitlines()
+    assert lines[0] == "date,type,client_name,client_phone,amount,reference"
+    assert len(lines) == 3
+
+    resp = await client.get(
+        f"/api/v1/reports/ledger-export?client_id={cli_id}", headers=headers
+    )
+    lines = resp.text.strip().splitlines()
+    assert len(lines) == 2
+    assert ",DEPOSIT,Export Client,0244900105,20.00,RPTEXP1" in lines[1]
+
+    resp = await client.get(
+        "/api/v1/reports/ledger-export?start=2020-01-01&end=2020-01-31", headers=headers
+    )
+    assert len(resp.text.strip().splitlines()) == 1
+
+
+@pytest.mark.asyncio
+async def test_ledger_export_xlsx(client: AsyncClient):
+    """XLSX export returns a zip-based workbook."""
+    coll_phone = "0244900006"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    _, cli_id = await _create_client(client, invite, "0244900107")
+    await _fund_client(client, coll_token, coll_phone, cli_id, "RPTEXP3")
+
+    resp = await client.get(
+        "/api/v1/reports/ledger-export?format=xlsx",
+        headers={"Authorization": f"Bearer {coll_token}"},
+    )
+    assert resp.status_code == 200
+    assert resp.content[:2] == b"PK"
+
+
+@pytest.mark.asyncio
+async def test_batch_statements_match_single(client: AsyncClient, db_session: AsyncSession):
+    """Set-based batch statements agree with the per-client statement."""
+    coll_phone = "0244900008"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    _, cli_a = await _create_client(client, invite, "0244900109", "Ama")
+    await _create_client(client, invite, "0244900110", "Yaw")
+    await _fund_client(client, coll_token, coll_phone, cli_a, "RPTBAT1")
+    headers = {"Authorization": f"Bearer {coll_token}"}
+    coll_id = (await client.get("/api/v1/collectors/me", headers=headers)).json()["id"]
+    now = datetime.now(timezone.utc)
+
+    statements = await get_batch_statements(db_session, uuid.UUID(coll_id), now.year, now.month)
+    assert [s["client_name"] for s in statements] == ["Ama", "Yaw"]
+    assert statements[1]["items"] == []
+
+    single = await client.get(
+        f"/api/v1/reports/client-statement/{cli_a}?year={now.year}&month={now.month}",
+        headers=headers,
+    )
+    assert float(single.json()["closing_balance"]) == float(statements[0]["closing_balance"])
+
+
+@pytest.mark.asyncio
+async def test_batch_statement_job_zip(client: AsyncClient, db_session: AsyncSession):
+    """A queued batch job reports progress and serves a ZIP with one PDF per client."""
+    coll_phone = "0244900009"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    _, cli_id = await _create_client(client, invite, "0244900111", "Esi")
+    await _create_client(client, invite, "0244900112", "Kwame")
+    await _fund_client(client, coll_token, coll_phone, cli_id, "RPTBAT2")
+    headers = {"Authorization": f"Bearer {coll_token}"}
+    coll_id = (await client.get("/api/v1/collectors/me", headers=headers)).json()["id"]
+    now = datetime.now(timezone.utc)
+
+    resp = await client.post(
+        f"/api/v1/reports/client-statements/batch?year={now.year}&month={now.month}&format=zip",
+        headers=headers,
+    )
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+    assert resp.json()["state"] == "PENDING"
+
+    resp = await client.get(
+        f"/api/v1/reports/client-statements/batch/{job_id}/download", headers=headers
+    )
+    assert resp.status_code == 409
+
+    # Run the worker body inline
+    await run_job(db_session, job_id, uuid.UUID(coll_id), now.year, now.month, 1, "zip")
+
+    job = (await client.get(
+        f"/api/v1/reports/client-statements/batch/{job_id}", headers=headers
+    )).json()
+    assert job["state"] == "SUCCESS"
+    assert (job["done"], job["total"]) == (2, 2)
+
+    resp = await client.get(
+        f"/api/v1/reports/client-statements/batch/{job_id}/download", headers=headers
+    )
+    assert resp.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(resp.content)) as archive:
+        names = archive.namelist()
+        assert len(names) == 2
+        assert all(archive.read(n)[:5] == b"%PDF-" for n in names)
+
+    # The output lives on disk; Redis holds only the job metadata
+    job_hash = await get_redis().hgetall(f"report:batch:{coll_id}:{job_id}")
+    assert int(job_hash["bytes"]) == len(resp.content)
+    assert not await get_redis().exists(f"report:batch:{coll_id}:{job_id}:file")
+
+
+@pytest.mark.asyncio
+async def test_batch_statement_job_queue_unavailable(client: AsyncClient):
+    """A job the broker refused is marked FAILURE and the request gets a 503."""
+    from app.workers import tasks
+
+    coll_token, _ = await _create_collector_and_login(client, "0244900010")
+    headers = {"Authorization": f"Bearer {coll_token}"}
+    coll_id = (await client.get("/api/v1/collectors/me", headers=headers)).json()["id"]
+    now = datetime.now(timezone.utc)
+
+    tasks.statement_batch_task.delay.side_effect = ConnectionError("broker down")
+    resp = await client.post(
+        f"/api/v1/reports/client-statements/batch?year={now.year}&month={now.month}",
+        headers=headers,
+    )
+    assert resp.status_code == 503
+
+    keys = [k async for k in get_redis().scan_iter(f"report:batch:{coll_id}:*")]
+    assert len(keys) == 1
+    assert await get_redis().hget(keys[0], "state") == "FAILURE"
+
+
+@pytest.mark.asyncio
+async def test_statement_orders_same_timestamp_entries_stably(
+    client: AsyncClient, db_session: AsyncSession
+):
+    """Entries sharing a timestamp get one order for both the window and the rows."""
+    from sqlalchemy import text
+
+    coll_phone = "0244900011"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    _, cli_id = await _create_client(client, invite, "0244900113", "Abena")
+    for txn_id in ("RPTTIE1", "RPTTIE2", "RPTTIE3"):
+        await _fund_client(client, coll_token, coll_phone, cli_id, txn_id)
+    now = datetime.now(timezone.utc)
+    await db_session.execute(
+        text(
+            "UPDATE transactions SET confirmed_at = :ts, "
+            "amount = CASE mtn_txn_id WHEN 'RPTTIE1' THEN 5 WHEN 'RPTTIE2' THEN 7 ELSE 11 END "
+            "WHERE client_id = CAST(:client_id AS uuid)"
+        ),
+        {"ts": now.replace(microsecond=0), "client_id": cli_id},
+    )
+    await db_session.commit()
+
+    headers = {"Authorization": f"Bearer {coll_token}"}
+    coll_id = (await client.get("/api/v1/collectors/me", headers=headers)).json()["id"]
+    single = (await client.get(
+        f"/api/v1/reports/client-statement/{cli_id}?year={now.year}&month={now.month}",
+        headers=headers,
+    )).json()
+    items = single["items"]
+    balance = float(single["opening_balance"])
+    for item in items:
+        balance += float(item["amount"])
+        assert float(item["running_balance"]) == balance
+
+    [batch] = await get_batch_statements(db_session, uuid.UUID(coll_id), now.year, now.month)
+    assert [float(i["amount"]) for i in batch["items"]] == [float(i["amount"]) for i in items]
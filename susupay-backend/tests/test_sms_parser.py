@@ -66,3 +66,52 @@ def test_parse_amount_no_decimals():
     result = parse_mtn_sms(sms)
     assert result.amount == 100.0
     assert result.transaction_id == "NODEC123"
+
+
+def test_parse_vodafone_sent():
+    sms = (
+        "0000012345678 Confirmed. GHS20.00 sent to AMA OWUSU 0201234567 "
+        "on 22/02/2025 at 10:34 AM. Your Telecel Cash balance is GHS130.00."
+    )
+    result = parse_mtn_sms(sms)
+    assert result.provider == "VODAFONE"
+    assert result.confidence == "HIGH"
+    assert result.amount == 20.00
+    assert result.recipient_phone == "0201234567"
+    assert result.transaction_id == "0000012345678"
+    assert result.transaction_date == datetime(2025, 2, 22, 10, 34)
+
+
+def test_parse_airteltigo_sent():
+    sms = (
+        "You have sent GHS 20.00 to 0271234567 AMA OWUSU. Trans ID: ATM123456. "
+        "Date: 22-02-2025 14:05. Balance: GHS 130.00"
+    )
+    result = parse_mtn_sms(sms)
+    assert result.template == "airteltigo_sent"
+    assert result.confidence == "HIGH"
+    assert result.recipient_name == "AMA OWUSU"
+    assert result.transaction_date == datetime(2025, 2, 22, 14, 5)
+
+
+def test_parse_mtn_payment_made_normalizes_phone():
+    sms = (
+        "Payment made for GHS 20.00 to AMA OWUSU 233244123456. Current Balance: GHS 130.00. "
+        "Reference: susu. Transaction ID: 21345678901. Date: 2025-02-22 10:34:11."
+    )
+    result = parse_mtn_sms(sms)
+    assert result.template == "mtn_payment_made"
+    assert result.confidence == "HIGH"
+    assert result.recipient_phone == "0244123456"
+
+
+def test_parse_mtn_received_sets_sender():
+    sms = (
+        "Payment received for GHS 20.00 from KOFI MENSAH 0244987654. "
+        "Current Balance: GHS 150.00. Transaction ID: 31345678902. Date: 2025-02-22 10:34:11"
+    )
+    result = parse_mtn_sms(sms)
+    assert result.template == "mtn_received"
+    assert result.sender_name == "KOFI MENSAH"
+    assert result.sender_phone == "0244987654"
+    assert result.recipient_phone is None
@@ -1,4 +1,8 @@
+import asyncio
 import io
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
 
 import pytest
 from httpx import AsyncClient
@@ -380,3 +384,270 @@ async def test_multi_tenant_transaction_isolation(client: AsyncClient):
         headers={"Authorization": f"Bearer {token_b}"},
     )
     assert resp.status_code == 400
+
+
+def test_memory_rate_limit_window_and_eviction():
+    from app.services import rate_limiter
+
+    rate_limiter._store.clear()
+    for i in range(3):
+        assert rate_limiter._memory_hit("k", 3, 60, True, 1000.0 + i) is True
+    assert rate_limiter._memory_hit("k", 3, 60, False, 1010.0) is False
+    # A refused hit is not recorded
+    assert rate_limiter._memory_hit("k", 3, 60, True, 1020.0) is False
+    assert len(rate_limiter._store["k"]) == 3
+    # Oldest hit has left the window
+    assert rate_limiter._memory_hit("k", 3, 60, False, 1060.5) is True
+
+    with patch.object(rate_limiter, "FALLBACK_MAX_KEYS", 2):
+        rate_limiter._memory_hit("a", 3, 60, True, 1000.0)
+        rate_limiter._memory_hit("b", 3, 60, True, 1000.0)
+    assert list(rate_limiter._store) == ["a", "b"]
+    rate_limiter._store.clear()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_refused_hits_not_recorded():
+    from app.cache import get_redis
+    from app.services import rate_limiter
+
+    key = f"ratelimit:test:{uuid.uuid4()}"
+    results = await asyncio.gather(*(rate_limiter.hit(key, 2, 60) for _ in range(5)))
+    assert sorted(results) == [False, False, False, True, True]
+    assert await get_redis().zcard(key) == 2
+    await get_redis().delete(key)
+
+
+@pytest.mark.asyncio
+async def test_deactivated_client_rejected_after_cached_login(client: AsyncClient):
+    collector_token, invite_code = await _create_collector_and_login(client, "0244300001")
+    client_token, client_id = await _create_client(client, invite_code, "0244300002")
+    client_headers = {"Authorization": f"Bearer {client_token}"}
+
+    # Warm the principal cache
+    assert (await client.get("/api/v1/clients/me", headers=client_headers)).status_code == 200
+    assert (await client.get("/api/v1/transactions/my-history", headers=client_headers)).status_code == 200
+
+    resp = await client.delete(
+        f"/api/v1/collectors/me/clients/{client_id}",
+        headers={"Authorization": f"Bearer {collector_token}"},
+    )
+    assert resp.status_code == 204
+
+    assert (await client.get("/api/v1/clients/me", headers=client_headers)).status_code == 401
+    assert (await client.get("/api/v1/transactions/my-history", headers=client_headers)).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_deactivated_collector_cannot_confirm(client: AsyncClient, db_session):
+    """Money-moving routes re-check is_active even with no cache tombstone."""
+    from sqlalchemy import update
+
+    from app.models.collector import Collector
+
+    collector_phone = "0244300003"
+    access_token, invite_code = await _create_collector_and_login(client, collector_phone)
+    _, client_id = await _create_client(client, invite_code, "0244300004")
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    sms = STANDARD_SMS.format(momo=collector_phone, txn_id="INACTIVE01")
+    submit_resp = await client.post(
+        "/api/v1/transactions/submit/sms",
+        json={"client_id": client_id, "sms_text": sms},
+        headers=headers,
+    )
+    txn_id = submit_resp.json()["transaction_id"]
+
+    await db_session.execute(
+        update(Collector).where(Collector.phone == collector_phone).values(is_active=False)
+    )
+    await db_session.commit()
+
+    resp = await client.post(f"/api/v1/transactions/{txn_id}/confirm", json={}, headers=headers)
+    assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_feed_cursor_pagination(client: AsyncClient):
+    collector_phone = "0244500030"
+    access_token, invite_code = await _create_collector_and_login(client, collector_phone)
+    _, client_id = await _create_client(client, invite_code, "0244600030", "Cursor Client")
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    for i in range(3):
+        await client.post(
+            "/api/v1/transactions/submit/sms",
+            json={"client_id": client_id, "sms_text": STANDARD_SMS.format(momo=collector_phone, txn_id=f"CURSOR0{i}")},
+            headers=headers,
+        )
+
+    first = await client.get(
+        "/api/v1/transactions/feed",
+        params={"limit": 2, "include_total": "false"},
+        headers=headers,
+    )
+    assert first.status_code == 200
+    page1 = first.json()
+    assert page1["total"] is None
+    assert len(page1["items"]) == 2
+    assert page1["next_cursor"]
+
+    second = await client.get(
+        "/api/v1/transactions/feed",
+        params={"limit": 2, "cursor": page1["next_cursor"]},
+        headers=headers,
+    )
+    page2 = second.json()
+    assert page2["total"] == 3
+    assert len(page2["items"]) == 1
+    assert page2["next_cursor"] is None
+    seen = {item["id"] for item in page1["items"] + page2["items"]}
+    assert len(seen) == 3
+
+    bad = await client.get("/api/v1/transactions/feed", params={"cursor": "garbage"}, headers=headers)
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_bulk_confirm_reports_per_id_outcomes(client: AsyncClient):
+    from app.workers.tasks import send_notifications_task
+
+    collector_phone = "0244500031"
+    access_token, invite_code = await _create_collector_and_login(client, collector_phone)
+    token_a, client_a = await _create_client(client, invite_code, "0244600031", "Bulk A")
+    token_b, client_b = await _create_client(client, invite_code, "0244600032", "Bulk B")
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    txn_ids = []
+    for cid, ref in ((client_a, "BULK01"), (client_a, "BULK02"), (client_b, "BULK03")):
+        submit = await client.post(
+            "/api/v1/transactions/submit/sms",
+            json={"client_id": cid, "sms_text": STANDARD_SMS.format(momo=collector_phone, txn_id=ref)},
+            headers=headers,
+        )
+        txn_ids.append(submit.json()["transaction_id"])
+    missing = str(uuid.uuid4())
+
+    resp = await client.post(
+        "/api/v1/transactions/bulk",
+        json={"action": "confirm", "transaction_ids": [*txn_ids, missing, txn_ids[0]]},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert (data["succeeded"], data["failed"]) == (3, 1)
+    assert [r["transaction_id"] for r in data["results"]] == [*txn_ids, missing]
+    assert all(r["status"] == "CONFIRMED" and r["confirmed_at"] for r in data["results"][:3])
+    assert data["results"][3]["error"] == "Transaction not found"
+
+    send_notifications_task.delay.assert_called_once()
+    assert len(send_notifications_task.delay.call_args.args[0]) == 3
+
+    for token, expected in ((token_a, 40.0), (token_b, 20.0)):
+        bal = await client.get(
+            "/api/v1/clients/me/balance",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert float(bal.json()["balance"]) == expected
+
+    again = await client.post(
+        "/api/v1/transactions/bulk",
+        json={"action": "confirm", "transaction_ids": txn_ids[:1]},
+        headers=headers,
+    )
+    assert again.json()["results"][0]["error"] == "Cannot confirm transaction with status CONFIRMED"
+
+    no_note = await client.post(
+        "/api/v1/transactions/bulk",
+        json={"action": "query", "transaction_ids": txn_ids[:1]},
+        headers=headers,
+    )
+    assert no_note.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_concurrent_confirms_credit_once(client: AsyncClient, per_request_sessions):
+    """Two confirms of one transaction racing on separate connections credit it once."""
+    collector_phone = "0244500033"
+    access_token, invite_code = await _create_collector_and_login(client, collector_phone)
+    client_token, client_id = await _create_client(client, invite_code, "0244600033")
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    submit = await client.post(
+        "/api/v1/transactions/submit/sms",
+        json={"client_id": client_id, "sms_text": STANDARD_SMS.format(momo=collector_phone, txn_id="RACE01")},
+        headers=headers,
+    )
+    txn_id = submit.json()["transaction_id"]
+
+    results = await asyncio.gather(*(
+        client.post(f"/api/v1/transactions/{txn_id}/confirm", json={}, headers=headers)
+        for _ in range(2)
+    ))
+    assert sorted(r.status_code for r in results) == [200, 400]
+
+    bal = await client.get(
+        "/api/v1/clients/me/balance",
+        headers={"Authorization": f"Bearer {client_token}"},
+    )
+    assert float(bal.json()["balance"]) == 20.0
+
+
+RECEIVED_SMS = (
+    "Payment received for GHS 20.00 from KOFI MENSAH {sender}. "
+    "Current Balance: GHS 150.00. Transaction ID: {txn_id}. Date: {date}"
+)
+
+
+def _received_sms(sender: str, txn_id: str) -> str:
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return RECEIVED_SMS.format(sender=sender, txn_id=txn_id, date=now)
+
+
+@pytest.mark.asyncio
+async def test_received_sms_from_client_pasted_by_collector_is_high_trust(client: AsyncClient):
+    collector_phone = "0244500034"
+    access_token, invite_code = await _create_collector_and_login(client, collector_phone)
+    _, client_id = await _create_client(client, invite_code, "0244600034")
+
+    resp = await client.post(
+        "/api/v1/transactions/submit/sms",
+        json={"client_id": client_id, "sms_text": _received_sms("0244600034", "31300000001")},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    data = resp.json()
+    assert data["parsed"]["confidence"] == "HIGH"
+    assert data["trust_level"] == "HIGH"
+
+
+@pytest.mark.asyncio
+async def test_received_sms_from_other_sender_is_flagged(client: AsyncClient):
+    collector_phone = "0244500035"
+    access_token, invite_code = await _create_collector_and_login(client, collector_phone)
+    _, client_id = await _create_client(client, invite_code, "0244600035")
+
+    resp = await client.post(
+        "/api/v1/transactions/submit/sms",
+        json={"client_id": client_id, "sms_text": _received_sms("0244999998", "31300000002")},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    data = resp.json()
+    assert data["trust_level"] == "MEDIUM"
+    assert any(f["field"] == "sender_phone" for f in data["validation_flags"])
+
+
+@pytest.mark.asyncio
+async def test_received_sms_pasted_by_client_is_flagged(client: AsyncClient):
+    """A client's own "payment received" SMS means the client was paid, not the collector."""
+    collector_phone = "0244500036"
+    _, invite_code = await _create_collector_and_login(client, collector_phone)
+    client_token, _ = await _create_client(client, invite_code, "0244600036")
+
+    resp = await client.post(
+        "/api/v1/transactions/client/submit/sms",
+        json={"sms_text": _received_sms("0244600036", "31300000003")},
+        headers={"Authorization": f"Bearer {client_token}"},
+    )
+    data = resp.json()
+    assert data["trust_level"] == "MEDIUM"
+    assert any(f["field"] == "direction" for f in data["validation_flags"])
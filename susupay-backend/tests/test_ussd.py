@@ -1,6 +1,9 @@
+import uuid
+
 import pytest
 from httpx import AsyncClient
 
+from app.cache import get_redis
 from app.services.auth_service import create_verification_token
 
 
@@ -350,3 +353,139 @@ async def test_session_timeout(client: AsyncClient, flush_ussd_keys):
     data = resp.json()
     assert data["Type"] == "Release"
     assert data["Message"] == ""
+
+
+@pytest.mark.asyncio
+async def test_session_stored_as_hash_and_hops_timed(
+    client: AsyncClient, flush_ussd_keys, monkeypatch
+):
+    """Session lives in a Redis hash; each hop lands in the stage histogram."""
+    from app.config import settings
+
+    coll_phone = "0244900021"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    await _create_client(client, invite, "0244900022")
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "metrics-secret")
+    metrics_headers = {"Authorization": "Bearer metrics-secret"}
+    assert (await client.get("/api/v1/ussd/metrics")).status_code in (401, 403)
+    assert (await client.get(
+        "/api/v1/ussd/metrics", headers={"Authorization": f"Bearer {coll_token}"}
+    )).status_code == 401
+
+    before = (await client.get("/api/v1/ussd/metrics", headers=metrics_headers)).json()["stages"]
+    await client.post(
+        "/api/v1/ussd/callback",
+        json=_ussd_request("sess-013", "233244900022"),
+    )
+    await client.post(
+        "/api/v1/ussd/callback",
+        json=_ussd_request("sess-013", "233244900022", "Response", "3", 2),
+    )
+
+    session = await get_redis().hgetall("ussd:sess-013")
+    assert session["stage"] == "PAYOUT_AMOUNT"
+    assert session["phone"] == "0244900022"
+    assert 0 < await get_redis().ttl("ussd:sess-013") <= 300
+
+    after = (await client.get("/api/v1/ussd/metrics", headers=metrics_headers)).json()["stages"]
+    for stage in ("INITIATION", "MAIN_MENU.3"):
+        assert after[stage]["count"] == before.get(stage, {"count": 0})["count"] + 1
+
+
+@pytest.mark.asyncio
+async def test_menu_screens_served_from_snapshot(client: AsyncClient, flush_ussd_keys):
+    """Initiation warms the client's screen snapshot; confirming a payment drops it."""
+    coll_phone = "0244900023"
+    coll_token, invite = await _create_collector_and_login(client, coll_phone)
+    _, cli_id = await _create_client(client, invite, "0244900024")
+
+    await client.post(
+        "/api/v1/ussd/callback",
+        json=_ussd_request("sess-014", "233244900024"),
+    )
+    snapshot = await get_redis().hgetall(f"ussd:snapshot:{cli_id}")
+    assert snapshot["1"].endswith("your balance is GHS 0.00")
+    assert snapshot["2"] == "No transactions found."
+
+    await _fund_client(client, coll_token, coll_phone, cli_id, "USSD014")
+    assert not await get_redis().exists(f"ussd:snapshot:{cli_id}")
+
+    await client.post(
+        "/api/v1/ussd/callback",
+        json=_ussd_request("sess-015", "233244900024"),
+    )
+    resp = await client.post(
+        "/api/v1/ussd/callback",
+        json=_ussd_request("sess-015", "233244900024", "Response", "1", 2),
+    )
+    assert "GHS 20.00" in resp.json()["Message"]
+    snapshot = await get_redis().hgetall(f"ussd:snapshot:{cli_id}")
+    assert snapshot["2"].startswith("Recent payments:\nGHS 20.00 on ")
+
+
+@pytest.mark.asyncio
+async def test_snapshot_build_racing_invalidation_not_stored(
+    client: AsyncClient, db_session, flush_ussd_keys
+):
+    """A snapshot built before an invalidation is not written back after it."""
+    from app.services import ussd_snapshot
+
+    _, invite = await _create_collector_and_login(client, "0244900025")
+    _, cli_id = await _create_client(client, invite, "0244900026")
+    client_uuid = uuid.UUID(cli_id)
+    key = ussd_snapshot._snapshot_key(client_uuid)
+
+    generation = await ussd_snapshot._generation(key)
+    screens = await ussd_snapshot._build_snapshot(db_session, client_uuid)
+    await ussd_snapshot.invalidate_ussd_snapshot(client_uuid)
+    assert not await ussd_snapshot._store_if_current(key, generation, screens)
+    assert not await get_redis().exists(key)
+
+    await ussd_snapshot.warm_snapshot(db_session, client_uuid)
+    assert await get_redis().hget(key, ussd_snapshot.BALANCE_SCREEN) == screens["1"]
+
+
+@pytest.mark.asyncio
+async def test_multi_group_member_selects_group(client: AsyncClient, flush_ussd_keys):
+    """A phone in two groups picks one from a cached list, then gets that group's menu."""
+    coll_a_phone, coll_b_phone = "0244900025", "0244900026"
+    token_a, invite_a = await _create_collector_and_login(client, coll_a_phone, "Alpha Susu")
+    _, invite_b = await _create_collector_and_login(client, coll_b_phone, "Beta Susu")
+    _, cli_a = await _create_client(client, invite_a, "0244900027")
+    _, cli_b = await _create_client(client, invite_b, "0244900027")
+    await _fund_client(client, token_a, coll_a_phone, cli_a, "USSD016")
+
+    resp = await client.post(
+        "/api/v1/ussd/callback",
+        json=_ussd_request("sess-016", "233244900027"),
+    )
+    data = resp.json()
+    assert data["Type"] == "Response"
+    assert data["Message"] == (
+        "Select your group:\n1. Alpha Susu (GHS 20.00)\n2. Beta Susu (GHS 0.00)"
+    )
+    session = await get_redis().hgetall("ussd:sess-016")
+    assert session["stage"] == "GROUP_SELECT"
+    assert "client_id" not in session
+
+    resp = await client.post(
+        "/api/v1/ussd/callback",
+        json=_ussd_request("sess-016", "233244900027", "Response", "9", 2),
+    )
+    assert resp.json()["Message"].startswith("Invalid option.\nSelect your group:")
+
+    resp = await client.post(
+        "/api/v1/ussd/callback",
+        json=_ussd_request("sess-016", "233244900027", "Response", "2", 3),
+    )
+    assert "Check Balance" in resp.json()["Message"]
+    session = await get_redis().hgetall("ussd:sess-016")
+    assert session["stage"] == "MAIN_MENU"
+    assert session["client_id"] == cli_b
+
+    resp = await client.post(
+        "/api/v1/ussd/callback",
+        json=_ussd_request("sess-016", "233244900027", "Response", "4", 4),
+    )
+    assert resp.json()["Message"] == f"Collector: Beta Susu\nPhone: {coll_b_phone}"